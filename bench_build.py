@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+전체 빌드 프로필의 성능을 기록하고 이전 실행과 비교하는 도구
+
+표준 빌드 프로필을 실행하면서 단계마다 wall 시간, CPU 시간 (user + sys),
+최대 RSS, 출력 파일 크기를 측정하고, 기록 파일 (JSON Lines) 끝에 추가합니다.
+같은 호스트, 같은 프로필의 최근 WINDOW 번 기록의 중앙값을 기준으로
+THRESHOLD % 넘게 늘어난 항목을 표시하고, 최근 기록의 추세 표를 출력합니다.
+
+프로필 (PROFILES 에 정의, 지정한 순서대로 실행):
+- quick:   task quick 과 같은 빌드 (Regular 만)
+- console: task build:console + polish 와 같은 빌드 (1:2, 모든 웨이트)
+- nerd:    build/GLG-Mono-Regular.ttf 하나에 Nerd Fonts 패치 + 한글 bearing 재조정
+
+각 단계의 출력은 HISTORY 와 같은 디렉토리의 logs/ 에 저장합니다.
+최대 RSS 는 단계 프로세스와 그 자식 프로세스 중 가장 큰 값입니다 (wait4).
+
+Usage:
+    python bench_build.py [--profile NAME]... [--check] [--trend]
+
+Options:
+    --profile NAME      실행할 프로필 (기본: quick console nerd)
+    --history FILE      기록 파일 (기본: benchmarks/perf_history.jsonl)
+    --window N          기준으로 쓰는 최근 기록 수 (기본: 5)
+    --threshold PCT     회귀로 보는 증가율 (기본: 10)
+    --check             회귀가 있으면 실패 (exit 1)
+    --trend             빌드하지 않고 추세 표만 출력
+    --help              도움말 표시
+"""
+
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from fonttools_script import BUILD_FONTS_DIR, NEW_FONT_NAME
+
+DEFAULT_HISTORY = "benchmarks/perf_history.jsonl"
+NERD_OUTPUT_DIR = f"{BUILD_FONTS_DIR}/perf-nerd"
+BASE_FONT = f"{BUILD_FONTS_DIR}/{NEW_FONT_NAME.replace(' ', '')}-Regular.ttf"
+
+# 프로필 -> [(단계 이름, 명령)]
+PROFILES = {
+    "quick": [
+        ("fontforge", [sys.executable, "fontforge_script.py", "--debug"]),
+        ("fonttools", [sys.executable, "fonttools_script.py"]),
+    ],
+    "console": [
+        ("fontforge", [sys.executable, "fontforge_script.py", "--console"]),
+        ("fonttools", [sys.executable, "fonttools_script.py", "Console"]),
+    ],
+    "nerd": [
+        (
+            "patch",
+            [
+                "fontforge",
+                "--script",
+                "FontPatcher/font-patcher",
+                "--complete",
+                "--careful",
+                "--mono",
+                "--no-progressbars",
+                "--quiet",
+                "--makegroups",
+                "0",
+                "--glyphcache",
+                "cache/nerd-glyphs",
+                "--outputdir",
+                NERD_OUTPUT_DIR,
+                "--outputname",
+                "{family}NF-{style}",
+                BASE_FONT,
+            ],
+        ),
+        ("bearing", [sys.executable, "fix_nf_korean_bearing.py", "--dir", NERD_OUTPUT_DIR]),
+    ],
+}
+
+# 비교하는 측정 항목
+METRICS = ("wall", "cpu", "peak_rss", "output_bytes")
+# 이보다 작은 시간 증가는 측정 오차로 보고 회귀로 표시하지 않는다 (초)
+MIN_SECONDS = 1.0
+
+
+def git_commit():
+    """(현재 커밋의 짧은 해시, 커밋하지 않은 변경이 있는지)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status.strip())
+
+
+def output_bytes(since):
+    """since 이후에 저장된 build 디렉토리의 파일 크기 합계"""
+    total = 0
+    for path in glob.glob(f"{BUILD_FONTS_DIR}/**/*", recursive=True):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if os.path.isfile(path) and stat.st_mtime >= since:
+            total += stat.st_size
+    return total
+
+
+def run_stage(command, log_path):
+    """명령을 실행하고 측정값을 반환 (실패하면 CalledProcessError)"""
+    start = time.time()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 로 이 프로세스 (와 그 자식) 만의 자원 사용량을 얻는다
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.time() - start
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    return {
+        "wall": round(wall, 2),
+        "cpu": round(usage.ru_utime + usage.ru_stime, 2),
+        "peak_rss": usage.ru_maxrss * 1024,
+        "output_bytes": output_bytes(start),
+    }
+
+
+def run_profile(name, log_dir):
+    """프로필의 단계를 순서대로 실행하고 {단계 이름: 측정값} 을 반환"""
+    if name == "nerd":
+        if not os.path.exists(BASE_FONT):
+            raise FileNotFoundError(f"{BASE_FONT} 가 없습니다 (quick 또는 console 을 먼저 실행)")
+        shutil.rmtree(NERD_OUTPUT_DIR, ignore_errors=True)
+        os.makedirs(NERD_OUTPUT_DIR)
+    stages = {}
+    for stage, command in PROFILES[name]:
+        log_path = f"{log_dir}/{name}-{stage}.log"
+        stages[stage] = run_stage(command, log_path)
+        print(f"  ✓ {name}/{stage}: {format_metrics(stages[stage])}")
+    return stages
+
+
+def format_metrics(metrics):
+    return (
+        f"{metrics['wall']:.1f}s wall, {metrics['cpu']:.1f}s cpu, "
+        f"{metrics['peak_rss'] / 1024 / 1024:.0f} MB peak, "
+        f"{metrics['output_bytes'] / 1024 / 1024:.1f} MB out"
+    )
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(path, record):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def baseline_records(history, record, window):
+    """같은 호스트, 같은 프로필의 최근 window 개 기록 (record 자신은 제외)"""
+    same = [
+        r
+        for r in history
+        if r is not record
+        and r["host"] == record["host"]
+        and r["profile"] == record["profile"]
+    ]
+    return same[-window:]
+
+
+def find_regressions(record, baseline, threshold):
+    """기준 (중앙값) 보다 threshold % 넘게 늘어난 항목의 설명 목록"""
+    regressions = []
+    for stage, metrics in record["stages"].items():
+        for metric in METRICS:
+            values = [
+                r["stages"][stage][metric]
+                for r in baseline
+                if stage in r["stages"] and metric in r["stages"][stage]
+            ]
+            if not values:
+                continue
+            base = statistics.median(values)
+            if metric in ("wall", "cpu") and metrics[metric] - base < MIN_SECONDS:
+                continue
+            if base > 0 and metrics[metric] > base * (1 + threshold / 100):
+                change = (metrics[metric] - base) / base * 100
+                regressions.append(
+                    f"{record['profile']}/{stage} {metric}: "
+                    f"{metrics[metric]:,} (기준 {base:,}, {change:+.1f}%)"
+                )
+    return regressions
+
+
+def print_trend(history, profile, host, count):
+    """프로필의 최근 기록을 한 줄씩 표시 (단계별 wall 시간과 최대 RSS)"""
+    records = [r for r in history if r["profile"] == profile and r["host"] == host]
+    if not records:
+        return
+    stages = [stage for stage, _ in PROFILES.get(profile, [])]
+    print(f"--- {profile} ({host}, 최근 {min(count, len(records))}회) ---")
+    header = "".join(f"{stage:>12}" for stage in stages)
+    print(f"  {'date':<16} {'commit':<10}{header}{'total':>10}{'peak':>9}")
+    for r in records[-count:]:
+        walls = [r["stages"].get(stage, {}).get("wall") for stage in stages]
+        cells = "".join(
+            f"{wall:>11.1f}s" if wall is not None else f"{'-':>12}" for wall in walls
+        )
+        total = sum(wall for wall in walls if wall is not None)
+        peak = max(m.get("peak_rss", 0) for m in r["stages"].values()) / 1024 / 1024
+        commit = r["commit"] + ("*" if r.get("dirty") else "")
+        print(f"  {r['date'][:16]:<16} {commit:<10}{cells}{total:>9.1f}s{peak:>6.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="빌드 프로필의 성능을 기록하고 이전 실행과 비교",
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        choices=list(PROFILES),
+        help="실행할 프로필 (기본: quick console nerd)",
+    )
+    parser.add_argument(
+        "--history",
+        default=DEFAULT_HISTORY,
+        help=f"기록 파일 (기본: {DEFAULT_HISTORY})",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=5,
+        help="기준으로 쓰는 최근 기록 수 (기본: 5)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="회귀로 보는 증가율 %% (기본: 10)",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="회귀가 있으면 실패",
+    )
+    parser.add_argument(
+        "--trend",
+        action="store_true",
+        help="빌드하지 않고 추세 표만 출력",
+    )
+    args = parser.parse_args()
+
+    profiles = args.profile or list(PROFILES)
+    history = load_history(args.history)
+    host = platform.node()
+    if args.trend:
+        for profile in profiles:
+            print_trend(history, profile, host, args.window + 1)
+        return 0
+
+    log_dir = f"{os.path.dirname(args.history) or '.'}/logs"
+    os.makedirs(log_dir, exist_ok=True)
+    commit, dirty = git_commit()
+    regressions = []
+    for profile in profiles:
+        print(f"⏱️  {profile}")
+        try:
+            stages = run_profile(profile, log_dir)
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            print(f"❌ {profile}: {e} (로그: {log_dir})")
+            return 1
+        record = {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "dirty": dirty,
+            "host": host,
+            "profile": profile,
+            "stages": stages,
+        }
+        baseline = baseline_records(history, record, args.window)
+        regressions += find_regressions(record, baseline, args.threshold)
+        append_history(args.history, record)
+        history.append(record)
+        print_trend(history, profile, host, args.window + 1)
+
+    for regression in regressions:
+        print(f"  ⚠️  {regression}")
+    if args.check and regressions:
+        print(f"❌ {len(regressions)}개 항목이 기준보다 {args.threshold:g}% 넘게 늘었습니다")
+        return 1
+    print(f"✅ 기록 저장: {args.history}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!fontforge --lang=py -script
+
+# fontforge_script.py のステージ毎のマイクロベンチマーク
+# 実際のソースフォントから作った固定のフィクスチャ (small, medium, full) を使い、
+# ステージを 1 つずつ単独で実行して所要時間とピークメモリを計測する。
+# ステージの入力フォントは直前のステージまで実行した状態を sfd に保存しておき、
+# 繰り返しの度に開き直すので、毎回同じ入力で計測できる。
+# 結果は JSON に保存し、--compare で別のコミットの結果と比べる。
+
+import copy
+import contextlib
+import datetime
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+import fontforge
+from fontTools import ttLib
+
+import fontforge_script
+from font_server import current_rss
+from mini_sources import referenced_codepoints, stride_sample, subset_font
+from stage_graph import cache_path, check_stages, run_isolated, store_outputs
+
+# フィクスチャの大きさ -> 各ソースフォントから取り出すコードポイント数 (None はソースそのもの)
+FIXTURE_SIZES = {"small": 300, "medium": 3000, "full": None}
+DEFAULT_SIZES = ["small", "medium"]
+BENCH_DIR = "benchmarks"
+NERD_FONT = "nerd-fonts/SymbolsNerdFont-Regular.ttf"
+# fontforge_script.SOURCE_FONTS_DIR はフィクスチャに差し替えるので元の値を覚えておく
+SOURCE_FONTS_DIR = fontforge_script.SOURCE_FONTS_DIR
+
+options = {}
+
+
+def main():
+    get_options()
+    if options.get("unknown-option"):
+        usage()
+        return 1
+
+    for name in ("35", "console", "nerd-font", "hidden-zenkaku-space"):
+        if options.get(name):
+            fontforge_script.options[name] = True
+    style = options.get("style", "Regular")
+    sizes = options.get("size", DEFAULT_SIZES)
+    names = options.get("stage")
+    warmup = options.get("warmup", 1)
+    repeat = options.get("repeat", 3)
+
+    commit, dirty = git_commit()
+    output = options.get("output", f"{BENCH_DIR}/stages-{commit}.json")
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "options": sorted(fontforge_script.options),
+        "style": style,
+        "warmup": warmup,
+        "repeat": repeat,
+        "fixtures": {},
+        "results": {},
+    }
+    try:
+        for size in sizes:
+            fixture_dir = prepare_fixture(size, style)
+            print(f"=== Benchmark {style} ({size}: {fixture_dir}) ===")
+            fontforge_script.SOURCE_FONTS_DIR = fixture_dir
+            results["fixtures"][size] = fixture_dir
+            results["results"][size] = bench_stages(style, names, warmup, repeat)
+    finally:
+        fontforge_script.SOURCE_FONTS_DIR = SOURCE_FONTS_DIR
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+        f.write("\n")
+    print(f"Saved {output}")
+
+    if options.get("compare"):
+        with open(options["compare"], encoding="utf-8") as f:
+            print_comparison(json.load(f), results)
+    return 0
+
+
+def usage():
+    print(
+        f"Usage: {sys.argv[0]} "
+        "[--hidden-zenkaku-space] [--35] [--console] [--nerd-font] [--style STYLE] "
+        "[--size small|medium|full]... [--stage NAME]... "
+        "[--warmup N] [--repeat N] [--output FILE] [--compare FILE]"
+    )
+
+
+def get_options():
+    """オプションを取得する (fontforge_script.py と同じバリエーション指定を使う)"""
+
+    global options
+
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg in ("--hidden-zenkaku-space", "--35", "--console", "--nerd-font"):
+            options[arg[2:]] = True
+        elif arg == "--style":
+            options["style"] = next(args, "Regular")
+        elif arg == "--size":
+            size = next(args, "")
+            if size not in FIXTURE_SIZES:
+                options["unknown-option"] = True
+                return
+            options.setdefault("size", []).append(size)
+        elif arg == "--stage":
+            options.setdefault("stage", []).append(next(args, ""))
+        elif arg == "--warmup":
+            options["warmup"] = int(next(args, "1"))
+        elif arg == "--repeat":
+            options["repeat"] = max(1, int(next(args, "3")))
+        elif arg == "--output":
+            options["output"] = next(args, "")
+        elif arg == "--compare":
+            options["compare"] = next(args, "")
+        else:
+            options["unknown-option"] = True
+            return
+
+
+def git_commit():
+    """(現在のコミットの短いハッシュ, 未コミットの変更があるか)"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status.strip())
+
+
+def fixture_files(style):
+    """スタイルのビルドで使うソースファイル ([サブセットするフォント], [そのままコピーするもの])"""
+    jp_style = style.replace("Italic", "") or "Regular"
+    hack_style = "Bold" if "Bold" in style else "Regular"
+    fonts = [
+        fontforge_script.JP_FONT.replace("{style}", jp_style),
+        fontforge_script.KR_FONT.replace("{style}", jp_style),
+        fontforge_script.ENG_FONT.replace("{style}", style),
+        fontforge_script.HACK_FONT.replace("{style}", hack_style),
+        NERD_FONT,
+    ]
+    # 調整用のグリフ (AdjustedGlyphs) とボックス描画は小さいのでそのまま使う
+    others = [
+        os.path.dirname(fontforge_script.IDEOGRAPHIC_SPACE),
+        "FullWidthBoxDrawings.sfd",
+    ]
+    return fonts, others
+
+
+def prepare_fixture(size, style):
+    """フィクスチャのソースディレクトリを返す (なければ作る)
+    ソースの各フォントから、参照されるコードポイントと、cmap から等間隔に選んだ
+    コードポイントだけを残す。ソースファイルと作り方が同じなら同じディレクトリを使う。
+    """
+    count = FIXTURE_SIZES[size]
+    if count is None:
+        return SOURCE_FONTS_DIR
+    fonts, others = fixture_files(style)
+    required = referenced_codepoints()
+
+    key = hashlib.sha256()
+    key.update(f"{size}:{count}:{sorted(required)}".encode())
+    for func in (make_fixture_font, subset_font):
+        key.update(inspect.getsource(func).encode())
+    for path in fonts + others:
+        stat = os.stat(f"{SOURCE_FONTS_DIR}/{path}")
+        key.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    fixture_dir = (
+        f"{fontforge_script.CACHE_FONTS_DIR}/bench-{size}-{key.hexdigest()[:16]}"
+    )
+    if os.path.exists(fixture_dir):
+        return fixture_dir
+
+    print(f"make {size} fixture: {fixture_dir}")
+    tmp_dir = f"{fixture_dir}.{os.getpid()}.tmp"
+    for path in fonts:
+        make_fixture_font(
+            f"{SOURCE_FONTS_DIR}/{path}", f"{tmp_dir}/{path}", count, required
+        )
+    for path in others:
+        source_path = f"{SOURCE_FONTS_DIR}/{path}"
+        if os.path.isdir(source_path):
+            shutil.copytree(source_path, f"{tmp_dir}/{path}")
+        else:
+            os.makedirs(os.path.dirname(f"{tmp_dir}/{path}"), exist_ok=True)
+            shutil.copyfile(source_path, f"{tmp_dir}/{path}")
+    os.replace(tmp_dir, fixture_dir)
+    return fixture_dir
+
+
+def make_fixture_font(source_path, output_path, count, required):
+    """required と、cmap から等間隔に選んだ count 個のコードポイントだけを残したフォントを保存する"""
+    font = ttLib.TTFont(source_path, lazy=True)
+    cmap = set(font.getBestCmap())
+    font.close()
+    subset_font(source_path, output_path, stride_sample(cmap, count) | (required & cmap))
+
+
+def bench_stages(style, names, warmup, repeat):
+    """ステージを宣言順に進めながら、対象のステージを単独で繰り返し計測する
+    {ステージ名: 計測結果} を返す。
+    """
+    jp_style = style.replace("Italic", "") or "Regular"
+    values = {"jp_style": jp_style, "eng_style": style, "jp_font": None}
+    values.update(fontforge_script.get_build_values(style))
+    stages = fontforge_script.PREPARE_STAGES + fontforge_script.BUILD_STAGES
+    check_stages(stages, values, fontforge_script.options)
+    snapshot_dir = f"{fontforge_script.BUILD_FONTS_DIR}/.bench"
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    results = {}
+    try:
+        for stage in stages:
+            if not stage.enabled(fontforge_script.options, values):
+                continue
+            if names is None or stage.name in names:
+                snapshot = save_snapshot(stage, values, snapshot_dir)
+                samples = [
+                    measure(stage, open_snapshot(values, snapshot), snapshot_dir)
+                    for _ in range(warmup + repeat)
+                ][warmup:]
+                results[stage.name] = summarize(samples)
+                print_result(stage.name, results[stage.name])
+            advance(stage, values)
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+    return results
+
+
+def save_snapshot(stage, values, snapshot_dir):
+    """ステージの入力のうちフォントを sfd に保存する ({値の名前: パス})"""
+    snapshot = {}
+    for name in stage.inputs:
+        if isinstance(values[name], fontforge.font):
+            path = f"{snapshot_dir}/{name}.sfd"
+            values[name].save(path)
+            snapshot[name] = path
+    return snapshot
+
+
+def open_snapshot(values, snapshot):
+    """スナップショットから開き直したフォントと、複製したその他の値"""
+    copied = {
+        name: value if isinstance(value, fontforge.font) else copy.deepcopy(value)
+        for name, value in values.items()
+    }
+    for name, path in snapshot.items():
+        copied[name] = fontforge.open(path)
+    return copied
+
+
+def measure(stage, values, snapshot_dir):
+    """ステージを 1 回実行して (経過秒数, CPU 秒数, ピーク RSS の増加量) を返す"""
+    args = [values[name] for name in stage.inputs]
+    if stage.isolated:
+        output_path = f"{snapshot_dir}/{stage.name}.ttf"
+        args = [output_path] + args
+    peak_available = reset_peak_rss()
+    before = current_rss()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = stage.func(*args)
+    cpu = time.process_time() - cpu_start
+    elapsed = time.perf_counter() - start
+    peak = max(peak_rss() - before, 0) if peak_available else None
+
+    # 開き直した入力と、ステージが作ったフォントを閉じる
+    # (close_font のようにステージの中で閉じている場合もある)
+    results = result if isinstance(result, tuple) else (result,)
+    fonts = {
+        id(font): font
+        for font in [values[name] for name in stage.inputs] + list(results)
+        if isinstance(font, fontforge.font)
+    }
+    for font in fonts.values():
+        with contextlib.suppress(Exception):
+            font.close()
+    if stage.isolated and os.path.exists(output_path):
+        os.remove(output_path)
+    return elapsed, cpu, peak
+
+
+def advance(stage, values):
+    """次のステージの入力を作るため、ステージを本来の入力で 1 回実行する"""
+    args = [values[name] for name in stage.inputs]
+    if stage.isolated:
+        output_path = cache_path(stage, values, fontforge_script.CACHE_FONTS_DIR)
+        if not os.path.exists(output_path):
+            os.makedirs(fontforge_script.CACHE_FONTS_DIR, exist_ok=True)
+            run_isolated(stage.name, stage.func, output_path, args)
+        values[stage.outputs[0]] = output_path
+    else:
+        store_outputs(stage, stage.func(*args), values)
+
+
+def reset_peak_rss():
+    """ピーク RSS (VmHWM) を現在の RSS に戻す (Linux 4.0 以降, できなければ False)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss():
+    """このプロセスのピーク RSS (バイト)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def summarize(samples):
+    times = [elapsed for elapsed, _, _ in samples]
+    peaks = [peak for _, _, peak in samples if peak is not None]
+    return {
+        "times": [round(elapsed, 4) for elapsed in times],
+        "median": round(statistics.median(times), 4),
+        "min": round(min(times), 4),
+        "cpu_median": round(statistics.median(cpu for _, cpu, _ in samples), 4),
+        "peak_rss": max(peaks) if peaks else None,
+    }
+
+
+def print_result(name, result):
+    peak = result["peak_rss"]
+    peak_text = f"{peak / 1024 / 1024:8.1f} MB" if peak is not None else "       n/a"
+    print(
+        f"  {name:<44} {result['median']:8.3f}s "
+        f"(min {result['min']:.3f}s, cpu {result['cpu_median']:.3f}s) {peak_text}"
+    )
+
+
+def print_comparison(base, current):
+    """2 つの結果の中央値を比べて表示する"""
+    print(f"--- {base['commit']} -> {current['commit']} (median) ---")
+    for size, stages in current["results"].items():
+        base_stages = base["results"].get(size, {})
+        for name, result in stages.items():
+            if name not in base_stages:
+                continue
+            old = base_stages[name]["median"]
+            new = result["median"]
+            change = f"{(new - old) / old * 100:+6.1f}%" if old > 0 else "     -"
+            print(f"  {size:<7} {name:<44} {old:8.3f}s -> {new:8.3f}s {change}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+# ビルドのトレース (Chrome trace 形式) を記録し、1 つの trace.json にまとめる
+#
+# 環境変数 GLG_TRACE_DIR にディレクトリを指定すると、各ツールのステージが区間
+# (名前, pid, 開始時刻, 所要時間, スタイルやバリエーションのタグ) を
+# そのディレクトリのプロセス毎の JSON Lines ファイルに追記する。
+# 指定がなければ span() は使い回しの nullcontext を返し、traced() は関数を
+# そのまま返すので、トレースしないときの負荷はほとんどない。
+#
+# シェルスクリプトからは run でコマンド全体を 1 区間として記録し、
+# 最後に merge で trace.json (chrome://tracing や Perfetto で開ける) を作る。
+#
+#   python build_trace.py run NAME [--tag KEY=VALUE]... -- COMMAND...
+#   python build_trace.py merge [--dir DIR] [--output FILE]
+
+import argparse
+import contextlib
+import functools
+import glob
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+TRACE_DIR = os.environ.get("GLG_TRACE_DIR") or None
+
+_NULL_SPAN = contextlib.nullcontext()
+# set_tags() で指定した、このプロセスの全区間に付けるタグ (fork した子プロセスにも引き継がれる)
+_tags = {}
+
+
+def write_event(event):
+    """イベントをこのプロセスのファイルに 1 行で追記する"""
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = f"{TRACE_DIR}/{platform.node()}-{os.getpid()}.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+def set_tags(**tags):
+    """このプロセスで記録する全区間に付けるタグ (None の値は付けない)"""
+    _tags.update(tags)
+
+
+def name_process(name):
+    """トレースビューアに表示するこのプロセスの名前"""
+    if TRACE_DIR is None:
+        return
+    write_event(
+        {"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": name}}
+    )
+
+
+def span(name, **tags):
+    """with span("name", style=...) の区間を記録する"""
+    if TRACE_DIR is None:
+        return _NULL_SPAN
+    return _span(name, tags)
+
+
+@contextlib.contextmanager
+def _span(name, tags):
+    args = {key: value for key, value in {**_tags, **tags}.items() if value is not None}
+    start = time.time()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = type(e).__name__
+        raise
+    finally:
+        write_event(
+            {
+                "name": name,
+                "cat": os.path.basename(sys.argv[0]),
+                "ph": "X",
+                "ts": int(start * 1_000_000),
+                "dur": int((time.time() - start) * 1_000_000),
+                "pid": os.getpid(),
+                "tid": threading.get_native_id(),
+                "args": args,
+            }
+        )
+
+
+def traced(name, *tag_names):
+    """関数の実行を区間として記録するデコレータ (tag_names の引数をタグにする)"""
+
+    def decorator(func):
+        if TRACE_DIR is None:
+            return func
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            with span(name, **{tag: arguments.get(tag) for tag in tag_names}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def run_command(name, tags, command):
+    """コマンドを実行し、全体を 1 区間として記録して終了コードを返す"""
+    start = time.time()
+    process = subprocess.Popen(command)
+    returncode = process.wait()
+    if TRACE_DIR is not None:
+        if returncode != 0:
+            tags["exit"] = returncode
+        # コマンドのプロセスの区間にすると、その中で記録された区間が入れ子に表示される
+        write_event(
+            {
+                "name": name,
+                "cat": "run",
+                "ph": "X",
+                "ts": int(start * 1_000_000),
+                "dur": int((time.time() - start) * 1_000_000),
+                "pid": process.pid,
+                "tid": process.pid,
+                "args": tags,
+            }
+        )
+    return returncode
+
+
+def load_events(trace_dir):
+    """ディレクトリの全ファイルのイベントを [(ホスト名, イベント)] で返す"""
+    events = []
+    for path in sorted(glob.glob(f"{trace_dir}/*.jsonl")):
+        host = os.path.basename(path).rsplit("-", 1)[0]
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append((host, json.loads(line)))
+                except json.JSONDecodeError:
+                    # 書き込み中に終了したプロセスの途中の行
+                    continue
+    return events
+
+
+def merge(trace_dir, output):
+    """記録を Chrome trace 形式の 1 ファイルにまとめ、区間の数を返す"""
+    events = load_events(trace_dir)
+    hosts = sorted({host for host, _ in events})
+    spans = [event for _, event in events if event["ph"] == "X"]
+    start = min((event["ts"] for event in spans), default=0)
+
+    merged = []
+    names = {}
+    for host, event in events:
+        event = dict(event)
+        # 複数のマシンの記録をまとめる場合は pid が重ならないようにずらす
+        if len(hosts) > 1:
+            event["pid"] += hosts.index(host) * 10_000_000
+            if "tid" in event:
+                event["tid"] += hosts.index(host) * 10_000_000
+        if event["ph"] == "M":
+            name = event["args"]["name"]
+            names[event["pid"]] = f"{name} ({host})" if len(hosts) > 1 else name
+            continue
+        event["ts"] -= start
+        merged.append(event)
+    merged.sort(key=lambda event: (event["ts"], -event["dur"]))
+    metadata = [
+        {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+        for pid, name in sorted(names.items())
+    ]
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"traceEvents": metadata + merged, "displayTimeUnit": "ms"},
+            f,
+            ensure_ascii=False,
+        )
+    return len(merged)
+
+
+def parse_tag(value):
+    key, sep, tag = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE: {value}")
+    return key, tag
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and merge build trace spans")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run a command as one span")
+    run_parser.add_argument("name")
+    run_parser.add_argument("--tag", type=parse_tag, action="append", default=[])
+    merge_parser = commands.add_parser("merge", help="merge the spans into trace.json")
+    merge_parser.add_argument("--dir", default=TRACE_DIR, help="trace directory")
+    merge_parser.add_argument("--output", help="output file (default: DIR/trace.json)")
+    # "--" より後ろは run で実行するコマンド
+    argv = sys.argv[1:]
+    command = []
+    if "--" in argv:
+        argv, command = argv[: argv.index("--")], argv[argv.index("--") + 1 :]
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        if not command:
+            parser.error("run needs a command after --")
+        return run_command(args.name, dict(args.tag), command)
+
+    if args.dir is None:
+        parser.error("set GLG_TRACE_DIR or --dir")
+    output = args.output or f"{args.dir}/trace.json"
+    count = merge(args.dir, output)
+    print(f"Merged {count} spans from {args.dir} into {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,13 @@
 # Builds Console variants with Nerd Fonts patches
 #
 # Usage:
-#   ./build_with_taskfile.sh [--with-35] [--skip-nerd] [--nerd-only] [--help]
+#   ./build_with_taskfile.sh [--with-35] [--skip-nerd] [--nerd-only] [--trace] [--help]
 #
 # Options:
 #   --with-35     Also build GLG-Mono35Console (3:5 ratio, adds 16 more fonts)
 #   --skip-nerd   Skip Nerd Fonts patching (not recommended for releases)
 #   --nerd-only   Only run Nerd Fonts patching (requires existing fonts)
+#   --trace       Record a trace timeline of every stage (traces/<date>/trace.json)
 #   --help        Show this help message
 
 set -e  # Exit on error
@@ -34,6 +35,10 @@ OPTIONS:
                     Requires fonts already built in build/ directory
                     Useful for adding Nerd Fonts to existing builds
 
+    --trace         Record trace spans of every step and tool stage into
+                    $GLG_TRACE_DIR (default: traces/<date>) and merge them
+                    into trace.json (open in chrome://tracing or Perfetto)
+
     --help          Show this help message
 
 EXAMPLES:
@@ -75,6 +80,7 @@ EOF
 BUILD_35=false
 INCLUDE_NERD=true  # Default: Include Nerd Fonts (soomtong's official build)
 NERD_ONLY=false
+TRACE=false
 
 # Check if no arguments provided
 if [[ $# -eq 0 ]]; then
@@ -101,10 +107,14 @@ while [[ $# -gt 0 ]]; do
             INCLUDE_NERD=true
             shift
             ;;
+        --trace)
+            TRACE=true
+            shift
+            ;;
         *)
             echo "❌ Unknown option: $1"
             echo ""
-            echo "Usage: $0 [--with-35] [--skip-nerd] [--nerd-only] [--help]"
+            echo "Usage: $0 [--with-35] [--skip-nerd] [--nerd-only] [--trace] [--help]"
             echo "Run with --help for detailed information"
             exit 1
             ;;
@@ -131,6 +141,25 @@ fi
 # Read version from build.ini
 VERSION=$(grep "^VERSION" build.ini | cut -d'=' -f2 | tr -d ' ')
 
+# Tracing: the tools record their stages into GLG_TRACE_DIR, and each step
+# below is recorded as one span around the whole task
+if [ "$TRACE" = true ]; then
+    export GLG_TRACE_DIR="${GLG_TRACE_DIR:-traces/$(date +%Y%m%d-%H%M%S)}"
+    mkdir -p "$GLG_TRACE_DIR"
+    echo "🔍 Tracing into $GLG_TRACE_DIR"
+    echo ""
+fi
+
+trace_step() {
+    local name="$1"
+    shift
+    if [ -n "$GLG_TRACE_DIR" ]; then
+        python build_trace.py run "$name" -- "$@"
+    else
+        "$@"
+    fi
+}
+
 # Start timing
 START_TIME=$(date +%s)
 
@@ -142,7 +171,7 @@ if [ "$NERD_ONLY" = false ]; then
     # Stage 1: Clean
     echo "🧹 Step 1/4: Clean build directory"
     echo "-----------------------------------"
-    task clean
+    trace_step clean task clean
     echo "✅ Clean complete"
     echo ""
 
@@ -153,13 +182,13 @@ if [ "$NERD_ONLY" = false ]; then
     echo ""
 
     echo "Building GLG-Mono (1:2 ratio)..."
-    time task build:console 2>"$BUILD_LOG"
+    time trace_step build:console task build:console 2>"$BUILD_LOG"
     echo "✅ GLG-Mono fontforge complete"
     echo ""
 
     if [ "$BUILD_35" = true ]; then
         echo "Building GLG-Mono35Console (3:5 ratio)..."
-        time task build:console35 2>>"$BUILD_LOG"
+        time trace_step build:console35 task build:console35 2>>"$BUILD_LOG"
         echo "✅ GLG-Mono35Console fontforge complete"
         echo ""
     fi
@@ -172,10 +201,10 @@ if [ "$NERD_ONLY" = false ]; then
 
     if [ "$BUILD_35" = true ]; then
         echo "Processing all Console variants..."
-        time task polish 2>>"$BUILD_LOG"
+        time trace_step polish task polish 2>>"$BUILD_LOG"
     else
         echo "Processing GLG-Mono only..."
-        time task polish:variant VARIANT=Console 2>>"$BUILD_LOG"
+        time trace_step polish task polish:variant VARIANT=Console 2>>"$BUILD_LOG"
     fi
     echo "✅ FontTools complete"
     echo ""
@@ -225,14 +254,14 @@ if [ "$INCLUDE_NERD" = true ] || [ "$NERD_ONLY" = true ]; then
         echo "  (Monitor in another terminal: tail -f $NERD_LOG)"
         echo ""
         # Run patch - stderr to log, stdout to console
-        time task patch:nerd:all 2>"$NERD_LOG"
+        time trace_step patch:nerd task patch:nerd:all 2>"$NERD_LOG"
     else
         echo "Starting Nerd Fonts patch for GLG-Mono only..."
         echo "  (Progress: console output, Detailed logs: $NERD_LOG)"
         echo "  (Monitor in another terminal: tail -f $NERD_LOG)"
         echo ""
         # Run patch for GLG-Mono only
-        time task patch:nerd 2>"$NERD_LOG"
+        time trace_step patch:nerd task patch:nerd 2>"$NERD_LOG"
     fi
 
     echo ""
@@ -272,6 +301,11 @@ echo ""
 echo "⏱️  Total build time: ${MINUTES}m ${SECONDS}s"
 echo ""
 
+if [ -n "$GLG_TRACE_DIR" ]; then
+    python build_trace.py merge --dir "$GLG_TRACE_DIR"
+    echo ""
+fi
+
 # Summary
 echo "✅ Build Complete!"
 echo "=================="
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+같은 아웃라인을 가진 글리프를 복합 글리프 참조로 바꿔 glyf 테이블을 줄이는 도구
+
+materialize_altuni_glyphs() 가 altuni 코드포인트마다 아웃라인을 복사하는 등,
+결합한 폰트에는 바이트 단위로 같은 글리프가 여러 개 들어 있습니다.
+글리프 데이터 (윤곽), advance, lsb 가 모두 같은 글리프는 처음 나온 글리프를
+구성 요소 하나로 참조하는 복합 글리프로 바꿉니다.
+글리프 ID 와 cmap/GSUB 는 그대로이므로 다른 테이블은 고치지 않습니다.
+
+힌팅 명령어가 있는 글리프 (ttfautohint 를 거친 ENG 글리프) 는 복합 글리프로
+바꾸면 명령어가 사라지므로 대상에서 제외합니다.
+
+Usage:
+    python dedup_outlines.py [--write] FONT ...
+
+Options:
+    FONT            검사할 폰트 (.ttf)
+    --write         중복 글리프를 복합 글리프로 바꿔서 덮어쓰기
+                    (지정하지 않으면 줄어드는 바이트 수만 보고)
+    --help          도움말 표시
+"""
+
+import argparse
+import struct
+import sys
+
+from fontTools import ttLib
+from fontTools.ttLib.tables._g_l_y_f import (
+    ROUND_XY_TO_GRID,
+    USE_MY_METRICS,
+    Glyph,
+    GlyphComponent,
+)
+
+
+def outline_key(glyph, glyf):
+    """중복 판정용 키 (아웃라인이 없거나 힌팅 명령어가 있으면 None)"""
+    if hasattr(glyph, "data"):
+        # 패딩만 제거하고, 압축된 데이터를 펼치지 않고 비교한다
+        glyph.trim()
+        data = bytes(glyph.data)
+    else:
+        data = glyph.compile(glyf, recalcBBoxes=False)
+    if len(data) < 10:
+        return None
+    num_contours = struct.unpack(">h", data[:2])[0]
+    if num_contours <= 0:
+        return None
+    instruction_length = struct.unpack_from(">H", data, 10 + 2 * num_contours)[0]
+    if instruction_length:
+        return None
+    return data
+
+
+def find_duplicate_outlines(font):
+    """{중복 글리프 이름: 처음 나온 같은 글리프 이름} 과 각 글리프 데이터를 반환"""
+    glyf = font["glyf"]
+    hmtx = font["hmtx"]
+    first = {}
+    duplicates = {}
+    data_by_name = {}
+    for name in font.getGlyphOrder():
+        data = outline_key(glyf.glyphs[name], glyf)
+        if data is None:
+            continue
+        key = (data, hmtx[name])
+        if key in first:
+            duplicates[name] = first[key]
+        else:
+            first[key] = name
+        data_by_name[name] = data
+    return duplicates, data_by_name
+
+
+def make_reference_glyph(base_name, base_data):
+    """base_name 을 원점에 그대로 놓는 복합 글리프 (바운딩 박스는 base 와 같음)"""
+    component = GlyphComponent()
+    component.glyphName = base_name
+    component.x = component.y = 0
+    component.flags = USE_MY_METRICS | ROUND_XY_TO_GRID
+    glyph = Glyph()
+    glyph.numberOfContours = -1
+    glyph.components = [component]
+    glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax = struct.unpack_from(
+        ">4h", base_data, 2
+    )
+    return glyph
+
+
+def dedup_outlines(font):
+    """중복 아웃라인을 복합 글리프로 바꾸고 (바꾼 글리프 수, 줄어든 바이트 수) 를 반환"""
+    duplicates, data_by_name = find_duplicate_outlines(font)
+    if not duplicates:
+        return 0, 0
+
+    glyf = font["glyf"]
+    saved = 0
+    max_points = max_contours = 0
+    for name, base_name in duplicates.items():
+        base_data = data_by_name[base_name]
+        glyph = make_reference_glyph(base_name, base_data)
+        glyf.glyphs[name] = glyph
+        saved += len(data_by_name[name]) - len(glyph.compile(glyf, recalcBBoxes=False))
+        num_contours = struct.unpack(">h", base_data[:2])[0]
+        num_points = struct.unpack_from(">H", base_data, 10 + 2 * (num_contours - 1))[0] + 1
+        max_points = max(max_points, num_points)
+        max_contours = max(max_contours, num_contours)
+
+    # recalcBBoxes=False 로 저장해도 maxp 가 복합 글리프를 반영하도록 갱신
+    maxp = font["maxp"]
+    maxp.maxComponentElements = max(maxp.maxComponentElements, 1)
+    maxp.maxComponentDepth = max(maxp.maxComponentDepth, 1)
+    maxp.maxCompositePoints = max(maxp.maxCompositePoints, max_points)
+    maxp.maxCompositeContours = max(maxp.maxCompositeContours, max_contours)
+    return len(duplicates), saved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="같은 아웃라인의 글리프를 복합 글리프 참조로 바꿔 폰트 크기를 줄임",
+    )
+    parser.add_argument("fonts", nargs="+", help="검사할 폰트")
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="중복 글리프를 복합 글리프로 바꿔서 덮어쓰기",
+    )
+    args = parser.parse_args()
+
+    total_saved = 0
+    for font_path in args.fonts:
+        font = ttLib.TTFont(font_path, recalcBBoxes=False)
+        count, saved = dedup_outlines(font)
+        total_saved += saved
+        if count and args.write:
+            font.save(font_path)
+        print(f"  ✓ {font_path}: {count} duplicate glyphs, {saved:,} bytes")
+        font.close()
+    if len(args.fonts) > 1:
+        print(f"  total: {total_saved:,} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
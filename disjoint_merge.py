@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+cmap 이 겹치지 않는 ENG/JP 폰트 전용의 빠른 결합 도구
+
+fontforge_script.py 의 delete_duplicate_glyphs 를 거친 ENG 폰트와 JP 폰트는
+코드포인트가 겹치지 않으므로, fontTools.merge.Merger 의 중복 글리프 판정과
+글리프 전체의 재컴파일이 필요 없습니다.
+
+- glyf/loca/hmtx: 압축된 글리프 데이터를 그대로 이어 붙임 (JP 쪽 힌팅만 제거)
+- cmap: 두 폰트의 매핑을 합침 (겹치면 Merger 로 되돌아감)
+- fpgm/prep/cvt/gasp/name 등: ENG 폰트의 것을 사용
+- head/hhea/maxp/OS/2/post 와 GSUB/GPOS/GDEF: Merger 와 같은 테이블 단위 규칙으로 결합
+
+글리프 데이터를 펼치지 않도록 결합한 폰트는 recalcBBoxes=False 로 저장하며,
+바운딩 박스 관련 값은 두 폰트의 값에서 Merger 와 같은 규칙 (min/max) 으로 구합니다.
+
+Usage:
+    python disjoint_merge.py [--compare] [-o OUTPUT] ENG_FONT JP_FONT
+
+Options:
+    ENG_FONT        ENG 폰트 (힌팅 완료, 글리프 순서의 앞쪽)
+    JP_FONT         JP 폰트
+    -o OUTPUT       결합한 폰트의 저장 위치 (기본값: merged.ttf)
+    --compare       Merger 와 각각 별도 프로세스에서 실행해 시간, 최대 메모리,
+                    결과의 차이를 보고
+    --help          도움말 표시
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import struct
+import sys
+import tempfile
+import time
+
+from fontTools import merge, ttLib
+from fontTools.merge.cmap import computeMegaCmap, computeMegaGlyphOrder
+from fontTools.merge.layout import layoutPostMerge, layoutPreMerge
+
+# 글리프 데이터를 직접 다루는 테이블 (나머지는 Merger 의 테이블 단위 규칙을 사용)
+GLYPH_TABLES = {"glyf", "loca", "hmtx"}
+
+# 결합 시 JP 폰트에서 버리는 테이블 (ENG 폰트에 없는 세로쓰기 메트릭)
+JP_DROP_TABLES = {"vhea", "vmtx"}
+
+# 비교할 때 무시하는 head 필드 (저장 시각과 체크섬)
+HEAD_VOLATILE_FIELDS = {"created", "modified", "checkSumAdjustment"}
+
+
+class OverlappingCmapError(ValueError):
+    """두 폰트가 같은 코드포인트를 가지고 있어 단순 결합할 수 없음"""
+
+
+def merge_disjoint_fonts(eng_path, jp_path):
+    """ENG 폰트 뒤에 JP 폰트의 글리프를 이어 붙인 TTFont 를 반환
+
+    cmap 이 겹치면 OverlappingCmapError 를 발생시킵니다.
+    """
+    # cmap 은 글리프 순서를 바꾼 뒤에 읽어야 하므로, 겹침 확인은 별도로 연 폰트에서 한다
+    overlap = read_cmap(eng_path).keys() & read_cmap(jp_path).keys()
+    if overlap:
+        raise OverlappingCmapError(
+            f"{len(overlap)} codepoints in both fonts (U+{min(overlap):04X}, ...)"
+        )
+
+    eng_font = ttLib.TTFont(eng_path)
+    jp_font = ttLib.TTFont(jp_path)
+    fonts = [eng_font, jp_font]
+    for font in fonts:
+        font._merger__name = font["name"].getDebugName(4)
+
+    # 이름이 겹치는 JP 글리프는 Merger 와 같이 "name.1" 형식으로 바꾼다.
+    # 글리프 순서를 바꾼 뒤에 테이블을 읽어야 새 이름이 쓰인다.
+    merger = merge.Merger()
+    glyph_orders = [list(font.getGlyphOrder()) for font in fonts]
+    computeMegaGlyphOrder(merger, glyph_orders)
+    for font, glyph_order in zip(fonts, glyph_orders):
+        font.setGlyphOrder(glyph_order)
+    merger.fonts = fonts
+    merger.duplicateGlyphsPerFont = [{} for _ in fonts]
+    computeMegaCmap(merger, [font["cmap"] for font in fonts])
+
+    merged = ttLib.TTFont(
+        sfntVersion=eng_font.sfntVersion, recalcBBoxes=False
+    )
+    merged.setGlyphOrder(merger.glyphOrder)
+    merge_glyph_tables(merged, eng_font, jp_font, merger.glyphOrder)
+
+    for font in fonts:
+        layoutPreMerge(font)
+    tags = set(eng_font.keys()) | (set(jp_font.keys()) - JP_DROP_TABLES)
+    tags -= GLYPH_TABLES | {"GlyphOrder"}
+    for tag in sorted(tags):
+        tables = [font.get(tag, NotImplemented) for font in fonts]
+        if tag in JP_DROP_TABLES:
+            tables[1] = NotImplemented
+        table = ttLib.getTableClass(tag)(tag).merge(merger, tables)
+        if table is not NotImplemented and table is not False:
+            merged[tag] = table
+    layoutPostMerge(merged)
+
+    # Merger 의 결과는 저장할 때 maxp.recalc 가 head.flags 의 bit 1 (lsb 가 xMin) 을
+    # 다시 계산하므로, recalcBBoxes=False 로 저장하는 이쪽은 직접 계산한다
+    if all_lsb_at_xmin(merged["glyf"], merged["hmtx"], merger.glyphOrder):
+        merged["head"].flags |= 0x2
+    else:
+        merged["head"].flags &= ~0x2
+
+    if "OS/2" in merged:
+        merged["OS/2"].recalcAvgCharWidth(merged)
+    return merged
+
+
+def read_cmap(path):
+    """폰트의 cmap ({코드포인트: 글리프 이름})"""
+    font = ttLib.TTFont(path, lazy=True)
+    cmap = font.getBestCmap()
+    font.close()
+    return cmap
+
+
+def merge_glyph_tables(merged, eng_font, jp_font, glyph_order):
+    """glyf/loca/hmtx 를 글리프 데이터를 펼치지 않고 결합"""
+    eng_glyf = eng_font["glyf"]
+    jp_glyf = jp_font["glyf"]
+    for glyph in jp_glyf.glyphs.values():
+        # JP 쪽의 함수 정의나 CVT 는 가져오지 않으므로 힌팅을 제거한다
+        glyph.removeHinting()
+        # 복합 글리프는 구성 요소를 글리프 ID 로 가지고 있어, 이름으로 펼쳐 둔다
+        if glyph.isComposite():
+            glyph.expand(jp_glyf)
+
+    glyf = ttLib.newTable("glyf")
+    glyf.glyphs = {**eng_glyf.glyphs, **jp_glyf.glyphs}
+    glyf.glyphOrder = glyph_order
+    merged["glyf"] = glyf
+    merged["loca"] = ttLib.newTable("loca")
+
+    hmtx = ttLib.newTable("hmtx")
+    hmtx.metrics = {**eng_font["hmtx"].metrics, **jp_font["hmtx"].metrics}
+    merged["hmtx"] = hmtx
+
+
+def all_lsb_at_xmin(glyf, hmtx, glyph_order):
+    """윤곽이 있는 모든 글리프의 lsb 가 xMin 과 같은지 (maxp.recalc 와 같은 판정)
+
+    펼치지 않은 글리프는 압축된 데이터의 헤더에서 xMin 을 읽는다.
+    """
+    for name in glyph_order:
+        glyph = glyf.glyphs[name]
+        data = getattr(glyph, "data", None)
+        if data is not None:
+            if not data:
+                continue
+            number_of_contours, x_min = struct.unpack(">hh", data[:4])
+        else:
+            number_of_contours = glyph.numberOfContours
+            x_min = getattr(glyph, "xMin", 0)
+        if number_of_contours and hmtx.metrics[name][1] != x_min:
+            return False
+    return True
+
+
+def merge_fonts_with_merger(eng_path, jp_path):
+    """fontTools.merge.Merger 로 결합 (vhea/vmtx 는 JP 폰트에서 지운 뒤 결합)"""
+    jp_font = ttLib.TTFont(jp_path)
+    if JP_DROP_TABLES & set(jp_font.keys()):
+        for tag in JP_DROP_TABLES:
+            if tag in jp_font:
+                del jp_font[tag]
+        jp_font.save(jp_path)
+    jp_font.close()
+    return merge.Merger().merge([eng_path, jp_path])
+
+
+def compare_fonts(font_a, font_b):
+    """두 폰트의 차이를 설명하는 문자열 목록을 반환 (같으면 빈 목록)
+
+    glyf 는 인코딩 방식이 달라도 같은 아웃라인이면 같다고 보고,
+    head 는 저장 시각과 체크섬을 제외한 필드를 비교합니다.
+    """
+    differences = []
+    if font_a.getGlyphOrder() != font_b.getGlyphOrder():
+        return ["glyph order"]
+    tags_a, tags_b = set(font_a.keys()), set(font_b.keys())
+    for tag in sorted(tags_a ^ tags_b):
+        differences.append(f"{tag}: only in one font")
+    for tag in sorted(tags_a & tags_b - {"GlyphOrder", "loca"}):
+        if tag == "glyf":
+            differences += compare_glyphs(font_a, font_b)
+        elif tag == "head":
+            head_a, head_b = font_a["head"], font_b["head"]
+            for key in sorted(vars(head_a).keys() - HEAD_VOLATILE_FIELDS):
+                if getattr(head_a, key) != getattr(head_b, key, None):
+                    differences.append(f"head.{key}")
+        elif font_a.reader[tag] != font_b.reader[tag]:
+            differences.append(tag)
+    return differences
+
+
+def compare_glyphs(font_a, font_b):
+    glyf_a, glyf_b = font_a["glyf"], font_b["glyf"]
+    differences = []
+    for name in font_a.getGlyphOrder():
+        glyph_a, glyph_b = glyf_a[name], glyf_b[name]
+        if glyph_outline(glyph_a, glyf_a) != glyph_outline(glyph_b, glyf_b):
+            differences.append(f"glyf: {name}")
+    return differences
+
+
+def glyph_outline(glyph, glyf):
+    """비교용 아웃라인 (바운딩 박스, 좌표, 윤곽 끝점, on-curve 플래그, 구성 요소, 명령어)"""
+    if glyph.numberOfContours == 0:
+        return None
+    bounds = (glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax)
+    program = glyph.program.getBytecode() if hasattr(glyph, "program") else b""
+    if glyph.isComposite():
+        components = [
+            (c.glyphName, getattr(c, "x", 0), getattr(c, "y", 0), c.flags & 0x0C00)
+            for c in glyph.components
+        ]
+        return ("composite", bounds, components, program)
+    coordinates, end_points, flags = glyph.getCoordinates(glyf)
+    return (bounds, list(coordinates), end_points, [f & 1 for f in flags], program)
+
+
+def run_merge(method, eng_path, jp_path, output_path):
+    """별도 프로세스에서 결합하고 (소요 시간, 최대 메모리 MiB) 를 반환"""
+    start = time.time()
+    if method == "merger":
+        font = merge_fonts_with_merger(eng_path, jp_path)
+    else:
+        font = merge_disjoint_fonts(eng_path, jp_path)
+    font.save(output_path)
+    elapsed = time.time() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, max_rss / 1024
+
+
+def compare_mergers(eng_path, jp_path):
+    """Merger 와 disjoint 결합을 각각 새 프로세스에서 실행해 비교"""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Merger 경로는 JP 폰트를 고쳐 쓰므로 복사본을 사용한다
+        jp_copy = os.path.join(tmp_dir, "jp.ttf")
+        with open(jp_path, "rb") as src, open(jp_copy, "wb") as dst:
+            dst.write(src.read())
+        results = {}
+        for method in ("merger", "disjoint"):
+            output_path = os.path.join(tmp_dir, f"{method}.ttf")
+            with context.Pool(1) as pool:
+                elapsed, max_rss = pool.apply(
+                    run_merge, (method, eng_path, jp_copy, output_path)
+                )
+            size = os.path.getsize(output_path)
+            results[method] = output_path
+            print(f"  {method:<10} {elapsed:7.2f}s  {max_rss:8.1f} MiB  {size:>10} bytes")
+
+        differences = compare_fonts(
+            ttLib.TTFont(results["merger"]), ttLib.TTFont(results["disjoint"])
+        )
+    for difference in differences[:20]:
+        print(f"  ✗ {difference}")
+    if len(differences) > 20:
+        print(f"  ✗ ... {len(differences) - 20} more")
+    if not differences:
+        print("  ✓ outputs are identical")
+    return 1 if differences else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="cmap 이 겹치지 않는 ENG/JP 폰트를 빠르게 결합",
+    )
+    parser.add_argument("eng_font", help="ENG 폰트")
+    parser.add_argument("jp_font", help="JP 폰트")
+    parser.add_argument("-o", "--output", default="merged.ttf", help="저장 위치")
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="fontTools.merge.Merger 와 시간, 최대 메모리, 결과를 비교",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare_mergers(args.eng_font, args.jp_font)
+
+    try:
+        font = merge_disjoint_fonts(args.eng_font, args.jp_font)
+    except OverlappingCmapError as e:
+        print(f"  ✗ {e}")
+        return 1
+    font.save(args.output)
+    print(f"  ✓ {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
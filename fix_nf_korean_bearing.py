@@ -22,6 +22,12 @@ import os
 from glob import glob
 import argparse
 
+from build_trace import name_process, span
+from unicode_ranges import named_set
+
+# 한글 음절 (가-힣) + 한글 호환 자모 (ㄱ-ㆎ)
+HANGUL = named_set("hangul_syllables", "hangul_compatibility_jamo")
+
 
 def fix_korean_bearing(font_path, verbose=False):
     """
@@ -55,8 +61,7 @@ def fix_korean_bearing(font_path, verbose=False):
 
         for glyph in font.glyphs():
             # 한글 음절 (가-힣) + 한글 자모 (ㄱ-ㆎ) 범위만 처리
-            if (0xAC00 <= glyph.unicode <= 0xD7A3 or
-                0x3131 <= glyph.unicode <= 0x318E):
+            if glyph.unicode in HANGUL:
 
                 # bbox 기반으로 전각 글리프 판단 (실제 글리프 크기가 반각보다 큰 경우)
                 bbox = glyph.boundingBox()
@@ -162,6 +167,8 @@ Note:
         print(f"❌ 오류: {nf_dir}에 폰트 파일이 없습니다.")
         return 1
 
+    name_process("fix_nf_korean_bearing")
+
     # 헤더 출력
     print("=" * 70)
     print("🔧 Nerd Fonts 한글 Bearing 재조정")
@@ -180,7 +187,8 @@ Note:
         basename = os.path.basename(font_path)
         print(f"처리 중: {basename}")
 
-        fixed, skipped, error = fix_korean_bearing(font_path, verbose=args.verbose)
+        with span("fix_korean_bearing", font=basename):
+            fixed, skipped, error = fix_korean_bearing(font_path, verbose=args.verbose)
 
         if error:
             print(f"  ✗ 실패: {error}")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+OpenType 체크섬 계산 및 테이블 제자리(in-place) 수정 도구
+
+폰트 파일을 메모리 맵으로 열고 big-endian uint32 워드를 array 로 한꺼번에 합산합니다.
+head/OS/2 처럼 크기가 변하지 않는 필드를 고칠 때 fontTools 로 폰트 전체를
+다시 쓰지 않고, 해당 바이트와 체크섬만 고칠 수 있습니다.
+(FontPatcher/font-patcher 의 TableHEADWriter 와 같은 계산 방식)
+
+Usage:
+    python font_checksum.py [--fix] FONT ...
+
+Options:
+    FONT            검사할 폰트 (.ttf/.otf, TTC 는 지원하지 않음)
+    --fix           잘못된 체크섬을 다시 계산해서 기록
+    --help          도움말 표시
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+# head.checksumAdjustment = CHECKSUM_MAGIC - (폰트 전체 체크섬)
+CHECKSUM_MAGIC = 0xB1B0AFBA
+
+# head 테이블 안에서 checksumAdjustment 의 위치
+HEAD_CHECKSUM_ADJUSTMENT = 8
+
+
+def calc_checksum(data, offset=0, length=None):
+    """data[offset:offset+length] 의 OpenType 체크섬 (마지막 워드는 0 으로 채움)"""
+    if length is None:
+        length = len(data) - offset
+    words, rest = divmod(length, 4)
+    values = array("I", data[offset : offset + 4 * words])
+    if sys.byteorder == "little":
+        values.byteswap()
+    checksum = sum(values)
+    if rest:
+        tail = data[offset + 4 * words : offset + length]
+        checksum += int.from_bytes(bytes(tail).ljust(4, b"\0"), "big")
+    return checksum & 0xFFFFFFFF
+
+
+class FontFile:
+    """폰트 파일의 테이블을 메모리 맵으로 직접 읽고 쓰기
+
+    with FontFile(path) as font:
+        font.put_ushort(b"OS/2", 2, 528)  # xAvgCharWidth
+        font.update_checksums()
+    """
+
+    def __init__(self, path, writable=True):
+        self.path = path
+        self.f = open(path, "r+b" if writable else "rb")
+        self.data = mmap.mmap(
+            self.f.fileno(),
+            0,
+            access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+        )
+        # tag -> (테이블 레코드 위치, 체크섬, 오프셋, 길이)
+        self.tables = {}
+        self.modified = set()
+        self.read_table_directory()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.f.close()
+
+    def read_table_directory(self):
+        if self.data[:4] == b"ttcf":
+            raise ValueError(f"{self.path}: font collections are not supported")
+        num_tables = struct.unpack_from(">H", self.data, 4)[0]
+        for i in range(num_tables):
+            record = 12 + 16 * i
+            tag, checksum, offset, length = struct.unpack_from(">4sLLL", self.data, record)
+            self.tables[tag] = (record, checksum, offset, length)
+
+    def table_offset(self, tag, pos):
+        record, checksum, offset, length = self.tables[tag]
+        if pos < 0 or pos > length:
+            raise ValueError(f"position {pos} is outside of table {tag!r}")
+        return offset + pos
+
+    def get_ushort(self, tag, pos):
+        return struct.unpack_from(">H", self.data, self.table_offset(tag, pos))[0]
+
+    def get_ulong(self, tag, pos):
+        return struct.unpack_from(">L", self.data, self.table_offset(tag, pos))[0]
+
+    def put_ushort(self, tag, pos, value):
+        struct.pack_into(">H", self.data, self.table_offset(tag, pos), value)
+        self.modified.add(tag)
+
+    def put_ulong(self, tag, pos, value):
+        struct.pack_into(">L", self.data, self.table_offset(tag, pos), value)
+        self.modified.add(tag)
+
+    def table_checksum(self, tag):
+        """테이블 체크섬 (head 는 checksumAdjustment 를 0 으로 보고 계산)"""
+        record, checksum, offset, length = self.tables[tag]
+        checksum = calc_checksum(self.data, offset, length)
+        if tag == b"head":
+            checksum -= self.get_ulong(b"head", HEAD_CHECKSUM_ADJUSTMENT)
+        return checksum & 0xFFFFFFFF
+
+    def checksum_adjustment(self):
+        """폰트 전체 체크섬에서 구한 head.checksumAdjustment 의 올바른 값"""
+        full = calc_checksum(self.data) - self.get_ulong(b"head", HEAD_CHECKSUM_ADJUSTMENT)
+        return (CHECKSUM_MAGIC - full) & 0xFFFFFFFF
+
+    def update_checksums(self, tags=None):
+        """수정한 테이블 (또는 tags) 의 체크섬과 head.checksumAdjustment 를 다시 기록"""
+        for tag in self.modified if tags is None else tags:
+            record, _, offset, length = self.tables[tag]
+            checksum = self.table_checksum(tag)
+            struct.pack_into(">L", self.data, record + 4, checksum)
+            self.tables[tag] = (record, checksum, offset, length)
+        self.put_ulong(b"head", HEAD_CHECKSUM_ADJUSTMENT, self.checksum_adjustment())
+        self.data.flush()
+        self.modified.clear()
+
+    def verify(self):
+        """체크섬이 맞지 않는 테이블 목록 (checksumAdjustment 가 틀리면 b"head.adj" 포함)"""
+        bad = [
+            tag
+            for tag, (_, checksum, _, _) in self.tables.items()
+            if self.table_checksum(tag) != checksum
+        ]
+        if self.get_ulong(b"head", HEAD_CHECKSUM_ADJUSTMENT) != self.checksum_adjustment():
+            bad.append(b"head.adj")
+        return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="폰트 파일의 테이블 체크섬과 head.checksumAdjustment 검사",
+    )
+    parser.add_argument("fonts", nargs="+", help="검사할 폰트")
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="잘못된 체크섬을 다시 계산해서 기록",
+    )
+    args = parser.parse_args()
+
+    error_count = 0
+    for font_path in args.fonts:
+        try:
+            with FontFile(font_path, writable=args.fix) as font:
+                bad = font.verify()
+                if bad and args.fix:
+                    font.update_checksums([tag for tag in bad if tag != b"head.adj"])
+                    print(f"  ✓ {font_path}: fixed {', '.join(t.decode() for t in bad)}")
+                elif bad:
+                    print(f"  ✗ {font_path}: bad {', '.join(t.decode() for t in bad)}")
+                    error_count += 1
+                else:
+                    print(f"  ✓ {font_path}")
+        except (OSError, ValueError, struct.error) as e:
+            print(f"  ✗ {font_path}: {e}")
+            error_count += 1
+
+    return 1 if error_count > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!fontforge --lang=py -script
+
+# 常駐する FontForge ワーカー
+# fontforge とビルドスクリプトを読み込んだ状態のプロセスを Unix ソケットで待ち受け、
+# クライアントから受け取ったジョブ (スタイルのビルド、bearing の検証、グリフ数の集計) を実行する。
+# 検証などで開いたフォントは LRU で保持し、開いたときに増えた RSS の合計が
+# メモリ予算を超えたら古いものから閉じる。
+# ビルドは watch_build.py と同じく下準備済みのスナップショットを使い回す。
+#
+# クライアントとして起動した場合は fontforge を読み込まないので、すぐに応答が返る。
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+import traceback
+from collections import OrderedDict
+
+SOCKET_PATH = ".font_server.sock"
+DEFAULT_MEMORY_MB = 2048
+# RSS の増加量が小さく見える場合 (解放済みメモリの再利用) のフォント 1 つの見積もり
+# (ファイルサイズの倍数)
+SIZE_FACTOR = 10
+
+# クライアントから送るジョブ (引数にファイルパスを取るものはクライアント側で絶対パスにする)
+CLIENT_JOBS = {
+    "build": False,
+    "verify-bearing": True,
+    "count-glyphs": True,
+    "status": False,
+    "stop": False,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in CLIENT_JOBS and args[0] != "serve":
+        usage()
+        return 1
+    if args[0] == "serve":
+        memory_mb = DEFAULT_MEMORY_MB
+        if args[1:2] == ["--memory-mb"] and len(args) > 2:
+            memory_mb = int(args[2])
+        elif len(args) > 1:
+            usage()
+            return 1
+        return serve(memory_mb)
+
+    job, job_args = args[0], args[1:]
+    if CLIENT_JOBS[job]:
+        job_args = [os.path.abspath(arg) for arg in job_args]
+    return request(job, job_args)
+
+
+def usage():
+    print(
+        f"Usage: {sys.argv[0]} serve [--memory-mb MB]\n"
+        f"       {sys.argv[0]} build "
+        "[--hidden-zenkaku-space] [--35] [--console] [--nerd-font] [--style STYLE]...\n"
+        f"       {sys.argv[0]} verify-bearing FONT NF_FONT\n"
+        f"       {sys.argv[0]} count-glyphs FONT...\n"
+        f"       {sys.argv[0]} status | stop"
+    )
+
+
+def request(job, args):
+    """サーバーにジョブを送り、出力を表示して終了コードを返す"""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(SOCKET_PATH)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(
+            f"Error: font server is not running ({SOCKET_PATH}). "
+            f"Start it with: python {sys.argv[0]} serve"
+        )
+        return 1
+    with client, client.makefile("rwb") as stream:
+        stream.write(json.dumps({"job": job, "args": args}).encode() + b"\n")
+        stream.flush()
+        response = json.loads(stream.readline())
+    sys.stdout.write(response["output"])
+    return response["status"]
+
+
+def serve(memory_mb):
+    """ソケットを待ち受け、ジョブを 1 つずつ実行する (fontforge はスレッドセーフではない)"""
+    # fontforge とビルドスクリプトはサーバーとして起動した場合だけ読み込む
+    global fontforge, fontforge_script, test_korean_bearing_nf, watch_build
+    import fontforge
+    import fontforge_script
+    import test_korean_bearing_nf
+    import watch_build
+
+    if os.path.exists(SOCKET_PATH):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(SOCKET_PATH)
+            print(f"Error: font server is already running ({SOCKET_PATH})")
+            return 1
+        except ConnectionRefusedError:
+            # 前回のサーバーが残したソケット
+            os.remove(SOCKET_PATH)
+        finally:
+            probe.close()
+
+    font_server = FontServer(memory_mb * 1024 * 1024)
+    server = socketserver.UnixStreamServer(SOCKET_PATH, RequestHandler)
+    server.font_server = font_server
+    print(f"Font server listening on {SOCKET_PATH} (memory budget {memory_mb} MB)")
+    try:
+        while not font_server.stopped:
+            server.handle_request()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+        os.remove(SOCKET_PATH)
+        font_server.fonts.clear()
+    return 0
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """1 行の JSON でジョブを受け取り、出力と終了コードを 1 行の JSON で返す"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # 起動中のサーバーがあるかの確認 (serve) で接続だけされた場合
+            return
+        request = json.loads(line)
+        start = time.time()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                status = self.server.font_server.run_job(request["job"], request["args"])
+            except Exception:
+                traceback.print_exc()
+                status = 1
+        elapsed = time.time() - start
+        print(f"{request['job']} {' '.join(request['args'])}: {status} ({elapsed:.2f}s)")
+        response = {"status": status, "output": output.getvalue()}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class FontServer:
+    """ジョブの実装 (フォントの LRU と、ビルド用の下準備済みスナップショットを持つ)"""
+
+    def __init__(self, memory_budget):
+        self.fonts = FontCache(memory_budget)
+        self.worker = watch_build.Worker([])
+        self.script_mtimes = script_mtimes()
+        self.stopped = False
+
+    def run_job(self, job, args):
+        if job not in CLIENT_JOBS:
+            raise ValueError(f"unknown job: {job}")
+        return getattr(self, "job_" + job.replace("-", "_"))(args)
+
+    def job_build(self, args):
+        """スタイルを 1 つずつビルドする (watch_build.py と同じ処理)"""
+        options, styles = parse_build_args(args)
+        watch_build.options.clear()
+        watch_build.options.update(options)
+        # スクリプトや build.ini が変わっていたら読み込み直す
+        mtimes = script_mtimes()
+        if mtimes != self.script_mtimes:
+            self.script_mtimes = mtimes
+            self.worker.reload_scripts(watch_build.STAGE_PREPARE)
+        fontforge_script.options.clear()
+        fontforge_script.options.update(options)
+        for style in styles:
+            self.worker.run_style(style, watch_build.STAGE_FONTFORGE)
+        return 0
+
+    def job_verify_bearing(self, args):
+        """test_korean_bearing_nf.py と同じ検証を、開いたままのフォントで行う"""
+        if len(args) != 2:
+            raise ValueError("verify-bearing requires FONT and NF_FONT")
+        results = []
+        # 予算が小さい場合に 1 つ目が閉じられても困らないよう、1 つずつ取り出して使う
+        for path, label in zip(args, ["Non-NF (기본)", "NF (Nerd Fonts)"]):
+            font = self.fonts.get(path)
+            results.append(test_korean_bearing_nf.check_bearing(path, label, font))
+        return 0 if test_korean_bearing_nf.compare_bearing(*results) else 1
+
+    def job_count_glyphs(self, args):
+        """work_scripts/check_glyph_number.py と同じ数え方でグリフ数を表示する"""
+        for path in args:
+            font = self.fonts.get(path)
+            print(f"{path} : {sum(1 for _ in font.glyphs())}")
+        return 0
+
+    def job_status(self, args):
+        for path, (_, cost, _) in self.fonts.entries.items():
+            print(f"  {cost / 1024 / 1024:8.1f} MB  {path}")
+        print(
+            f"{len(self.fonts.entries)} fonts, "
+            f"{self.fonts.total() / 1024 / 1024:.1f} / "
+            f"{self.fonts.budget / 1024 / 1024:.0f} MB"
+        )
+        return 0
+
+    def job_stop(self, args):
+        self.stopped = True
+        print("Font server stopped")
+        return 0
+
+
+class FontCache:
+    """開いたフォントの LRU (パス -> (更新時刻, 見積もりサイズ, フォント))
+    ジョブはフォントを読むだけで、編集してはいけない。
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()
+
+    def get(self, path):
+        mtime = os.stat(path).st_mtime_ns
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            if entry[0] == mtime:
+                self.entries[path] = entry
+                return entry[2]
+            # ファイルが更新されていれば開き直す
+            entry[2].close()
+
+        before = current_rss()
+        font = fontforge.open(path)
+        cost = max(current_rss() - before, os.path.getsize(path) * SIZE_FACTOR)
+        self.entries[path] = (mtime, cost, font)
+        self.evict()
+        return font
+
+    def evict(self):
+        """予算を超えている間、最も長く使われていないフォントを閉じる (最新の 1 つは残す)"""
+        while len(self.entries) > 1 and self.total() > self.budget:
+            _, (_, _, font) = self.entries.popitem(last=False)
+            font.close()
+
+    def total(self):
+        return sum(cost for _, cost, _ in self.entries.values())
+
+    def clear(self):
+        for _, _, font in self.entries.values():
+            font.close()
+        self.entries.clear()
+
+
+def current_rss():
+    """このプロセスの現在の RSS (バイト, 取得できない場合は 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def script_mtimes():
+    """ビルドに使うスクリプトと build.ini の更新時刻"""
+    paths = watch_build.SCRIPTS + [watch_build.SETTINGS_FILE]
+    return {path: os.stat(path).st_mtime_ns for path in paths if os.path.exists(path)}
+
+
+def parse_build_args(args):
+    """build ジョブの引数を (options, styles) にする (watch_build.py と同じ指定)"""
+    options = {}
+    styles = []
+    args = iter(args)
+    for arg in args:
+        if arg == "--hidden-zenkaku-space":
+            options["hidden-zenkaku-space"] = True
+        elif arg == "--35":
+            options["35"] = True
+        elif arg == "--console":
+            options["console"] = True
+        elif arg == "--nerd-font":
+            options["nerd-font"] = True
+        elif arg == "--style":
+            styles.append(next(args, ""))
+        else:
+            raise ValueError(f"unknown build option: {arg}")
+    return options, styles or ["Regular"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
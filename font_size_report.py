@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+빌드된 폰트의 크기를 테이블, 유니코드 블록, 원본 폰트별로 나눠 보여주는 도구
+
+테이블 크기는 테이블 디렉토리에서, 글리프별 크기는 loca 오프셋에서 구하므로
+glyf 를 펼치지 않습니다 (fontTools lazy 모드, 점 개수는 글리프 헤더에서 읽음).
+폰트 파일마다 별도 프로세스에서 처리합니다.
+
+원본 폰트는 코드포인트를 빌드 파이프라인의 우선순위대로 각 원본 폰트의 cmap 에서
+찾아 정합니다 (Plex KR 의 한글 범위 → Plex Mono → Plex JP → Hack → Nerd).
+Console 판의 Hack 우선 등 일부 규칙은 반영하지 않으므로 대략적인 값입니다.
+cmap 에 없는 글리프는 그 글리프를 참조하는 복합 글리프나 GSUB 규칙을 따라가
+cmap 에 있는 글리프의 원본으로 정하고, 참조하는 글리프가 없으면 "(unmapped)" 입니다.
+
+Usage:
+    python font_size_report.py [--baseline FILE] [--update-baseline] [--check] [FONT ...]
+
+Options:
+    FONT                대상 폰트 (기본: build/GLG-Mono*.ttf, build/nerd/*.ttf)
+    --baseline FILE     비교할 기준 값 (기본: size_baseline.json)
+    --update-baseline   이번 결과를 기준 값으로 저장
+    --check             기준 값보다 THRESHOLD 바이트 넘게 커진 항목이 있으면 실패
+    --threshold BYTES   커진 것으로 보는 최소 바이트 수 (기본: 1024)
+    --blocks N          폰트마다 표시할 유니코드 블록 수 (기본: 10)
+    --jobs N            병렬 프로세스 수 (기본: CPU 수)
+    --help              도움말 표시
+"""
+
+import argparse
+import configparser
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from fontTools import ttLib, unicodedata
+
+from restamp_fonts import find_built_fonts, parse_font_filename
+from unicode_ranges import named_set
+
+settings = configparser.ConfigParser()
+settings.read("build.ini", encoding="utf-8")
+
+SOURCE_FONTS_DIR = settings.get("DEFAULT", "SOURCE_FONTS_DIR")
+NERD_FONT = "nerd-fonts/SymbolsNerdFont-Regular.ttf"
+
+# (원본 이름, SOURCE_FONTS_DIR 기준 경로 템플릿, 스타일 종류, 대상 범위)
+# 스타일 종류: "jp" 는 Italic 을 뺀 스타일, "eng" 는 그대로, "hack" 은 Regular/Bold
+SOURCES = [
+    ("Plex KR", settings.get("DEFAULT", "KR_FONT"), "jp", "kr_glyphs"),
+    ("Plex Mono", settings.get("DEFAULT", "ENG_FONT"), "eng", None),
+    ("Plex JP", settings.get("DEFAULT", "JP_FONT"), "jp", None),
+    ("Hack", settings.get("DEFAULT", "HACK_FONT"), "hack", None),
+    ("Nerd", NERD_FONT, None, None),
+]
+
+KR_GLYPHS = named_set(
+    "hangul_syllables", "hangul_compatibility_jamo", "hangul_jamo_extended"
+)
+
+DEFAULT_BASELINE = "size_baseline.json"
+
+# 비교 대상 항목 (블록별 값은 변동이 잦아 표시만 한다)
+COMPARED_SECTIONS = ("tables", "sources")
+
+
+def source_style(kind, style):
+    if kind == "jp":
+        return style.replace("Italic", "") or "Regular"
+    if kind == "hack":
+        return "Bold" if "Bold" in style else "Regular"
+    return style
+
+
+@lru_cache(maxsize=None)
+def load_source_cmap(path):
+    """원본 폰트의 코드포인트 집합 (없으면 빈 집합)"""
+    if not os.path.exists(path):
+        return frozenset()
+    font = ttLib.TTFont(path, lazy=True)
+    codepoints = frozenset(font.getBestCmap())
+    font.close()
+    return codepoints
+
+
+def source_cmaps(style):
+    """스타일에 해당하는 [(원본 이름, 코드포인트 집합, 대상 범위)] (우선순위 순)"""
+    cmaps = []
+    for name, template, kind, range_name in SOURCES:
+        path = f"{SOURCE_FONTS_DIR}/" + template
+        if kind is not None:
+            path = path.replace("{style}", source_style(kind, style))
+        limit = KR_GLYPHS if range_name == "kr_glyphs" else None
+        cmaps.append((name, load_source_cmap(path), limit))
+    return cmaps
+
+
+def find_source(codepoint, cmaps):
+    for name, codepoints, limit in cmaps:
+        if codepoint in codepoints and (limit is None or codepoint in limit):
+            return name
+    return "(other)"
+
+
+def count_points(data):
+    """압축된 글리프 데이터의 점 개수 (복합 글리프와 빈 글리프는 0)"""
+    if len(data) < 12:
+        return 0
+    num_contours = struct.unpack(">h", data[:2])[0]
+    if num_contours <= 0:
+        return 0
+    return struct.unpack_from(">H", data, 10 + 2 * (num_contours - 1))[0] + 1
+
+
+def composite_components(data):
+    """압축된 복합 글리프 데이터가 참조하는 글리프 ID 목록 (단순 글리프는 빈 목록)"""
+    if len(data) < 10 or struct.unpack(">h", data[:2])[0] >= 0:
+        return []
+    components = []
+    offset = 10
+    while True:
+        flags, gid = struct.unpack_from(">HH", data, offset)
+        components.append(gid)
+        # 인수 (ARG_1_AND_2_ARE_WORDS) 와 변환 행렬의 크기만큼 건너뛴다
+        offset += 4 + (4 if flags & 0x0001 else 2)
+        if flags & 0x0008:
+            offset += 2
+        elif flags & 0x0040:
+            offset += 4
+        elif flags & 0x0080:
+            offset += 8
+        if not flags & 0x0020:
+            return components
+
+
+def gsub_references(font):
+    """GSUB 의 치환 규칙에서 (입력 글리프, 출력 글리프) 쌍을 만든다
+
+    문맥 치환은 다른 룩업을 부를 뿐이므로 단일, 다중, 대체, 합자 치환만 본다.
+    합자는 첫 번째 구성 글리프에서 합자 글리프로 잇는다.
+    """
+    if "GSUB" not in font or font["GSUB"].table.LookupList is None:
+        return
+    for lookup in font["GSUB"].table.LookupList.Lookup:
+        for subtable in lookup.SubTable:
+            if lookup.LookupType == 7:
+                subtable = subtable.ExtSubTable
+            if subtable.LookupType == 1:
+                yield from subtable.mapping.items()
+            elif subtable.LookupType in (2, 3):
+                mapping = (
+                    subtable.mapping
+                    if subtable.LookupType == 2
+                    else subtable.alternates
+                )
+                for glyph_name, outputs in mapping.items():
+                    for output in outputs:
+                        yield glyph_name, output
+            elif subtable.LookupType == 4:
+                for first, ligatures in subtable.ligatures.items():
+                    for ligature in ligatures:
+                        yield first, ligature.LigGlyph
+
+
+def attribute_unmapped(glyph_sources, references):
+    """cmap 에 없는 글리프의 원본을, 그 글리프를 참조하는 글리프의 원본으로 정한다
+
+    glyph_sources ({글리프 이름: 원본}) 에 cmap 에 있는 글리프를 코드포인트 순으로
+    넣어 두면, 참조를 따라 (여러 단계도) 원본을 채운다. 여러 글리프가 참조하면
+    코드포인트가 가장 작은 쪽에서 먼저 닿은 것을 쓴다.
+    """
+    queue = list(glyph_sources)
+    for glyph_name in queue:
+        for referenced in references.get(glyph_name, ()):
+            if referenced not in glyph_sources:
+                glyph_sources[referenced] = glyph_sources[glyph_name]
+                queue.append(referenced)
+
+
+def profile_font(font_path):
+    """폰트 하나의 크기 내역
+
+    Returns:
+        (font_path, profile, error_msg)
+        profile: {"size", "tables": {tag: bytes},
+                  "blocks"/"sources": {이름: [glyphs, bytes, points]}}
+    """
+    try:
+        font = ttLib.TTFont(font_path, lazy=True)
+        tables = {
+            tag: entry.length for tag, entry in sorted(font.reader.tables.items())
+        }
+        profile = {
+            "size": os.path.getsize(font_path),
+            "tables": tables,
+            "blocks": {},
+            "sources": {},
+        }
+        if "glyf" not in font:
+            font.close()
+            return font_path, profile, None
+
+        parsed = parse_font_filename(font_path)
+        cmaps = source_cmaps(parsed[0] if parsed else "Regular")
+
+        # 글리프별로 가장 작은 코드포인트를 대표로 쓴다
+        codepoint_of = {}
+        for codepoint, glyph_name in sorted(font.getBestCmap().items(), reverse=True):
+            codepoint_of[glyph_name] = codepoint
+
+        glyph_order = font.getGlyphOrder()
+        glyf_data = font.reader["glyf"]
+        locations = font["loca"].locations
+
+        # 참조하는 글리프 -> 참조되는 글리프 (복합 글리프의 구성 요소, GSUB 의 출력)
+        references = {}
+        for gid, glyph_name in enumerate(glyph_order):
+            for component in composite_components(
+                glyf_data[locations[gid] : locations[gid + 1]]
+            ):
+                references.setdefault(glyph_name, []).append(glyph_order[component])
+        for glyph_name, output in gsub_references(font):
+            references.setdefault(glyph_name, []).append(output)
+
+        glyph_sources = {
+            glyph_name: find_source(codepoint, cmaps)
+            for glyph_name, codepoint in sorted(
+                codepoint_of.items(), key=lambda item: item[1]
+            )
+        }
+        attribute_unmapped(glyph_sources, references)
+
+        for gid, glyph_name in enumerate(glyph_order):
+            start, end = locations[gid], locations[gid + 1]
+            data = glyf_data[start:end]
+            codepoint = codepoint_of.get(glyph_name)
+            if codepoint is None:
+                block = "(unmapped)"
+            else:
+                block = unicodedata.block(chr(codepoint))
+            source = glyph_sources.get(glyph_name, "(unmapped)")
+            values = (1, end - start, count_points(data))
+            for section, key in (("blocks", block), ("sources", source)):
+                total = profile[section].setdefault(key, [0, 0, 0])
+                for i, value in enumerate(values):
+                    total[i] += value
+        font.close()
+        return font_path, profile, None
+    except Exception as e:
+        return font_path, None, str(e)
+
+
+def format_delta(value, base):
+    if base is None:
+        return ""
+    delta = value - base
+    if delta == 0:
+        return ""
+    return f" ({delta:+,})"
+
+
+def print_profile(font_path, profile, baseline, block_count):
+    base = baseline or {}
+    print(f"=== {font_path}: {profile['size']:,} bytes{format_delta(profile['size'], base.get('size'))} ===")
+    size = profile["size"] or 1
+    base_tables = base.get("tables", {})
+    for tag, length in sorted(profile["tables"].items(), key=lambda t: -t[1]):
+        delta = format_delta(length, base_tables.get(tag)) if base else ""
+        print(f"  {tag:<6} {length:>12,} {100 * length / size:6.1f}%{delta}")
+
+    base_sources = base.get("sources", {})
+    if profile["sources"]:
+        print("  -- glyf by source (glyphs, bytes, points) --")
+    for name, (glyphs, length, points) in sorted(
+        profile["sources"].items(), key=lambda t: -t[1][1]
+    ):
+        delta = format_delta(length, base_sources.get(name, [0, None])[1]) if base else ""
+        print(f"  {name:<12} {glyphs:>7,} {length:>12,} {points:>10,}{delta}")
+
+    if profile["blocks"] and block_count > 0:
+        print(f"  -- glyf by Unicode block (top {block_count}) --")
+    for name, (glyphs, length, points) in sorted(
+        profile["blocks"].items(), key=lambda t: -t[1][1]
+    )[:block_count]:
+        print(f"  {name[:36]:<36} {glyphs:>7,} {length:>12,} {points:>10,}")
+
+
+def find_regressions(font_name, profile, baseline, threshold):
+    """기준 값보다 threshold 바이트 넘게 커진 항목의 설명 목록"""
+    regressions = []
+    if profile["size"] - baseline.get("size", profile["size"]) > threshold:
+        regressions.append(f"{font_name}: size {profile['size'] - baseline['size']:+,}")
+    for section in COMPARED_SECTIONS:
+        base_section = baseline.get(section, {})
+        for key, value in profile[section].items():
+            length = value[1] if isinstance(value, list) else value
+            base_value = base_section.get(key)
+            if base_value is None:
+                continue
+            base_length = base_value[1] if isinstance(base_value, list) else base_value
+            if length - base_length > threshold:
+                regressions.append(f"{font_name}: {section} {key} {length - base_length:+,}")
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, profiles):
+    """비교에 쓰는 항목만 저장 (블록별 값은 저장하지 않음)"""
+    profiles = {
+        font_name: {
+            key: profile[key] for key in ("size",) + COMPARED_SECTIONS if key in profile
+        }
+        for font_name, profile in profiles.items()
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="빌드된 폰트의 크기를 테이블, 유니코드 블록, 원본 폰트별로 표시",
+    )
+    parser.add_argument(
+        "fonts",
+        nargs="*",
+        help="대상 폰트 (기본: build/GLG-Mono*.ttf, build/nerd/*.ttf)",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        help=f"비교할 기준 값 (기본: {DEFAULT_BASELINE})",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="이번 결과를 기준 값으로 저장",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="기준 값보다 커진 항목이 있으면 실패",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=1024,
+        help="커진 것으로 보는 최소 바이트 수 (기본: 1024)",
+    )
+    parser.add_argument(
+        "--blocks",
+        type=int,
+        default=10,
+        help="폰트마다 표시할 유니코드 블록 수 (기본: 10)",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="병렬 프로세스 수 (기본: CPU 수)",
+    )
+    args = parser.parse_args()
+
+    fonts = args.fonts or find_built_fonts()
+    if not fonts:
+        print("❌ 오류: 대상 폰트가 없습니다. 먼저 빌드를 실행하세요.")
+        return 1
+
+    baseline = load_baseline(args.baseline)
+    profiles = {}
+    regressions = []
+    error_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for font_path, profile, error in executor.map(profile_font, fonts):
+            if error:
+                print(f"  ✗ {font_path}: {error}")
+                error_count += 1
+                continue
+            font_name = os.path.relpath(font_path)
+            profiles[font_name] = profile
+            print_profile(font_path, profile, baseline.get(font_name), args.blocks)
+            if font_name in baseline:
+                regressions += find_regressions(
+                    font_name, profile, baseline[font_name], args.threshold
+                )
+
+    if args.update_baseline:
+        save_baseline(args.baseline, {**baseline, **profiles})
+        print(f"✅ 기준 값 저장: {args.baseline}")
+
+    for regression in regressions:
+        print(f"  ⚠️  {regression}")
+    if error_count > 0 or (args.check and regressions):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
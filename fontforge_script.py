@@ -3,21 +3,37 @@
 # 2つのフォントを合成する
 
 import configparser
+import hashlib
+import json
 import math
+import multiprocessing
+import multiprocessing.connection
 import os
 import shutil
 import sys
+import traceback
 import uuid
-from decimal import ROUND_HALF_UP, Decimal
 
 import fontforge
 import psMat
 
+from build_trace import name_process, set_tags, span
+from stage_graph import (
+    SCRIPT_FILES,
+    Stage,
+    italic,
+    no_option,
+    option,
+    print_report,
+    run_stages,
+    side_stages,
+)
+from unicode_ranges import named_set
+
 # iniファイルを読み込む
 settings = configparser.ConfigParser()
 settings.read("build.ini", encoding="utf-8")
 
-VERSION = settings.get("DEFAULT", "VERSION")
 FONT_NAME = settings.get("DEFAULT", "FONT_NAME")
 JP_FONT = settings.get("DEFAULT", "JP_FONT")
 KR_FONT = settings.get("DEFAULT", "KR_FONT")
@@ -25,7 +41,8 @@ ENG_FONT = settings.get("DEFAULT", "ENG_FONT")
 HACK_FONT = settings.get("DEFAULT", "HACK_FONT")
 SOURCE_FONTS_DIR = settings.get("DEFAULT", "SOURCE_FONTS_DIR")
 BUILD_FONTS_DIR = settings.get("DEFAULT", "BUILD_FONTS_DIR")
-VENDER_NAME = settings.get("DEFAULT", "VENDER_NAME")
+CACHE_FONTS_DIR = settings.get("DEFAULT", "CACHE_FONTS_DIR")
+MINI_SOURCE_FONTS_DIR = settings.get("DEFAULT", "MINI_SOURCE_FONTS_DIR")
 FONTFORGE_PREFIX = settings.get("DEFAULT", "FONTFORGE_PREFIX")
 IDEOGRAPHIC_SPACE = settings.get("DEFAULT", "IDEOGRAPHIC_SPACE")
 ADJUST_R = settings.get("DEFAULT", "ADJUST_R")
@@ -35,24 +52,22 @@ INVISIBLE_ZENKAKU_SPACE_STR = settings.get("DEFAULT", "INVISIBLE_ZENKAKU_SPACE_S
 NERD_FONTS_STR = settings.get("DEFAULT", "NERD_FONTS_STR")
 EM_ASCENT = int(settings.get("DEFAULT", "EM_ASCENT"))
 EM_DESCENT = int(settings.get("DEFAULT", "EM_DESCENT"))
-OS2_ASCENT = int(settings.get("DEFAULT", "OS2_ASCENT"))
-OS2_DESCENT = int(settings.get("DEFAULT", "OS2_DESCENT"))
 HALF_WIDTH_12 = int(settings.get("DEFAULT", "HALF_WIDTH_12"))
 FULL_WIDTH_35 = int(settings.get("DEFAULT", "FULL_WIDTH_35"))
 ITALIC_ANGLE = int(settings.get("DEFAULT", "ITALIC_ANGLE"))
 
-COPYRIGHT = """[IBM Plex]
-Copyright (c) 2017 IBM Corp. https://github.com/IBM/plex
-
-[Hack]
-Copyright 2018 Source Foundry Authors https://github.com/source-foundry/Hack
-
-[Nerd Fonts]
-Copyright (c) 2014, Ryan L McIntyre https://ryanlmcintyre.com
-
-[PlemolJP]
-Copyright (c) 2021, Yuko Otawara
-"""  # noqa: E501
+# グリフ処理の規則で使うコードポイント範囲 (定義は unicode_ranges.RANGE_TABLE)
+HANGUL = named_set("hangul_syllables", "hangul_compatibility_jamo")
+KR_GLYPHS = named_set(
+    "hangul_syllables", "hangul_compatibility_jamo", "hangul_jamo_extended"
+)
+FULL_WIDTH_LATIN = named_set("full_width_latin")
+JP_LATIN_REPLACED = named_set("jp_latin_replaced")
+EAAW_HALF = named_set("eaaw_half")
+NOT_CONSOLE = named_set("not_console") - named_set("editor_visible_marks")
+BOX_DRAWING = named_set("box_drawing")
+# down_scale_redundant_size_glyph で縮小しないグリフ
+KEEP_SIZE = named_set("latin", "powerline", "box_drawing", "shade")
 
 options = {}
 
@@ -63,6 +78,14 @@ def main():
     if options.get("unknown-option"):
         usage()
         return
+    if options.get("smoke") and not os.path.isdir(SOURCE_FONTS_DIR):
+        print(
+            f"Error: {SOURCE_FONTS_DIR} not found. "
+            "Run python mini_sources.py to make the mini source fonts."
+        )
+        return
+    name_process("fontforge_script")
+    set_tags(variant=get_variant() or None)
 
     # buildディレクトリを作成する
     if os.path.exists(BUILD_FONTS_DIR) and not options.get("do-not-delete-build-dir"):
@@ -173,20 +196,22 @@ def usage():
     print(
         f"Usage: {sys.argv[0]} "
         "[--hidden-zenkaku-space] [--35] [--console] [--nerd-font] "
-        "[--debug] [--minimal] [--do-not-delete-build-dir]"
+        "[--debug] [--minimal] [--serial] [--do-not-delete-build-dir] "
+        "[--smoke] [--style STYLE]..."
     )
 
 
 def get_options():
     """オプションを取得する"""
 
-    global options
+    global options, SOURCE_FONTS_DIR
 
     # オプションなしの場合は何もしない
     if len(sys.argv) == 1:
         return
 
-    for arg in sys.argv[1:]:
+    args = iter(sys.argv[1:])
+    for arg in args:
         # オプション判定
         if arg == "--do-not-delete-build-dir":
             options["do-not-delete-build-dir"] = True
@@ -194,6 +219,8 @@ def get_options():
             options["debug"] = True
         elif arg == "--minimal":
             options["minimal"] = True
+        elif arg == "--serial":
+            options["serial"] = True
         elif arg == "--hidden-zenkaku-space":
             options["hidden-zenkaku-space"] = True
         elif arg == "--35":
@@ -202,175 +229,255 @@ def get_options():
             options["console"] = True
         elif arg == "--nerd-font":
             options["nerd-font"] = True
+        elif arg == "--style":
+            options.setdefault("style", []).append(next(args, ""))
+        elif arg == "--smoke":
+            # パイプライン確認用に、縮小したソースフォント (mini_sources.py で作成) を使う
+            options["smoke"] = True
+            SOURCE_FONTS_DIR = MINI_SOURCE_FONTS_DIR
         else:
             options["unknown-option"] = True
             return
 
 
 def generate_font(jp_style, eng_style, merged_style):
+    # --style 指定時は指定したスタイルだけ生成する
+    if options.get("style") and merged_style not in options["style"]:
+        return
     print(f"=== Generate {merged_style} ===")
 
-    # 合成するフォントを開く (JP, KR, ENG)
-    jp_font, kr_font, eng_font = open_fonts(jp_style, eng_style)
+    # jp_font は斜体を正体から作る場合、derive_italic_jp ステージまで None のまま
+    values = {"jp_style": jp_style, "eng_style": eng_style, "jp_font": None}
+    values.update(get_build_values(merged_style))
+    # 斜体の JP 側は、先に作った正体の JP フォントのスナップショットから作る
+    values["upright_jp"] = get_upright_jp_path(jp_style)
+    values["derive_italic"] = "Italic" in merged_style and os.path.exists(
+        values["upright_jp"]
+    )
+    # --serial 指定時は ENG 側と JP 側を 1 つのプロセスで順に処理する
+    run = run_serial_stages if options.get("serial") else run_split_stages
+    with span("generate_font", style=merged_style):
+        try:
+            reports = run(values)
+        except UprightMismatch as e:
+            print(f"{e}: build the JP side from the source fonts")
+            values["derive_italic"] = False
+            reports = run(values)
+    for title, report in reports:
+        print_report(title, report)
+
+
+def run_serial_stages(values):
+    """ENG 側と JP 側のステージを 1 つのプロセスで順に実行する"""
+    report = []
+    run_stages(PREPARE_STAGES + BUILD_STAGES, values, options, CACHE_FONTS_DIR, report)
+    return [(values["merged_style"], report)]
+
+
+def run_split_stages(values):
+    """ENG 側と JP 側のステージを別々のプロセスで並行して実行する
+    両者の依存は下準備直後のコードポイントと、重複グリフの削除で使う ENG 側の情報
+    (get_eng_info) だけなので、それをパイプで受け渡す。
+    JP 側のコードポイントはキャッシュがあればそれを使い、ENG 側は JP 側の下準備を待たない。
+    [(タイトル, report)] を返す。
+    """
+    stages = PREPARE_STAGES + BUILD_STAGES
+    merged_style = values["merged_style"]
+    # グリフのパックは両方のプロセスで使うので、先にこのプロセスで用意する
+    report = []
+    values = run_stages(
+        [s for s in stages if s.isolated], values, options, CACHE_FONTS_DIR, report
+    )
+    reports = [(f"{merged_style} (packs)", report)] if report else []
+
+    values["eng_font"] = None
+    values["source_codepoints"] = None
+    values["codepoint_index"] = get_codepoint_index_path(values["jp_style"])
+    values["jp_codepoints"] = None
+    if os.path.exists(values["codepoint_index"]):
+        with open(values["codepoint_index"], encoding="utf-8") as f:
+            values["jp_codepoints"] = json.load(f)
+
+    # fontforge のフォントはプロセス間で受け渡せないので、各プロセスで開く
+    context = multiprocessing.get_context("fork")
+    # 斜体を正体から作る場合、JP 側は ENG 側の情報を使わない
+    channels = context.Pipe() if not_derived(options, values) else (None, None)
+    workers = {}
+    for side, channel in zip(("eng", "jp"), channels):
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=run_side_stages,
+            args=(side, side_stages(stages, side), dict(values, channel=channel), sender),
+        )
+        process.start()
+        sender.close()
+        workers[receiver] = (side, process)
+    for channel in channels:
+        if channel is not None:
+            channel.close()
+
+    error = None
+    while workers:
+        for receiver in multiprocessing.connection.wait(list(workers)):
+            side, process = workers.pop(receiver)
+            try:
+                report, side_error = receiver.recv()
+            except EOFError:
+                report, side_error = [], RuntimeError(f"{side} worker exited")
+            process.join()
+            reports.append((f"{merged_style} ({side})", report))
+            if side_error is not None and error is None:
+                error = side_error
+                # もう一方はパイプの受信で止まっている可能性があるので終了させる
+                for _, other in workers.values():
+                    other.terminate()
+    if error is not None:
+        raise error
+    return reports
+
+
+def run_side_stages(side, stages, values, result):
+    """run_split_stages のワーカープロセス (report とエラーを result に送る)"""
+    name_process(f"fontforge_script ({side})")
+    report = []
+    try:
+        run_stages(stages, values, options, CACHE_FONTS_DIR, report)
+    except UprightMismatch as e:
+        result.send((report, e))
+        return
+    except Exception as e:
+        traceback.print_exc()
+        result.send((report, RuntimeError(f"{side}: {e}")))
+        return
+    result.send((report, None))
 
-    # 韓国語グリフをJPフォントにマージする
-    merge_kr_glyphs(jp_font, kr_font)
 
-    # KRフォントを閉じる (マージが完了したので不要)
-    kr_font.close()
+def prepare_source_fonts(jp_style, eng_style, report=None):
+    """ソースフォントを開き、スタイルやオプションに依らない下準備をする"""
+    values = run_stages(
+        PREPARE_STAGES,
+        {"jp_style": jp_style, "eng_style": eng_style},
+        options,
+        CACHE_FONTS_DIR,
+        report,
+    )
+    return values["jp_font"], values["eng_font"]
 
-    # フォントのEMを揃える
-    adjust_em(eng_font)
 
-    # Hack フォントをマージする
-    merge_hack(jp_font, eng_font, merged_style)
+def build_font(jp_font, eng_font, merged_style, report=None):
+    """下準備済みのフォントを合成用に加工して build ディレクトリに保存する"""
+    values = {"jp_font": jp_font, "eng_font": eng_font}
+    values.update(get_build_values(merged_style))
+    run_stages(BUILD_STAGES, values, options, CACHE_FONTS_DIR, report)
 
-    if options.get("console"):
-        # East Asian Ambiguous Width 文字の半角化
-        eaaw_width_to_half(jp_font)
-        # コンソール用グリフを追加する
-        add_console_glyphs(eng_font)
 
-    if not options.get("console"):
-        delete_not_console_glyphs(eng_font)
+def get_build_values(merged_style):
+    """BUILD_STAGES の入力になるスタイル毎の値"""
+    return {
+        "merged_style": merged_style,
+        "hack_style": "Bold" if "Bold" in merged_style else "Regular",
+        "em": EM_ASCENT + EM_DESCENT,
+        "hack_half_width": int(FULL_WIDTH_35 * 3 / 5),
+        "half_width": get_half_width(),
+        "full_width": get_full_width(),
+        # generate_font() 以外 (watch_build.py など) では正体のスナップショットを使わない
+        "upright_jp": None,
+        "derive_italic": False,
+        # ENG 側と JP 側のプロセス間の接続 (run_split_stages 以外では None)
+        "channel": None,
+    }
 
-    # 重複するグリフを削除する
-    jp_font = delete_duplicate_glyphs(jp_font, eng_font)
 
-    # いくつかのグリフ形状に調整を加える
-    adjust_some_glyph(jp_font, eng_font, merged_style)
+def get_half_width():
+    """幅の変換後の半角幅"""
+    return int(FULL_WIDTH_35 * 3 / 5) if options.get("35") else HALF_WIDTH_12
 
-    # 日本語グリフの斜体を生成する
-    if "Italic" in merged_style:
-        transform_italic_glyphs(jp_font)
 
-    # 半角幅か全角幅になるように変換する
-    set_width_600_or_1000(jp_font)
+def get_full_width():
+    """幅の変換後の全角幅"""
+    return FULL_WIDTH_35 if options.get("35") else HALF_WIDTH_12 * 2
 
-    if options.get("35"):
-        # eng_fontを3:5幅にする
-        adjust_width_35_eng(eng_font)
-        # jp_fontを3:5幅にする
-        adjust_width_35_jp(jp_font)
-    else:
-        # 1:2 幅にする
-        transform_half_width(jp_font, eng_font)
-        # 規定の幅からはみ出したグリフサイズを縮小する
-        down_scale_redundant_size_glyph(eng_font)
 
-    # GPOSテーブルを削除する
+def close_font(font):
+    font.close()
+
+
+def remove_gpos_lookups(jp_font):
+    """GPOSテーブルを削除する"""
     remove_lookups(jp_font, remove_gsub=False, remove_gpos=True)
 
-    # 罫線を全角にする
-    if not options.get("console"):
-        make_box_drawing_full_width(eng_font, jp_font)
 
-    # 全角スペースを可視化する
-    if not options.get("hidden-zenkaku-space"):
-        visualize_zenkaku_space(jp_font)
+def save_fonts(jp_font, eng_font, merged_style):
+    """ttfファイルに保存する"""
+    # ヒンティングが残っていると不具合に繋がりがちなので外す。
+    # ヒンティングはあとで ttfautohint で行う。
+    # flags=("no-hints", "omit-instructions") を使うとヒンティングだけでなく GPOS や GSUB も削除されてしまうので使わない
+    # ENG 側と JP 側を別プロセスで処理する場合は、それぞれのプロセスで保存する
+    # pipeline_build.py が書き込み途中のファイルを読まないよう、一時ファイルから名前を変える
+    font_name = f"{FONT_NAME}{get_variant()}".replace(" ", "")
+    for font, side in [(eng_font, "eng"), (jp_font, "jp")]:
+        if font is None:
+            continue
+        path = f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{font_name}-{merged_style}-{side}.ttf"
+        tmp_path = f"{path}.{os.getpid()}.tmp.ttf"
+        font.generate(tmp_path)
+        os.replace(tmp_path, path)
+        # ttfを閉じる
+        font.close()
 
-    # Nerd Fontのグリフを追加する
-    if options.get("nerd-font"):
-        add_nerd_font_glyphs(jp_font, eng_font)
-        # Nerd Fonts 병합 후 한글 bearing 재조정 (겹침 방지)
-        fix_korean_bearing_after_merge(jp_font)
 
-    # オプション毎の修飾子を追加する
+def get_variant():
+    """オプション毎の修飾子を返す (例: "35 Console NF")"""
     variant = f"{WIDTH_35_STR} " if options.get("35") else ""
     variant += f"{CONSOLE_STR} " if options.get("console") else ""
     variant += (
         INVISIBLE_ZENKAKU_SPACE_STR if options.get("hidden-zenkaku-space") else ""
     )
     variant += NERD_FONTS_STR if options.get("nerd-font") else ""
-    variant = variant.strip()
-
-    # macOSでのpostテーブルの使用性エラー対策
-    # 重複するグリフ名を持つグリフをリネームする
-    delete_glyphs_with_duplicate_glyph_names(eng_font)
-    delete_glyphs_with_duplicate_glyph_names(jp_font)
+    return variant.strip()
 
-    # メタデータを編集する
-    cap_height = int(
-        Decimal(str(eng_font[0x0048].boundingBox()[3])).quantize(
-            Decimal("0"), ROUND_HALF_UP
-        )
-    )
-    x_height = int(
-        Decimal(str(eng_font[0x0078].boundingBox()[3])).quantize(
-            Decimal("0"), ROUND_HALF_UP
-        )
-    )
-    edit_meta_data(eng_font, merged_style, variant, cap_height, x_height)
-    edit_meta_data(jp_font, merged_style, variant, cap_height, x_height)
 
-    # ttfファイルに保存
-    # ヒンティングが残っていると不具合に繋がりがちなので外す。
-    # ヒンティングはあとで ttfautohint で行う。
-    # flags=("no-hints", "omit-instructions") を使うとヒンティングだけでなく GPOS や GSUB も削除されてしまうので使わない
-    font_name = f"{FONT_NAME}{variant}".replace(" ", "")
-    eng_font.generate(
-        f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{font_name}-{merged_style}-eng.ttf",
-    )
-    jp_font.generate(
-        f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{font_name}-{merged_style}-jp.ttf",
-    )
-
-    # ttfを閉じる
-    jp_font.close()
-    eng_font.close()
-
-
-def open_fonts(jp_style: str, eng_style: str):
-    """フォントを開く (JP, KR, ENG の3つ)"""
+def open_jp_fonts(jp_style: str):
+    """日本語フォントと韓国語フォントを開く"""
     jp_font = fontforge.open(
         SOURCE_FONTS_DIR + "/" + JP_FONT.replace("{style}", jp_style)
     )
     kr_font = fontforge.open(
         SOURCE_FONTS_DIR + "/" + KR_FONT.replace("{style}", jp_style)
     )
+    unlink_all_references(jp_font)
+    unlink_all_references(kr_font)
+    return jp_font, kr_font
+
+
+def open_eng_font(eng_style: str):
+    """英語フォントを開く"""
     eng_font = fontforge.open(
         SOURCE_FONTS_DIR + "/" + ENG_FONT.replace("{style}", eng_style)
     )
+    unlink_all_references(eng_font)
+    return eng_font
 
-    # フォント参照を解除する
-    for glyph in jp_font.glyphs():
-        if glyph.isWorthOutputting():
-            jp_font.selection.select(("more", None), glyph)
-    jp_font.unlinkReferences()
-    for glyph in kr_font.glyphs():
-        if glyph.isWorthOutputting():
-            kr_font.selection.select(("more", None), glyph)
-    kr_font.unlinkReferences()
-    for glyph in eng_font.glyphs():
-        if glyph.isWorthOutputting():
-            eng_font.selection.select(("more", None), glyph)
-    eng_font.unlinkReferences()
-    jp_font.selection.none()
-    kr_font.selection.none()
-    eng_font.selection.none()
 
-    return jp_font, kr_font, eng_font
+def unlink_all_references(font):
+    """フォント参照を解除する"""
+    for glyph in font.glyphs():
+        if glyph.isWorthOutputting():
+            font.selection.select(("more", None), glyph)
+    font.unlinkReferences()
+    font.selection.none()
 
 
 def merge_kr_glyphs(jp_font, kr_font):
     """韓国語グリフをKRフォントからJPフォントにマージする"""
-    # 韓国語ハングル音節 (가~힣)
-    kr_font.selection.select(("ranges", None), 0xAC00, 0xD7A3)
-    # 韓国語ハングル字母 (ㄱ~ㆎ)
-    kr_font.selection.select(("ranges", "more"), 0x3131, 0x318E)
-    # ハングル字母拡張-A
-    kr_font.selection.select(("ranges", "more"), 0xA960, 0xA97F)
-    # ハングル字母拡張-B
-    kr_font.selection.select(("ranges", "more"), 0xD7B0, 0xD7FF)
+    # ハングル音節 (가~힣)、ハングル字母 (ㄱ~ㆎ)、ハングル字母拡張-A/B
+    KR_GLYPHS.select(kr_font, by_unicode=False)
 
     # 選択したグリフをコピー
     kr_font.copy()
 
     # JPフォントに貼り付け (既存のグリフを上書き)
-    jp_font.selection.select(("ranges", None), 0xAC00, 0xD7A3)
-    jp_font.selection.select(("ranges", "more"), 0x3131, 0x318E)
-    jp_font.selection.select(("ranges", "more"), 0xA960, 0xA97F)
-    jp_font.selection.select(("ranges", "more"), 0xD7B0, 0xD7FF)
+    KR_GLYPHS.select(jp_font, by_unicode=False)
     jp_font.paste()
 
     # 選択解除
@@ -378,14 +485,26 @@ def merge_kr_glyphs(jp_font, kr_font):
     jp_font.selection.none()
 
 
-def adjust_some_glyph(jp_font, eng_font, style="Regular"):
-    """いくつかのグリフ形状に調整を加える"""
+def adjust_some_glyph(jp_font, eng_font, style="Regular", eng_info=None):
+    """いくつかのグリフ形状に調整を加える
+    ENG 側と JP 側を別プロセスで処理する場合、もう一方のフォントは None になる。
+    JP 側の半角幅には ENG 側の情報 (get_eng_info) を使う。
+    """
+    if eng_font is not None:
+        adjust_some_eng_glyph(eng_font, style)
+    if jp_font is not None:
+        full_width = jp_font[0x3042].width
+        if options.get("35"):
+            half_width = eng_info["space_width"]
+        else:
+            half_width = int(full_width / 2)
+        adjust_some_jp_glyph(jp_font, half_width, full_width)
+        jp_font.selection.none()
+
+
+def adjust_some_eng_glyph(eng_font, style):
+    """adjust_some_glyph の英語フォント側の調整"""
     eng_glyph_width = eng_font[0x0020].width
-    full_width = jp_font[0x3042].width
-    if options.get("35"):
-        half_width = eng_glyph_width
-    else:
-        half_width = int(full_width / 2)
 
     # クォーテーションの拡大
     eng_font.selection.select(("unicode", None), 0x0060)
@@ -420,6 +539,34 @@ def adjust_some_glyph(jp_font, eng_font, style="Regular"):
         glyph.transform(psMat.translate((eng_glyph_width - glyph.width) / 2, 0))
         glyph.width = eng_glyph_width
 
+    # r グリフの調整
+    if "Italic" not in style:
+        eng_font[0x0072].clear()
+        eng_font[0x0155].clear()
+        eng_font[0x0157].clear()
+        eng_font[0x0159].clear()
+        eng_font.mergeFonts(f"{SOURCE_FONTS_DIR}/" + ADJUST_R.replace("{style}", style))
+
+    # 矢印記号の読みづらさ対策
+    for uni in [*range(0x21CD, 0x21CF + 1), 0x21D0, 0x21D2, 0x21D4, 0x21DA, 0x21DB]:
+        eng_font.selection.select(("unicode", None), uni)
+        for glyph in eng_font.selection.byGlyphs:
+            scale_glyph_from_center(glyph, 1, 1.3)
+    for uni in [0x21D1, 0x21D3]:
+        eng_font.selection.select(("unicode", None), uni)
+        for glyph in eng_font.selection.byGlyphs:
+            scale_glyph_from_center(glyph, 1.3, 1)
+    for uni in range(0x21D6, 0x21D9 + 1):
+        eng_font.selection.select(("unicode", None), uni)
+        for glyph in eng_font.selection.byGlyphs:
+            scale_glyph_from_center(glyph, 1.3, 1.3)
+
+    # 選択解除
+    eng_font.selection.none()
+
+
+def adjust_some_jp_glyph(jp_font, half_width, full_width):
+    """adjust_some_glyph の日本語フォント側の調整"""
     # 全角括弧の開きを広くする
     for glyph_name in [0xFF08, 0xFF3B, 0xFF5B]:
         glyph = jp_font[glyph_name]
@@ -462,82 +609,59 @@ def adjust_some_glyph(jp_font, eng_font, style="Regular"):
         glyph.transform(psMat.translate((500 - glyph.width) / 2, 0))
         glyph.width = 500
 
-    # r グリフの調整
-    if "Italic" not in style:
-        eng_font[0x0072].clear()
-        eng_font[0x0155].clear()
-        eng_font[0x0157].clear()
-        eng_font[0x0159].clear()
-        eng_font.mergeFonts(f"{SOURCE_FONTS_DIR}/" + ADJUST_R.replace("{style}", style))
-
-    # 矢印記号の読みづらさ対策
-    for uni in [*range(0x21CD, 0x21CF + 1), 0x21D0, 0x21D2, 0x21D4, 0x21DA, 0x21DB]:
-        eng_font.selection.select(("unicode", None), uni)
-        for glyph in eng_font.selection.byGlyphs:
-            scale_glyph_from_center(glyph, 1, 1.3)
-    for uni in [0x21D1, 0x21D3]:
-        eng_font.selection.select(("unicode", None), uni)
-        for glyph in eng_font.selection.byGlyphs:
-            scale_glyph_from_center(glyph, 1.3, 1)
-    for uni in range(0x21D6, 0x21D9 + 1):
-        eng_font.selection.select(("unicode", None), uni)
-        for glyph in eng_font.selection.byGlyphs:
-            scale_glyph_from_center(glyph, 1.3, 1.3)
-
-    # 選択解除
-    jp_font.selection.none()
-    eng_font.selection.none()
-
 
 def adjust_em(font):
     """フォントのEMを揃える"""
     font.em = EM_ASCENT + EM_DESCENT
 
 
-def delete_duplicate_glyphs(jp_font, eng_font):
-    """jp_fontとeng_fontのグリフを比較し、重複するグリフを削除する"""
-
-    eng_font.selection.none()
+def delete_duplicate_glyphs(jp_font, eng_font, channel=None):
+    """jp_fontとeng_fontのグリフを比較し、重複するグリフを削除する
+    JP 側の処理には ENG 側の情報 (get_eng_info) だけを使うので、ENG 側と JP 側を
+    別プロセスで処理する場合は channel で受け渡す。(jp_font, eng_info) を返す。
+    """
+    if eng_font is not None:
+        eng_font.selection.none()
+
+        # IBM Plex Sans JP グリフを使用
+        eng_font[0x00A2].clear()  # Cent Sign
+        eng_font[0x00A3].clear()  # Pound Sign
+        eng_font[0x00A5].clear()  # Yen Sign
+        eng_font[0x3000].clear()  # 全角スペース
+        # U+274C (CROSS MARK) を削除 (OSに含まれる絵文字フォントにフォールバックさせるため)
+        eng_font[0x274C].clear()
+
+        eng_info = get_eng_info(eng_font)
+        if channel is not None:
+            channel.send(eng_info)
+    elif channel is not None:
+        eng_info = channel.recv()
+    else:
+        # 斜体を正体から作る場合の JP 側のプロセス
+        eng_info = None
+    if jp_font is None:
+        # 斜体を正体から作る場合、日本語フォント側は削除済み
+        return None, eng_info
+    eng_codepoints = eng_info["codepoints"]
     jp_font.selection.none()
 
-    # IBM Plex Sans JP グリフを使用
-    eng_font[0x00A2].clear()  # Cent Sign
-    eng_font[0x00A3].clear()  # Pound Sign
-    eng_font[0x00A5].clear()  # Yen Sign
-    eng_font[0x3000].clear()  # 全角スペース
-    # U+274C (CROSS MARK) を削除 (OSに含まれる絵文字フォントにフォールバックさせるため)
-    eng_font[0x274C].clear()
     # LATIN 系グリフには IBM Plex Mono を使用
     for glyph in jp_font.glyphs():
-        if 0x00C0 <= glyph.unicode <= 0x00D6:
-            glyph.clear()
-        elif 0x00D8 <= glyph.unicode <= 0x00F6:
-            glyph.clear()
-        elif 0x00F8 <= glyph.unicode <= 0x0259:
+        if glyph.unicode in JP_LATIN_REPLACED:
             glyph.clear()
 
-    # 重複グリフを選択する
+    # 重複グリフのコードポイントを集める
+    codepoints = {0x0301}
     for glyph in jp_font.glyphs("encoding"):
         if glyph.isWorthOutputting() and glyph.unicode > 0:
-            try:
-                eng_font.selection.select(("more", "unicode"), glyph.unicode)
-            except ValueError:
-                # Encoding is out of range のときは継続する
-                continue
-        # altuni が設定されている場合は altuni にも選択を拡張する
+            codepoints.add(glyph.unicode)
+        # altuni が設定されている場合は altuni にも拡張する
         if glyph.altuni:
-            for u in glyph.altuni:
-                try:
-                    eng_font.selection.select(("more", "unicode"), u[0])
-                except ValueError:
-                    # Encoding is out of range のときは継続する
-                    continue
-
-    eng_font.selection.select(("more", "unicode"), 0x0301)
+            codepoints.update(u[0] for u in glyph.altuni)
 
     # 削除箇所に altuni が設定されている場合は削除する前にコピーする
-    for glyph in eng_font.selection.byGlyphs:
-        jp_font.selection.select(("more", "unicode"), glyph.unicode)
+    for unicode in find_eng_glyphs(eng_codepoints, codepoints):
+        jp_font.selection.select(("more", "unicode"), unicode)
     altuni_glyph_list = []
     for glyph in jp_font.selection.byGlyphs:
         if glyph.altuni:
@@ -548,25 +672,43 @@ def delete_duplicate_glyphs(jp_font, eng_font):
     jp_font.selection.none()
 
     # altuni の整理で各グリフの状態が変わった可能性があるので重複グリフを再選択する
-    eng_font.selection.none()
-    for glyph in jp_font.glyphs("encoding"):
-        try:
-            if glyph.isWorthOutputting() and glyph.unicode > 0:
-                eng_font.selection.select(("more", "unicode"), glyph.unicode)
-        except ValueError:
-            # Encoding is out of range のときは継続する
-            continue
+    codepoints = {
+        glyph.unicode
+        for glyph in jp_font.glyphs("encoding")
+        if glyph.isWorthOutputting() and glyph.unicode > 0
+    }
 
     # 重複するグリフを削除
-    for glyph in eng_font.selection.byGlyphs:
-        jp_font.selection.select(("more", "unicode"), glyph.unicode)
+    for unicode in find_eng_glyphs(eng_codepoints, codepoints):
+        jp_font.selection.select(("more", "unicode"), unicode)
     for glyph in jp_font.selection.byGlyphs:
         glyph.clear()
 
     jp_font.selection.none()
+
+    return jp_font, eng_info
+
+
+def get_eng_info(eng_font):
+    """JP 側の処理で使う英語フォントの情報
+    codepoints: コードポイント (altuni を含む) -> その位置にあるグリフのコードポイント
+    space_width: U+0020 の幅 (3:5 幅の半角幅)
+    """
+    codepoints = {}
+    eng_font.selection.all()
+    for glyph in eng_font.selection.byGlyphs:
+        if glyph.unicode < 0:
+            continue
+        codepoints[glyph.unicode] = glyph.unicode
+        for u in glyph.altuni or ():
+            codepoints.setdefault(u[0], glyph.unicode)
     eng_font.selection.none()
+    return {"codepoints": codepoints, "space_width": eng_font[0x0020].width}
 
-    return jp_font
+
+def find_eng_glyphs(eng_codepoints, codepoints):
+    """codepoints の位置にある英語フォントのグリフのコードポイント"""
+    return sorted({eng_codepoints[u] for u in codepoints if u in eng_codepoints})
 
 
 def materialize_altuni_glyphs(font, entity_glyph_unicode_list):
@@ -629,56 +771,9 @@ def materialize_altuni_glyphs(font, entity_glyph_unicode_list):
 
 
 def delete_not_console_glyphs(eng_font):
-    eng_font.selection.none()
-
-    # 記号
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x00A1, 0x00A5)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x00A7, 0x00AA)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x00AC, 0x00B8)
-    eng_font.selection.select(("more", "unicode"), 0x00D7)
-    eng_font.selection.select(("more", "unicode"), 0x00F7)
-    eng_font.selection.select(("more", "unicode"), 0x0401)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x0410, 0x044F)
-    eng_font.selection.select(("more", "unicode"), 0x0451)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2010, 0x2026)
-    eng_font.selection.select(("more", "unicode"), 0x2030)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2032, 0x2033)
-    eng_font.selection.select(("more", "unicode"), 0x203B)
-    eng_font.selection.select(("more", "unicode"), 0x203E)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2113, 0x2122)
-    # 矢印
+    # 記号、矢印、数学記号 (各エディタの可視化文字対策で一部 IBMPlexMono ベースのまま残す)
     # TODO: IBM Plex Sans JP v1.002 へバージョンアップすると矢印が拡張される見込みだが、当該バージョンには一部グリフ欠けがあるためさらに上のバージョンが出てきた際に取り込む
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2190, 0x2193)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x21C4, 0x21C6)
-    eng_font.selection.select(("more", "unicode"), 0x21D2)
-    eng_font.selection.select(("more", "unicode"), 0x21D4)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x21E6, 0x21E9)
-    eng_font.selection.select(("more", "unicode"), 0x21F5)
-
-    # 数学記号
-    eng_font.selection.select(("more", "unicode"), 0x2200)
-    eng_font.selection.select(("more", "unicode"), 0x2202)
-    eng_font.selection.select(("more", "unicode"), 0x2211)
-    eng_font.selection.select(("more", "unicode"), 0x2219)
-    eng_font.selection.select(("more", "unicode"), 0x221A)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x221D, 0x2220)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2227, 0x222E)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2234, 0x2235)
-    eng_font.selection.select(("more", "unicode"), 0x2252)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2260, 0x2261)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2266, 0x2267)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x226A, 0x226B)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2282, 0x2283)
-    eng_font.selection.select(("more", "unicode", "ranges"), 0x2286, 0x2287)
-
-    # 一部 IBMPlexMono ベースにする
-    # 各エディタの可視化文字対策
-    eng_font.selection.select(("less", "unicode"), 0x2022)
-    eng_font.selection.select(("less", "unicode"), 0x00B7)
-    eng_font.selection.select(("less", "unicode"), 0x2024)
-    eng_font.selection.select(("less", "unicode"), 0x2219)
-    eng_font.selection.select(("less", "unicode"), 0x25D8)
-    eng_font.selection.select(("less", "unicode"), 0x25E6)
+    NOT_CONSOLE.select(eng_font)
 
     for glyph in eng_font.selection.byGlyphs:
         glyph.clear()
@@ -708,6 +803,142 @@ def transform_italic_glyphs(font):
         glyph.width = orig_width
 
 
+class UprightMismatch(Exception):
+    """正体のスナップショットから斜体の JP 側を作れない"""
+
+
+def get_upright_jp_path(jp_style):
+    """幅の変換まで済んだ正体の JP フォントのスナップショットのパス
+    ソースフォント、スクリプト、設定、バリエーションが変わるとパスが変わる。
+    """
+    key = cache_key(
+        [
+            (JP_FONT, jp_style),
+            (KR_FONT, jp_style),
+            (ENG_FONT, jp_style),
+            (HACK_FONT, "Bold" if "Bold" in jp_style else "Regular"),
+        ]
+    )
+    variant = get_variant().replace(" ", "")
+    return f"{CACHE_FONTS_DIR}/upright-jp{variant}-{jp_style}-{key}.sfd"
+
+
+def get_codepoint_index_path(jp_style):
+    """下準備直後の JP フォントのコードポイントのキャッシュのパス
+    下準備はバリエーションに依らないので、ソースフォントとスクリプトだけから作る。
+    """
+    key = cache_key([(JP_FONT, jp_style), (KR_FONT, jp_style)])
+    return f"{CACHE_FONTS_DIR}/codepoints-jp-{jp_style}-{key}.json"
+
+
+def cache_key(sources):
+    """スクリプト、設定、ソースフォント [(テンプレート, スタイル)] から作るキー"""
+    key = hashlib.sha256()
+    for path in SCRIPT_FILES:
+        with open(path, "rb") as f:
+            key.update(f.read())
+    for template, style in sources:
+        path = f"{SOURCE_FONTS_DIR}/" + template.replace("{style}", style)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            key.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return key.hexdigest()[:16]
+
+
+def get_source_codepoints(jp_font, eng_font):
+    """下準備直後の JP, ENG フォントのコードポイント (merge_hack とスナップショットで使う)"""
+    return {
+        "jp": [glyph.unicode for glyph in jp_font.glyphs() if glyph.unicode != -1],
+        "eng": sorted(
+            glyph.unicode for glyph in eng_font.glyphs() if glyph.unicode != -1
+        ),
+    }
+
+
+def exchange_source_codepoints(
+    jp_font, eng_font, channel, jp_codepoints, codepoint_index
+):
+    """ENG 側と JP 側を別プロセスで処理する場合に、下準備直後のコードポイントを交換する
+    JP 側のコードポイントのキャッシュ (jp_codepoints) が無い場合は、
+    JP 側のプロセスがキャッシュ (codepoint_index) を保存してから ENG 側に送る。
+    """
+    if eng_font is not None:
+        eng_codepoints = sorted(
+            glyph.unicode for glyph in eng_font.glyphs() if glyph.unicode != -1
+        )
+        channel.send(eng_codepoints)
+        if jp_codepoints is None:
+            jp_codepoints = channel.recv()
+    else:
+        cached = jp_codepoints is not None
+        jp_codepoints = [
+            glyph.unicode for glyph in jp_font.glyphs() if glyph.unicode != -1
+        ]
+        if not cached:
+            os.makedirs(CACHE_FONTS_DIR, exist_ok=True)
+            tmp_path = f"{codepoint_index}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(jp_codepoints, f)
+            os.replace(tmp_path, codepoint_index)
+            channel.send(jp_codepoints)
+        eng_codepoints = channel.recv()
+    return {"jp": jp_codepoints, "eng": eng_codepoints}
+
+
+def save_upright_jp(jp_font, source_codepoints, upright_jp):
+    """幅の変換まで済んだ JP フォントを斜体用のスナップショットとして保存する
+    座標を丸めずに保存するため、ttf ではなく sfd で保存する。
+    """
+    os.makedirs(CACHE_FONTS_DIR, exist_ok=True)
+    tmp_path = f"{upright_jp}.{os.getpid()}.tmp.sfd"
+    jp_font.save(tmp_path)
+    # sfd を公開する前に、途中で切れたものが読まれないよう json も置き換えで保存する
+    tmp_json = f"{upright_jp}.json.{os.getpid()}.tmp"
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(source_codepoints, f)
+    os.replace(tmp_json, f"{upright_jp}.json")
+    os.replace(tmp_path, upright_jp)
+
+
+def load_upright_codepoints(eng_font, upright_jp):
+    """正体のスナップショット作成時のコードポイントを読み込む
+    JP 側の重複グリフ削除などは英語フォントの収録文字に依存するので、
+    斜体の英語フォントの収録文字が正体と異なる場合は使わない。
+    """
+    with open(f"{upright_jp}.json", encoding="utf-8") as f:
+        source_codepoints = json.load(f)
+    eng_codepoints = sorted(
+        glyph.unicode for glyph in eng_font.glyphs() if glyph.unicode != -1
+    )
+    if eng_codepoints != source_codepoints["eng"]:
+        eng_font.close()
+        raise UprightMismatch("ENG font has different characters than upright")
+    return source_codepoints
+
+
+def derive_italic_jp(upright_jp):
+    """正体のスナップショットから斜体の JP フォントを作る
+    幅の変換の平行移動は斜体変換と順序を入れ替えても同じ結果になるので、
+    グリフの外形で中央揃えしたグリフだけを斜体変換後に揃え直す。
+    """
+    jp_font = fontforge.open(upright_jp)
+    transform_italic_glyphs(jp_font)
+    for glyph in jp_font.glyphs():
+        if options.get("35"):
+            # adjust_width_35_jp で中央揃えしたハングル
+            centered = glyph.unicode in HANGUL and glyph.width == FULL_WIDTH_35
+        else:
+            # transform_half_width で中央揃えした全角グリフ
+            centered = glyph.width == HALF_WIDTH_12 * 2
+        if centered:
+            bbox = glyph.boundingBox()
+            offset = (glyph.width - (bbox[2] - bbox[0])) / 2 - bbox[0]
+            width = glyph.width
+            glyph.transform(psMat.translate(offset, 0))
+            glyph.width = width
+    return jp_font
+
+
 def set_width_600_or_1000(jp_font):
     """半角幅か全角幅になるように変換する (Korean bearing 調整版)"""
     for glyph in jp_font.glyphs():
@@ -716,13 +947,12 @@ def set_width_600_or_1000(jp_font):
             glyph.transform(psMat.translate((500 - glyph.width) / 2, 0))
             glyph.width = 500
         elif (
-            500 < glyph.width < 1000 or 0xC0 <= glyph.unicode <= 0x192
+            500 < glyph.width < 1000 or glyph.unicode in FULL_WIDTH_LATIN
         ):  # 特定のアルファベット関連文字 0xC0 - 0x192 は全角幅にする
             # Korean glyph ranges only: apply proper bearing adjustment
             # - 0xAC00-0xD7A3: Hangul Syllables (가-힣)
             # - 0x3131-0x318E: Hangul Compatibility Jamo (ㄱ-ㆎ)
-            if (0xAC00 <= glyph.unicode <= 0xD7A3 or
-                0x3131 <= glyph.unicode <= 0x318E):
+            if glyph.unicode in HANGUL:
                 # Proper bearing adjustment for center alignment (fixes Korean glyph overlap)
                 target_width = 1000
                 bbox = glyph.boundingBox()
@@ -782,8 +1012,7 @@ def adjust_width_35_jp(jp_font):
             # Korean glyph ranges only: apply proper bearing adjustment
             # - 0xAC00-0xD7A3: Hangul Syllables (가-힣)
             # - 0x3131-0x318E: Hangul Compatibility Jamo (ㄱ-ㆎ)
-            if (0xAC00 <= glyph.unicode <= 0xD7A3 or
-                0x3131 <= glyph.unicode <= 0x318E):
+            if glyph.unicode in HANGUL:
                 # Proper bearing adjustment for center alignment
                 target_width = FULL_WIDTH_35  # 1000
                 bbox = glyph.boundingBox()
@@ -799,12 +1028,13 @@ def adjust_width_35_jp(jp_font):
 
 def transform_half_width(jp_font, eng_font):
     """1:2幅になるように変換する"""
-    before_width_eng = eng_font[0x0030].width
     after_width_eng = HALF_WIDTH_12
-    # 単純な 縮小後幅 / 元の幅 だと狭くなりすりぎるので、
-    # 倍率を考慮して分子は大きめにしている
-    x_scale = 546 / before_width_eng
-    for glyph in eng_font.glyphs():
+    if eng_font is not None:
+        before_width_eng = eng_font[0x0030].width
+        # 単純な 縮小後幅 / 元の幅 だと狭くなりすりぎるので、
+        # 倍率を考慮して分子は大きめにしている
+        x_scale = 546 / before_width_eng
+    for glyph in eng_font.glyphs() if eng_font is not None else []:
         if glyph.width > 0:
             # リガチャ考慮
             after_width_eng_multiply = after_width_eng * round(
@@ -818,7 +1048,7 @@ def transform_half_width(jp_font, eng_font):
             )
             glyph.width = after_width_eng_multiply
 
-    for glyph in jp_font.glyphs():
+    for glyph in jp_font.glyphs() if jp_font is not None else []:
         if glyph.width == 600:
             # Half-width: same width as alphanumeric glyphs
             glyph.transform(psMat.translate((after_width_eng - glyph.width) / 2, 0))
@@ -849,8 +1079,7 @@ def fix_korean_bearing_after_merge(jp_font):
 
     for glyph in jp_font.glyphs():
         # 한글 음절 (가-힣) + 한글 자모 (ㄱ-ㆎ) 범위만 처리
-        if (0xAC00 <= glyph.unicode <= 0xD7A3 or
-            0x3131 <= glyph.unicode <= 0x318E):
+        if glyph.unicode in HANGUL:
             if glyph.width == target_width:
                 # bbox 기반 중앙 정렬 재적용
                 bbox = glyph.boundingBox()
@@ -860,149 +1089,131 @@ def fix_korean_bearing_after_merge(jp_font):
                 glyph.width = target_width
 
 
-def make_box_drawing_full_width(eng_font, jp_font):
-    """罫線を全角にする"""
-    # 英語フォント側は完全に削除
-    eng_font.selection.select(("unicode", "ranges"), 0x2500, 0x257F)
-    for glyph in eng_font.selection.byGlyphs:
-        glyph.clear()
-    eng_font.selection.none()
-    # 日本語フォント側は削除してから全角用グリフをマージする
-    jp_font.selection.select(("unicode", "ranges"), 0x2500, 0x257F)
-    for glyph in jp_font.selection.byGlyphs:
-        glyph.clear()
-    jp_font.selection.none()
-    # リソース管理のため、フォントを明示的に開いて閉じる
+def prepare_box_drawing_pack(output_path, full_width):
+    """全角幅に合わせた罫線グリフを保存する (make_box_drawing_full_width で使う)"""
     box_drawing_font = fontforge.open(f"{SOURCE_FONTS_DIR}/FullWidthBoxDrawings.sfd")
-    jp_font.mergeFonts(box_drawing_font)
-    box_drawing_font.close()
     # 幅設定と位置調整
-    width_to = jp_font[0x3042].width
-    jp_font.selection.select(("unicode", "ranges"), 0x2500, 0x257F)
-    for glyph in jp_font.selection.byGlyphs:
+    for glyph in box_drawing_font.glyphs():
+        if glyph.unicode not in BOX_DRAWING:
+            continue
         # 幅が調整前より広がる場合は拡大する
         width_from = glyph.width
-        if width_from < width_to:
-            glyph.transform(psMat.scale(width_to / width_from, 1))
+        if width_from < full_width:
+            glyph.transform(psMat.scale(full_width / width_from, 1))
         width_from = glyph.width
-        glyph.transform(psMat.translate((width_to - width_from) / 2, 0))
-        glyph.width = width_to
+        glyph.transform(psMat.translate((full_width - width_from) / 2, 0))
+        glyph.width = full_width
+    box_drawing_font.generate(output_path)
+    box_drawing_font.close()
+
+
+def make_box_drawing_full_width(eng_font, jp_font, box_drawing_pack):
+    """罫線を全角にする"""
+    if jp_font is not None:
+        check_full_width(jp_font, box_drawing_pack)
+    # 英語フォント側は完全に削除
+    if eng_font is not None:
+        BOX_DRAWING.select(eng_font)
+        for glyph in eng_font.selection.byGlyphs:
+            glyph.clear()
+        eng_font.selection.none()
+    if jp_font is None:
+        return
+    # 日本語フォント側は削除してから全角用グリフをマージする
+    BOX_DRAWING.select(jp_font)
+    for glyph in jp_font.selection.byGlyphs:
+        glyph.clear()
     jp_font.selection.none()
+    jp_font.mergeFonts(box_drawing_pack)
 
 
-def visualize_zenkaku_space(jp_font):
-    """全角スペースを可視化する"""
-    # 全角スペースを差し替え
-    glyph = jp_font[0x3000]
-    width_to = glyph.width
-    glyph.clear()
-    # リソース管理のため、フォントを明示的に開いて閉じる
+def prepare_zenkaku_space_pack(output_path, full_width):
+    """全角幅に合わせた可視化用の全角スペースを保存する (visualize_zenkaku_space で使う)"""
     space_font = fontforge.open(f"{SOURCE_FONTS_DIR}/{IDEOGRAPHIC_SPACE}")
-    jp_font.mergeFonts(space_font)
-    space_font.close()
     # 幅を設定し位置調整
-    jp_font.selection.select("U+3000")
-    for glyph in jp_font.selection.byGlyphs:
+    space_font.selection.select("U+3000")
+    for glyph in space_font.selection.byGlyphs:
         width_from = glyph.width
-        glyph.transform(psMat.translate((width_to - width_from) / 2, 0))
-        glyph.width = width_to
-    jp_font.selection.none()
+        glyph.transform(psMat.translate((full_width - width_from) / 2, 0))
+        glyph.width = full_width
+    space_font.generate(output_path)
+    space_font.close()
 
 
-def merge_hack(jp_font, eng_font, style):
-    """Hack フォントをマージする"""
-    if "Bold" in style:
-        hack_font = fontforge.open(
-            f"{SOURCE_FONTS_DIR}/" + HACK_FONT.replace("{style}", "Bold")
-        )
-    else:
-        hack_font = fontforge.open(
-            f"{SOURCE_FONTS_DIR}/" + HACK_FONT.replace("{style}", "Regular")
+def visualize_zenkaku_space(jp_font, zenkaku_space_pack):
+    """全角スペースを可視化する"""
+    check_full_width(jp_font, zenkaku_space_pack)
+    # 全角スペースを差し替え
+    jp_font[0x3000].clear()
+    jp_font.mergeFonts(zenkaku_space_pack)
+
+
+def check_full_width(jp_font, pack):
+    """全角幅に合わせたグリフのパックが、フォントの全角幅と合っているか確認する"""
+    if jp_font[0x3042].width != get_full_width():
+        raise ValueError(
+            f"full width mismatch for {pack}: "
+            f"{jp_font[0x3042].width} != {get_full_width()}"
         )
-    hack_font.em = EM_ASCENT + EM_DESCENT
-    # 既に英語フォント側に存在する場合はhackグリフは削除する
-    for glyph in eng_font.glyphs():
-        if glyph.unicode != -1:
-            try:
-                for g in hack_font.selection.select(
-                    ("unicode", None), glyph.unicode
-                ).byGlyphs:
-                    g.clear()
-            except Exception:
-                pass
-    if options.get("console"):
+
+
+def prepare_hack_pack(output_path, hack_style, em, hack_half_width):
+    """Hack フォントを EM と半角幅を揃えた状態で保存する (merge_hack で使う)"""
+    hack_font = fontforge.open(
+        f"{SOURCE_FONTS_DIR}/" + HACK_FONT.replace("{style}", hack_style)
+    )
+    hack_font.em = em
+    # EM 1000 にしたときの幅に合わせて調整
+    for glyph in hack_font.glyphs():
+        if glyph.width > 0:
+            glyph.transform(psMat.translate((hack_half_width - glyph.width) / 2, 0))
+            glyph.width = hack_half_width
+    hack_font.generate(output_path)
+    hack_font.close()
+
+
+def merge_hack(jp_font, eng_font, hack_pack, source_codepoints):
+    """Hack フォントをマージする
+    jp_font が None の場合 (斜体を正体から作る場合) は英語フォント側だけを処理する。
+    収録文字の判定には下準備直後のコードポイント (source_codepoints) を使う。
+    """
+    if eng_font is None and (jp_font is None or not options.get("console")):
+        # ENG 側と JP 側を別プロセスで処理する場合、JP 側は Console 版でのみ処理する
+        return
+    eng_codepoints = set(source_codepoints["eng"])
+    jp_codepoints = set(source_codepoints["jp"])
+    hack_font = fontforge.open(hack_pack)
+    hack_codepoints = [g.unicode for g in hack_font.glyphs() if g.unicode != -1]
+    for glyph in hack_font.glyphs():
+        # 既に英語フォント側に存在する場合はhackグリフは削除する
+        if glyph.unicode in eng_codepoints:
+            glyph.clear()
+        # 既に日本語フォント側に存在する場合はhackグリフは削除する
+        elif not options.get("console") and glyph.unicode in jp_codepoints:
+            glyph.clear()
+    if options.get("console") and jp_font is not None:
         # Console版では、日本語フォントよりhackフォントのグリフを優先する
-        for glyph in hack_font.glyphs():
-            if glyph.unicode != -1:
+        for unicode in hack_codepoints:
+            if unicode in jp_codepoints:
                 try:
                     for g in jp_font.selection.select(
-                        ("unicode", None), glyph.unicode
+                        ("unicode", None), unicode
                     ).byGlyphs:
                         g.clear()
                 except Exception:
                     pass
-    else:
-        # 既に日本語フォント側に存在する場合はhackグリフは削除する
-        for glyph in jp_font.glyphs():
-            if glyph.unicode != -1:
-                try:
-                    for g in hack_font.selection.select(
-                        ("unicode", None), glyph.unicode
-                    ).byGlyphs:
-                        g.clear()
-                except Exception:
-                    pass
-    # EM 1000 にしたときの幅に合わせて調整
-    half_width = int(FULL_WIDTH_35 * 3 / 5)
-    for glyph in hack_font.glyphs():
-        if glyph.width > 0:
-            glyph.transform(psMat.translate((half_width - glyph.width) / 2, 0))
-            glyph.width = half_width
-    # Hack フォントをオブジェクトとして扱いたくないので、一旦ファイル保存して直接マージする
-    font_path = f"{BUILD_FONTS_DIR}/tmp_hack_{uuid.uuid4()}.ttf"
-    hack_font.generate(font_path)
-    hack_font.close()
+        jp_font.selection.none()
 
-    eng_font.mergeFonts(font_path)
-    os.remove(font_path)
+    if eng_font is not None:
+        eng_font.mergeFonts(hack_font)
+    hack_font.close()
 
 
 def eaaw_width_to_half(jp_font):
-    """East Asian Ambiguous Width 文字の半角化"""
-    # ref: https://www.unicode.org/Public/15.1.0/ucd/EastAsianWidth.txt
-
-    eaaw_unicode_list = (
-        0x203B,  # REFERENCE MARK
-        0x2103,
-        0x2109,
-        0x2121,
-        0x212B,
-        *range(0x2160, 0x216B + 1),
-        *range(0x2170, 0x217B + 1),
-        0x221F,
-        0x222E,
-        *range(0x226A, 0x226B + 1),
-        0x22A5,
-        0x22BF,
-        0x2312,
-        *range(0x2460, 0x2490 + 1),
-        *range(0x249C, 0x24B5 + 1),
-        *range(0x2605, 0x2606 + 1),
-        0x260E,
-        0x261C,
-        0x261E,
-        0x2640,
-        0x2642,
-        *range(0x2660, 0x2665 + 1),
-        0x2667,
-        0x266A,
-        0x266D,
-        0x266F,
-        0x1F100,
-    )
+    """East Asian Ambiguous Width 文字の半角化 (対象は unicode_ranges の "eaaw_half")"""
     half_width = 500
     for glyph in jp_font.glyphs():
-        if glyph.unicode in eaaw_unicode_list and glyph.width > half_width:
+        if glyph.unicode in EAAW_HALF and glyph.width > half_width:
             glyph.transform(psMat.scale(0.67, 0.9))
             glyph.transform(psMat.translate((half_width - glyph.width) / 2, 0))
             glyph.width = half_width
@@ -1062,32 +1273,20 @@ def down_scale_redundant_size_glyph(eng_font):
             and abs(xmin) - 10
             < xmax - glyph.width
             < abs(xmin) + 10  # はみ出し幅が左側と右側で極端に異なる場合は無視
-            and not (
-                0x0020 <= glyph.unicode <= 0x02AF
-            )  # latin 系のグリフ 0x0020 - 0x0192 は無視
-            and not (
-                0xE0B0 <= glyph.unicode <= 0xE0D4
-            )  # Powerline系のグリフ 0xE0B0 - 0xE0D4 は無視
-            and not (
-                0x2500 <= glyph.unicode <= 0x257F
-            )  # 罫線系のグリフ 0x2500 - 0x257F は無視
-            and not (
-                0x2591 <= glyph.unicode <= 0x2593
-            )  # SHADE グリフ 0x2591 - 0x2593 は無視
+            # latin 系、Powerline 系、罫線系、SHADE のグリフは無視
+            and glyph.unicode not in KEEP_SIZE
         ):
             scale_glyph_from_center(glyph, 1 + (xmin / glyph.width) * 2, 1)
 
 
-def add_nerd_font_glyphs(jp_font, eng_font):
-    """Nerd Fontのグリフを追加する"""
-    # 複数のvariantを生成する場合、half_widthが異なるため、毎回ロードする必要がある
-    # (例: --35オプションの有無でhalf_widthが変わる)
+def prepare_nerd_pack(output_path, em, half_width):
+    """Nerd Fontのグリフを半角幅に合わせて保存する (add_nerd_font_glyphs で使う)"""
+    # half_width は --35 オプションの有無で変わるので、キャッシュは半角幅毎に作られる
     nerd_font = fontforge.open(
         f"{SOURCE_FONTS_DIR}/nerd-fonts/SymbolsNerdFont-Regular.ttf"
     )
-    nerd_font.em = EM_ASCENT + EM_DESCENT
+    nerd_font.em = em
     glyph_names = set()
-    half_width = eng_font[0x0030].width
 
     for nerd_glyph in nerd_font.glyphs():
         # Nerd Fontsのグリフ名をユニークにするため接尾辞を付ける
@@ -1110,7 +1309,7 @@ def add_nerd_font_glyphs(jp_font, eng_font):
             # グリフの高さ・位置を調整する
             nerd_glyph.transform(psMat.scale(1, 1.14))
             nerd_glyph.transform(psMat.translate(0, 21))
-        elif nerd_glyph.width < (EM_ASCENT + EM_DESCENT) * 0.6:
+        elif nerd_glyph.width < em * 0.6:
             # 幅が狭いグリフは中央寄せとみなして調整する
             nerd_glyph.transform(
                 psMat.translate((half_width - nerd_glyph.width) / 2, 0)
@@ -1118,31 +1317,44 @@ def add_nerd_font_glyphs(jp_font, eng_font):
         # 幅を設定
         nerd_glyph.width = half_width
 
+    nerd_font.generate(output_path)
+    nerd_font.close()
+
+
+def add_nerd_font_glyphs(jp_font, eng_font, nerd_pack):
+    """Nerd Fontのグリフを追加する
+    ENG 側と JP 側を別プロセスで処理する場合、もう一方のフォントは None になる。
+    """
+    if eng_font is not None and eng_font[0x0030].width != get_half_width():
+        raise ValueError(
+            f"half width mismatch: {eng_font[0x0030].width} != {get_half_width()}"
+        )
+    nerd_font = fontforge.open(nerd_pack)
+
     # 日本語フォントにマージするため、既に存在する場合は削除する
     for nerd_glyph in nerd_font.glyphs():
         if nerd_glyph.unicode != -1:
             # 既に存在する場合は削除する
-            try:
-                for glyph in jp_font.selection.select(
-                    ("unicode", None), nerd_glyph.unicode
-                ).byGlyphs:
-                    glyph.clear()
-            except Exception:
-                pass
-            try:
-                for glyph in eng_font.selection.select(
-                    ("unicode", None), nerd_glyph.unicode
-                ).byGlyphs:
-                    glyph.clear()
-            except Exception:
-                pass
-
-    jp_font.mergeFonts(nerd_font)
-    # mergeFonts 後、nerd_font は jp_font に統合されるため、明示的に閉じる必要はない
-    # (閉じるとエラーが発生する可能性がある)
+            for font in (jp_font, eng_font):
+                if font is None:
+                    continue
+                try:
+                    for glyph in font.selection.select(
+                        ("unicode", None), nerd_glyph.unicode
+                    ).byGlyphs:
+                        glyph.clear()
+                except Exception:
+                    pass
 
-    jp_font.selection.none()
-    eng_font.selection.none()
+    if jp_font is not None:
+        jp_font.mergeFonts(nerd_font)
+        # mergeFonts 後、nerd_font は jp_font に統合されるため、明示的に閉じる必要はない
+        # (閉じるとエラーが発生する可能性がある)
+        jp_font.selection.none()
+    else:
+        nerd_font.close()
+    if eng_font is not None:
+        eng_font.selection.none()
 
 
 def delete_glyphs_with_duplicate_glyph_names(font):
@@ -1155,107 +1367,316 @@ def delete_glyphs_with_duplicate_glyph_names(font):
             glyph_name_set.add(glyph.glyphname)
 
 
-def edit_meta_data(font, weight: str, variant: str, cap_height: int, x_height: int):
-    """フォント内のメタデータを編集する"""
+def set_font_geometry(font):
+    """フォントの EM 内の ascent/descent を設定する
+    名前や OS/2 などのメタデータは fonttools_script.py で一度だけ設定する。
+    """
     font.ascent = EM_ASCENT
     font.descent = EM_DESCENT
 
-    if WIDTH_35_STR in variant and not options.get("nerd-font"):
-        os2_ascent = OS2_ASCENT + 60
-        os2_descent = OS2_DESCENT + 60
-    else:
-        os2_ascent = OS2_ASCENT
-        os2_descent = OS2_DESCENT
+    # VSCode のターミナル上のボトム位置の表示で g, j などが見切れる問題への対処
+    # 水平ベーステーブルを削除
+    font.horizontalBaseline = None
 
-    font.os2_winascent = os2_ascent
-    font.os2_windescent = os2_descent
 
-    font.os2_typoascent = os2_ascent
-    font.os2_typodescent = -os2_descent
-    font.os2_typolinegap = 0
+def derived(options, values):
+    """斜体の JP 側を正体のスナップショットから作る場合に実行する"""
+    return bool(values.get("derive_italic"))
 
-    font.hhea_ascent = os2_ascent
-    font.hhea_descent = -os2_descent
-    font.hhea_linegap = 0
 
-    font.os2_xheight = x_height
-    font.os2_capheight = cap_height
+def not_derived(options, values):
+    """JP 側をソースフォントから作る場合に実行する"""
+    return not values.get("derive_italic")
 
-    # VSCode のターミナル上のボトム位置の表示で g, j などが見切れる問題への対処
-    # 水平ベーステーブルを削除
-    font.horizontalBaseline = None
 
-    if "Regular" == weight or "Italic" == weight:
-        font.os2_weight = 400
-    elif "Thin" in weight:
-        font.os2_weight = 100
-    elif "ExtraLight" in weight:
-        font.os2_weight = 200
-    elif "Light" in weight:
-        font.os2_weight = 300
-    elif "Text" in weight:
-        font.os2_weight = 450
-    elif "Medium" in weight:
-        font.os2_weight = 500
-    elif "SemiBold" in weight:
-        font.os2_weight = 600
-    elif "Bold" in weight:
-        font.os2_weight = 700
-
-    font.os2_vendor = VENDER_NAME
-
-    font.sfnt_names = (
-        (
-            "English (US)",
-            "License",
-            """This Font Software is licensed under the SIL Open Font License,
-Version 1.1. This license is available with a FAQ
-at: http://scripts.sil.org/OFL""",
-        ),
-        ("English (US)", "License URL", "http://scripts.sil.org/OFL"),
-        ("English (US)", "Version", VERSION),
-        ("English (US)", "Copyright", COPYRIGHT),
-    )
+def italic_not_derived(options, values):
+    return italic(options, values) and not_derived(options, values)
 
-    # フォント名を設定する
-    if (
-        "Regular" == weight
-        or "Italic" == weight
-        or "Bold" == weight
-        or "BoldItalic" == weight
-    ):
-        font_family = FONT_NAME
-        if variant != "":
-            font_family += f" {variant}".replace(" 35", "35")
-        font_weight = weight
-        if weight == "BoldItalic":
-            font_weight = font_weight.replace("Italic", " Italic")
-        font.familyname = font_family
-        # フォントサブファミリー名
-        font.appendSFNTName(0x409, 2, font_weight)
-        font.fontname = f"{font_family}-{font_weight}".replace(" ", "")
-        font.fullname = f"{font_family} {font_weight}"
-        font.weight = font_weight.split(" ")[0]
-    else:
-        font_family = FONT_NAME
-        if variant != "":
-            font_family += f" {variant}".replace(" 35", "35")
-        font_weight = weight
-        if "Italic" in weight:
-            font_weight = font_weight.replace("Italic", " Italic")
-        font.familyname = f"{font_family} " + font_weight.split(" ")[0]
-        # フォントサブファミリー名
-        if "Italic" in weight:
-            font.appendSFNTName(0x409, 2, "Italic")
-        else:
-            font.appendSFNTName(0x409, 2, "Regular")
-        font.fontname = f"{font_family}-{font_weight}".replace(" ", "")
-        font.fullname = f"{font_family} {font_weight}"
-        font.weight = font_weight.split(" ")[0]
-        # 優先フォントファミリー名
-        font.appendSFNTName(0x409, 16, font_family)
-        # 優先フォントスタイル
-        font.appendSFNTName(0x409, 17, font_weight)
+
+def split(options, values):
+    """ENG 側と JP 側を別プロセスで処理し、コードポイントを受け渡す場合に実行する"""
+    return values.get("channel") is not None
+
+
+def upright_snapshot(options, values):
+    """正体のスタイルで、斜体用のスナップショットを保存する場合に実行する"""
+    return bool(values.get("upright_jp")) and not italic(options, values)
+
+
+def source_file(template, style_key):
+    """values のスタイルからソースファイルのパスを返す関数を作る (キャッシュキー用)"""
+    return lambda values: [
+        f"{SOURCE_FONTS_DIR}/" + template.replace("{style}", values[style_key])
+    ]
+
+
+# ソースフォントを開き、スタイルやオプションに依らない下準備をするステージ
+PREPARE_STAGES = [
+    # 合成するフォントを開く (JP, KR, ENG)
+    Stage(
+        "open_jp_fonts",
+        open_jp_fonts,
+        inputs=["jp_style"],
+        outputs=["jp_font", "kr_font"],
+        when=not_derived,
+        side="jp",
+    ),
+    Stage(
+        "open_eng_font",
+        open_eng_font,
+        inputs=["eng_style"],
+        outputs=["eng_font"],
+        side="eng",
+    ),
+    # 韓国語グリフをJPフォントにマージする
+    Stage(
+        "merge_kr_glyphs",
+        merge_kr_glyphs,
+        inputs=["jp_font", "kr_font"],
+        when=not_derived,
+        side="jp",
+    ),
+    # KRフォントを閉じる (マージが完了したので不要)
+    Stage(
+        "close_kr_font", close_font, inputs=["kr_font"], when=not_derived, side="jp"
+    ),
+    # フォントのEMを揃える
+    Stage("adjust_em", adjust_em, inputs=["eng_font"], side="eng"),
+]
+
+# 下準備済みのフォントを合成用に加工して保存するステージ
+BUILD_STAGES = [
+    # 独立したステージ (ワーカープロセスで並行して実行し、結果をキャッシュする)
+    Stage(
+        "prepare_hack_pack",
+        prepare_hack_pack,
+        inputs=["hack_style", "em", "hack_half_width"],
+        outputs=["hack_pack"],
+        isolated=True,
+        sources=source_file(HACK_FONT, "hack_style"),
+    ),
+    Stage(
+        "prepare_nerd_pack",
+        prepare_nerd_pack,
+        inputs=["em", "half_width"],
+        outputs=["nerd_pack"],
+        when=option("nerd-font"),
+        isolated=True,
+        sources=lambda values: [
+            f"{SOURCE_FONTS_DIR}/nerd-fonts/SymbolsNerdFont-Regular.ttf"
+        ],
+    ),
+    Stage(
+        "prepare_box_drawing_pack",
+        prepare_box_drawing_pack,
+        inputs=["full_width"],
+        outputs=["box_drawing_pack"],
+        when=no_option("console"),
+        isolated=True,
+        sources=lambda values: [f"{SOURCE_FONTS_DIR}/FullWidthBoxDrawings.sfd"],
+    ),
+    Stage(
+        "prepare_zenkaku_space_pack",
+        prepare_zenkaku_space_pack,
+        inputs=["full_width"],
+        outputs=["zenkaku_space_pack"],
+        when=no_option("hidden-zenkaku-space"),
+        isolated=True,
+        sources=lambda values: [f"{SOURCE_FONTS_DIR}/{IDEOGRAPHIC_SPACE}"],
+    ),
+    # 下準備直後のコードポイント (斜体の場合は正体のスナップショット作成時のもの)
+    Stage(
+        "get_source_codepoints",
+        get_source_codepoints,
+        inputs=["jp_font", "eng_font"],
+        outputs=["source_codepoints"],
+        when=lambda options, values: not_derived(options, values)
+        and not split(options, values),
+    ),
+    Stage(
+        "exchange_source_codepoints",
+        exchange_source_codepoints,
+        inputs=[
+            "jp_font",
+            "eng_font",
+            "channel",
+            "jp_codepoints",
+            "codepoint_index",
+        ],
+        outputs=["source_codepoints"],
+        when=split,
+    ),
+    Stage(
+        "load_upright_codepoints",
+        load_upright_codepoints,
+        inputs=["eng_font", "upright_jp"],
+        outputs=["source_codepoints"],
+        when=derived,
+        side="eng",
+    ),
+    # Hack フォントをマージする
+    Stage(
+        "merge_hack",
+        merge_hack,
+        inputs=["jp_font", "eng_font", "hack_pack", "source_codepoints"],
+    ),
+    # East Asian Ambiguous Width 文字の半角化
+    Stage(
+        "eaaw_width_to_half",
+        eaaw_width_to_half,
+        inputs=["jp_font"],
+        when=lambda options, values: options.get("console")
+        and not_derived(options, values),
+        side="jp",
+    ),
+    # コンソール用グリフを追加する
+    Stage(
+        "add_console_glyphs",
+        add_console_glyphs,
+        inputs=["eng_font"],
+        when=option("console"),
+        side="eng",
+    ),
+    Stage(
+        "delete_not_console_glyphs",
+        delete_not_console_glyphs,
+        inputs=["eng_font"],
+        when=no_option("console"),
+        side="eng",
+    ),
+    # 重複するグリフを削除する
+    Stage(
+        "delete_duplicate_glyphs",
+        delete_duplicate_glyphs,
+        inputs=["jp_font", "eng_font", "channel"],
+        outputs=["jp_font", "eng_info"],
+    ),
+    # いくつかのグリフ形状に調整を加える
+    Stage(
+        "adjust_some_glyph",
+        adjust_some_glyph,
+        inputs=["jp_font", "eng_font", "merged_style", "eng_info"],
+    ),
+    # 日本語グリフの斜体を生成する
+    Stage(
+        "transform_italic_glyphs",
+        transform_italic_glyphs,
+        inputs=["jp_font"],
+        when=italic_not_derived,
+        side="jp",
+    ),
+    # 半角幅か全角幅になるように変換する
+    Stage(
+        "set_width_600_or_1000",
+        set_width_600_or_1000,
+        inputs=["jp_font"],
+        when=not_derived,
+        side="jp",
+    ),
+    # eng_fontを3:5幅にする
+    Stage(
+        "adjust_width_35_eng",
+        adjust_width_35_eng,
+        inputs=["eng_font"],
+        when=option("35"),
+        side="eng",
+    ),
+    # jp_fontを3:5幅にする
+    Stage(
+        "adjust_width_35_jp",
+        adjust_width_35_jp,
+        inputs=["jp_font"],
+        when=lambda options, values: options.get("35")
+        and not_derived(options, values),
+        side="jp",
+    ),
+    # 1:2 幅にする
+    Stage(
+        "transform_half_width",
+        transform_half_width,
+        inputs=["jp_font", "eng_font"],
+        when=no_option("35"),
+    ),
+    # 規定の幅からはみ出したグリフサイズを縮小する
+    Stage(
+        "down_scale_redundant_size_glyph",
+        down_scale_redundant_size_glyph,
+        inputs=["eng_font"],
+        when=no_option("35"),
+        side="eng",
+    ),
+    # 幅の変換まで済んだ正体の JP フォントを保存し、斜体ではそこから JP 側を作る
+    Stage(
+        "save_upright_jp",
+        save_upright_jp,
+        inputs=["jp_font", "source_codepoints", "upright_jp"],
+        when=upright_snapshot,
+        side="jp",
+    ),
+    Stage(
+        "derive_italic_jp",
+        derive_italic_jp,
+        inputs=["upright_jp"],
+        outputs=["jp_font"],
+        when=derived,
+        side="jp",
+    ),
+    # GPOSテーブルを削除する
+    Stage(
+        "remove_gpos_lookups", remove_gpos_lookups, inputs=["jp_font"], side="jp"
+    ),
+    # 罫線を全角にする
+    Stage(
+        "make_box_drawing_full_width",
+        make_box_drawing_full_width,
+        inputs=["eng_font", "jp_font", "box_drawing_pack"],
+        when=no_option("console"),
+    ),
+    # 全角スペースを可視化する
+    Stage(
+        "visualize_zenkaku_space",
+        visualize_zenkaku_space,
+        inputs=["jp_font", "zenkaku_space_pack"],
+        when=no_option("hidden-zenkaku-space"),
+        side="jp",
+    ),
+    # Nerd Fontのグリフを追加する
+    Stage(
+        "add_nerd_font_glyphs",
+        add_nerd_font_glyphs,
+        inputs=["jp_font", "eng_font", "nerd_pack"],
+        when=option("nerd-font"),
+    ),
+    # Nerd Fonts 병합 후 한글 bearing 재조정 (겹침 방지)
+    Stage(
+        "fix_korean_bearing_after_merge",
+        fix_korean_bearing_after_merge,
+        inputs=["jp_font"],
+        when=option("nerd-font"),
+        side="jp",
+    ),
+    # macOSでのpostテーブルの使用性エラー対策
+    # 重複するグリフ名を持つグリフをリネームする
+    Stage(
+        "delete_glyphs_with_duplicate_glyph_names(eng)",
+        delete_glyphs_with_duplicate_glyph_names,
+        inputs=["eng_font"],
+        side="eng",
+    ),
+    Stage(
+        "delete_glyphs_with_duplicate_glyph_names(jp)",
+        delete_glyphs_with_duplicate_glyph_names,
+        inputs=["jp_font"],
+        side="jp",
+    ),
+    # EM の縦方向を設定する (メタデータは fonttools_script.py で設定する)
+    Stage(
+        "set_font_geometry(eng)", set_font_geometry, inputs=["eng_font"], side="eng"
+    ),
+    Stage("set_font_geometry(jp)", set_font_geometry, inputs=["jp_font"], side="jp"),
+    # ttfファイルに保存
+    Stage("save_fonts", save_fonts, inputs=["jp_font", "eng_font", "merged_style"]),
+]
 
 
 if __name__ == "__main__":
@@ -2,18 +2,28 @@
 
 import configparser
 import glob
+import io
 import os
 import sys
-import xml.etree.ElementTree as ET
 from pathlib import Path
 
-from fontTools import merge, ttLib, ttx
+from fontTools import ttLib
+from fontTools.misc.timeTools import timestampNow
 from ttfautohint import options, ttfautohint
 
+from build_trace import name_process, traced
+from dedup_outlines import dedup_outlines
+from disjoint_merge import (
+    OverlappingCmapError,
+    merge_disjoint_fonts,
+    merge_fonts_with_merger,
+)
+
 # iniファイルを読み込む
 settings = configparser.ConfigParser()
 settings.read("build.ini", encoding="utf-8")
 
+VERSION = settings.get("DEFAULT", "VERSION")
 FONT_NAME = settings.get("DEFAULT", "FONT_NAME")
 try:
     NEW_FONT_NAME = settings.get("DEFAULT", "NEW_FONT_NAME")
@@ -26,6 +36,29 @@ HALF_WIDTH_12 = int(settings.get("DEFAULT", "HALF_WIDTH_12"))
 FULL_WIDTH_35 = int(settings.get("DEFAULT", "FULL_WIDTH_35"))
 WIDTH_35_STR = settings.get("DEFAULT", "WIDTH_35_STR")
 CONSOLE_STR = settings.get("DEFAULT", "CONSOLE_STR")
+NERD_FONTS_STR = settings.get("DEFAULT", "NERD_FONTS_STR")
+INVISIBLE_ZENKAKU_SPACE_STR = settings.get("DEFAULT", "INVISIBLE_ZENKAKU_SPACE_STR")
+VENDER_NAME = settings.get("DEFAULT", "VENDER_NAME")
+OS2_ASCENT = int(settings.get("DEFAULT", "OS2_ASCENT"))
+OS2_DESCENT = int(settings.get("DEFAULT", "OS2_DESCENT"))
+
+COPYRIGHT = """[IBM Plex]
+Copyright (c) 2017 IBM Corp. https://github.com/IBM/plex
+
+[Hack]
+Copyright 2018 Source Foundry Authors https://github.com/source-foundry/Hack
+
+[Nerd Fonts]
+Copyright (c) 2014, Ryan L McIntyre https://ryanlmcintyre.com
+
+[PlemolJP]
+Copyright (c) 2021, Yuko Otawara
+"""  # noqa: E501
+
+LICENSE = """This Font Software is licensed under the SIL Open Font License,
+Version 1.1. This license is available with a FAQ
+at: http://scripts.sil.org/OFL"""
+LICENSE_URL = "http://scripts.sil.org/OFL"
 
 
 def main():
@@ -33,6 +66,7 @@ def main():
     # 特定のバリエーションのみを処理するための指定
     specific_variant = sys.argv[1] if len(sys.argv) > 1 else None
 
+    name_process("fonttools_script")
     edit_fonts(specific_variant)
 
 
@@ -55,8 +89,8 @@ def edit_fonts(specific_variant: str):
         style = path.stem.split("-")[1]
         variant = path.stem.split("-")[0].replace(f"{FONTFORGE_PREFIX}{FONT_NAME}", "")
         add_hinting(str(path), str(path).replace(".ttf", "-hinted.ttf"), variant, style)
-        merge_fonts(style, variant)
-        fix_font_tables(style, variant)
+        merged_font = merge_fonts(style, variant)
+        fix_font_tables(merged_font, style, variant)
 
     # 一時ファイルを削除
     # スタイル部分以降はワイルドカードで指定
@@ -70,8 +104,17 @@ def edit_fonts(specific_variant: str):
         os.remove(filename)
 
 
+@traced("add_hinting", "variant", "style")
 def add_hinting(input_font_path, output_font_path, variant, style):
     """フォントにヒンティングを付ける"""
+    # -W (Windows 互換) は usWinAscent/usWinDescent を参照するため、
+    # 縦方向のメトリクスを先にメモリ上で設定してから ttfautohint に渡す
+    eng_font = ttLib.TTFont(input_font_path)
+    apply_vertical_metrics(eng_font, build_meta_data(style, variant))
+    buffer = io.BytesIO()
+    eng_font.save(buffer)
+    eng_font.close()
+
     if "Italic" not in style:
         width_variant = "35" if WIDTH_35_STR in variant else "normal"
         ctrl_file = [
@@ -95,256 +138,279 @@ def add_hinting(input_font_path, output_font_path, variant, style):
         "-X",
         "13-",
         "-I",
-        input_font_path,
+        "-",
         output_font_path,
     ]
     options_ = options.parse_args(args)
     # Remove epoch option for ttfautohint 1.8.3/1.8.4 compatibility
     if hasattr(options_, 'epoch'):
         delattr(options_, 'epoch')
+    options_["in_file"] = None
+    options_["in_buffer"] = buffer.getvalue()
     ttfautohint(**options_)
 
 
-def merge_fonts(style, variant):
-    """フォントを結合する"""
+@traced("merge_fonts", "variant", "style")
+def merge_fonts(style, variant) -> ttLib.TTFont:
+    """フォントを結合し、重複したアウトラインをまとめる
+    delete_duplicate_glyphs で cmap が重ならないようにしてあるので、通常は
+    グリフデータをそのまま連結する disjoint_merge で結合する。
+    重なりが残っていた場合は fontTools.merge.Merger で結合する。
+    """
     eng_font_path = f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{FONT_NAME}{variant}-{style}-eng-hinted.ttf"
     jp_font_path = (
         f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{FONT_NAME}{variant}-{style}-jp.ttf"
     )
-    # vhea, vmtxテーブルを削除
-    jp_font_object = ttLib.TTFont(jp_font_path)
-    if "vhea" in jp_font_object:
-        del jp_font_object["vhea"]
-    if "vmtx" in jp_font_object:
-        del jp_font_object["vmtx"]
-    jp_font_object.save(jp_font_path)
-    # フォントを結合
-    merger = merge.Merger()
-    merged_font = merger.merge([eng_font_path, jp_font_path])
-    merged_font.save(
-        f"{BUILD_FONTS_DIR}/{FONTTOOLS_PREFIX}{FONT_NAME}{variant}-{style}_merged.ttf"
-    )
-
-
-def fix_font_tables(style, variant):
-    """フォントテーブルを編集する"""
-
-    input_font_name = f"{FONTTOOLS_PREFIX}{FONT_NAME}{variant}-{style}_merged.ttf"
-    output_name_base = f"{FONTTOOLS_PREFIX}{FONT_NAME}{variant}-{style}"
-
+    try:
+        font = merge_disjoint_fonts(eng_font_path, jp_font_path)
+    except OverlappingCmapError as e:
+        print(f"Warning: {e}, falling back to fontTools.merge.Merger")
+        # vhea, vmtxテーブルを削除してから結合する
+        font = merge_fonts_with_merger(eng_font_path, jp_font_path)
+
+    # 同じアウトラインのグリフを複合グリフの参照に置き換える
+    count, saved = dedup_outlines(font)
+    if count:
+        print(f"dedup {count} glyphs ({saved:,} bytes)")
+    return font
+
+
+@traced("fix_font_tables", "variant", "style")
+def fix_font_tables(font: ttLib.TTFont, style, variant):
+    """フォントテーブルを編集する
+    メタデータ仕様をメモリ上で一度だけ適用し、完成版のファイル名で保存する。
+    """
     # variant에서 "Console" 제거 (GLG-Mono-Regular.ttf 형식)
     # 35는 유지 (GLG-Mono35-Regular.ttf)
-    output_variant = variant.replace("Console", "")
+    output_variant = variant.replace(CONSOLE_STR, "")
     completed_name_base = f"{NEW_FONT_NAME.replace(' ', '')}{output_variant}-{style}"
 
-    # OS/2, post テーブルのみのttxファイルを出力
-    xml = dump_ttx(input_font_name, output_name_base)
-    # OS/2 テーブルを編集
-    fix_os2_table(xml, style, flag_35=WIDTH_35_STR in variant)
-    # post テーブルを編集
-    fix_post_table(xml, flag_35=WIDTH_35_STR in variant)
-    # name テーブルを編集
-    fix_name_table(xml, style, variant)
-
-    # ttxファイルを上書き保存
-    xml.write(
-        f"{BUILD_FONTS_DIR}/{output_name_base}.ttx",
-        encoding="utf-8",
-        xml_declaration=True,
-    )
-
-    # ttxファイルをttfファイルに適用
-    ttx.main(
-        [
-            "-o",
-            f"{BUILD_FONTS_DIR}/{output_name_base}_os2_post.ttf",
-            "-m",
-            f"{BUILD_FONTS_DIR}/{input_font_name}",
-            f"{BUILD_FONTS_DIR}/{output_name_base}.ttx",
-        ]
-    )
+    meta = build_meta_data(style, variant)
+    # cap height, x height はアウトラインから求める (ジオメトリ由来の値)
+    meta["cap_height"] = get_glyph_y_max(font, 0x0048)
+    meta["x_height"] = get_glyph_y_max(font, 0x0078)
+    apply_meta_data(font, meta)
+    make_reproducible(font)
+
+    font.save(f"{BUILD_FONTS_DIR}/{completed_name_base}.ttf")
+
+
+def get_glyph_y_max(font: ttLib.TTFont, unicode: int) -> int:
+    """指定したコードポイントのグリフの yMax を返す"""
+    glyph_name = font.getBestCmap()[unicode]
+    glyf = font["glyf"]
+    glyph = glyf[glyph_name]
+    glyph.recalcBounds(glyf)
+    return glyph.yMax
+
+
+def get_weight_class(style: str) -> int:
+    """スタイル名から OS/2 usWeightClass を求める"""
+    if "Regular" == style or "Italic" == style:
+        return 400
+    elif "Thin" in style:
+        return 100
+    elif "ExtraLight" in style:
+        return 200
+    elif "Light" in style:
+        return 300
+    elif "Text" in style:
+        return 450
+    elif "Medium" in style:
+        return 500
+    elif "SemiBold" in style:
+        return 600
+    elif "Bold" in style:
+        return 700
+    return 400
+
+
+def build_meta_data(style: str, variant: str) -> dict:
+    """(style, variant) からフォントのメタデータ仕様を組み立てる
+
+    variant はファイル名に含まれる修飾子 (例: "35ConsoleNF")。
+    名前、OS/2、hhea、post、head に書き込む値はすべてここで決まる。
+    """
+    flag_35 = WIDTH_35_STR in variant
+    flag_nerd_font = NERD_FONTS_STR in variant
 
-    # ファイル名を変更
-    os.rename(
-        f"{BUILD_FONTS_DIR}/{output_name_base}_os2_post.ttf",
-        f"{BUILD_FONTS_DIR}/{completed_name_base}.ttf",
-    )
+    # GLG-Mono (간결한 형식)
+    # Console variant는 기본이므로 family name에 추가하지 않음
+    font_family = NEW_FONT_NAME
+    if flag_35:
+        font_family += f" {WIDTH_35_STR}"
+    if INVISIBLE_ZENKAKU_SPACE_STR in variant:
+        font_family += f" {INVISIBLE_ZENKAKU_SPACE_STR}"
+    if flag_nerd_font:
+        font_family += f" {NERD_FONTS_STR}"
+
+    is_ribbi = style in ("Regular", "Italic", "Bold", "BoldItalic")
+    is_italic = "Italic" in style
+    is_bold = style in ("Bold", "BoldItalic")
+
+    font_weight = style
+    if "Italic" in style and style != "Italic":
+        font_weight = font_weight.replace("Italic", " Italic")
+
+    meta = {
+        "full_name": f"{font_family} {font_weight}",
+        "postscript_name": f"{font_family}-{font_weight}".replace(" ", ""),
+        "version": VERSION,
+        "copyright": COPYRIGHT,
+        "license": LICENSE,
+        "license_url": LICENSE_URL,
+        "vendor": VENDER_NAME,
+        "weight_class": get_weight_class(style),
+        "x_avg_char_width": FULL_WIDTH_35 if flag_35 else HALF_WIDTH_12,
+        "is_fixed_pitch": 0 if flag_35 else 1,
+    }
+    meta["unique_id"] = f"{VERSION};{VENDER_NAME};{meta['postscript_name']}"
+
+    if is_ribbi:
+        meta["family"] = font_family
+        meta["subfamily"] = font_weight
+        meta["typographic_family"] = None
+        meta["typographic_subfamily"] = None
+    else:
+        # Thin, Light Italic などは RIBBI の外にあるため
+        # ファミリー名にウェイトを含め、優先ファミリー名 (16, 17) を設定する
+        meta["family"] = f"{font_family} " + font_weight.split(" ")[0]
+        meta["subfamily"] = "Italic" if is_italic else "Regular"
+        meta["typographic_family"] = font_family
+        meta["typographic_subfamily"] = font_weight
+
+    # 縦方向のメトリクス
+    if flag_35 and not flag_nerd_font:
+        meta["ascent"] = OS2_ASCENT + 60
+        meta["descent"] = OS2_DESCENT + 60
+    else:
+        meta["ascent"] = OS2_ASCENT
+        meta["descent"] = OS2_DESCENT
+
+    # fsSelection: bit 0 ITALIC, bit 5 BOLD, bit 6 REGULAR, bit 8 WWS
+    fs_selection = 1 << 8
+    if is_italic:
+        fs_selection |= 1 << 0
+    if is_bold:
+        fs_selection |= 1 << 5
+    if not is_italic and not is_bold:
+        fs_selection |= 1 << 6
+    meta["fs_selection"] = fs_selection
+    # macStyle: bit 0 Bold, bit 1 Italic
+    meta["mac_style"] = (1 if is_bold else 0) | (2 if is_italic else 0)
 
+    if style == "Regular" or style == "Italic":
+        b_weight = 5
+    else:
+        b_weight = 8
+    meta["panose"] = {
+        "bFamilyType": 2,
+        "bSerifStyle": 11,
+        "bWeight": b_weight,
+        "bProportion": 3 if flag_35 else 9,
+        "bContrast": 5,
+        "bStrokeVariation": 2,
+        "bArmStyle": 3,
+        "bLetterForm": 0,
+        "bMidline": 2,
+        "bXHeight": 3,
+    }
+
+    return meta
+
+
+def apply_vertical_metrics(font: ttLib.TTFont, meta: dict):
+    """縦方向のメトリクスを OS/2, hhea テーブルに設定する"""
+    os2 = font["OS/2"]
+    os2.usWinAscent = meta["ascent"]
+    os2.usWinDescent = meta["descent"]
+    os2.sTypoAscender = meta["ascent"]
+    os2.sTypoDescender = -meta["descent"]
+    os2.sTypoLineGap = 0
+
+    hhea = font["hhea"]
+    hhea.ascent = meta["ascent"]
+    hhea.descent = -meta["descent"]
+    hhea.lineGap = 0
+
+
+def apply_meta_data(font: ttLib.TTFont, meta: dict):
+    """build_meta_data() で組み立てた仕様をフォントに適用する"""
+    apply_vertical_metrics(font, meta)
+
+    os2 = font["OS/2"]
+    os2.usWeightClass = meta["weight_class"]
+    os2.achVendID = meta["vendor"]
+    os2.xAvgCharWidth = meta["x_avg_char_width"]
+    os2.fsSelection = meta["fs_selection"]
+    for key, value in meta["panose"].items():
+        setattr(os2.panose, key, value)
+    # cap height, x height は既存の値を引き継げるよう省略可能にしている
+    if meta.get("cap_height") is not None and os2.version >= 2:
+        os2.sCapHeight = meta["cap_height"]
+    if meta.get("x_height") is not None and os2.version >= 2:
+        os2.sxHeight = meta["x_height"]
+
+    font["post"].isFixedPitch = meta["is_fixed_pitch"]
+
+    head = font["head"]
+    head.macStyle = meta["mac_style"]
+    head.fontRevision = get_font_revision(meta["version"])
+
+    fix_name_table(font["name"], meta)
+
+
+def make_reproducible(font: ttLib.TTFont):
+    """SOURCE_DATE_EPOCH が指定されている場合、実行毎に変わる値を固定する
+    FontForge の生成時刻を持つ FFTM テーブルを削除し、head の作成時刻を
+    SOURCE_DATE_EPOCH にする (更新時刻は保存時に fontTools が同じ値にする)。
+    """
+    if os.environ.get("SOURCE_DATE_EPOCH") is None:
+        return
+    if "FFTM" in font:
+        del font["FFTM"]
+    font["head"].created = timestampNow()
 
-def dump_ttx(input_name_base, output_name_base) -> ET:
-    """OS/2, post テーブルのみのttxファイルを出力"""
-    ttx.main(
-        [
-            "-t",
-            "OS/2",
-            "-t",
-            "post",
-            "-t",
-            "name",
-            "-f",
-            "-o",
-            f"{BUILD_FONTS_DIR}/{output_name_base}.ttx",
-            f"{BUILD_FONTS_DIR}/{input_name_base}",
-        ]
-    )
 
-    return ET.parse(f"{BUILD_FONTS_DIR}/{output_name_base}.ttx")
+def get_font_revision(version: str) -> float:
+    """VERSION (例: v1.0.0) から head.fontRevision を求める"""
+    numbers = version.lstrip("vV").split(".")
+    major = int(numbers[0])
+    minor = int(numbers[1]) if len(numbers) > 1 else 0
+    return float(f"{major}.{minor:03d}")
 
 
-def fix_os2_table(xml: ET, style: str, flag_35: bool = False):
-    """OS/2 テーブルを編集する"""
-    # xAvgCharWidthを編集
-    # タグ形式: <xAvgCharWidth value="1000"/>
-    if flag_35:
-        x_avg_char_width = FULL_WIDTH_35
-    else:
-        x_avg_char_width = HALF_WIDTH_12
-    xml.find("OS_2/xAvgCharWidth").set("value", str(x_avg_char_width))
-
-    # fsSelectionを編集
-    # タグ形式: <fsSelection value="00000000 11000000" />
-    # スタイルに応じたビットを立てる
-    fs_selection = None
-    if style == "Regular":
-        fs_selection = "00000001 01000000"
-    elif style == "Italic":
-        fs_selection = "00000001 00000001"
-    elif style == "Bold":
-        fs_selection = "00000001 00100000"
-    elif style == "BoldItalic":
-        fs_selection = "00000001 00100001"
-
-    if fs_selection is not None:
-        xml.find("OS_2/fsSelection").set("value", fs_selection)
-
-    # panoseを編集
-    # タグ形式:
-    # <panose>
-    #   <bFamilyType value="2" />
-    #   <bSerifStyle value="11" />
-    #   <bWeight value="6" />
-    #   <bProportion value="9" />
-    #   <bContrast value="6" />
-    #   <bStrokeVariation value="3" />
-    #   <bArmStyle value="0" />
-    #   <bLetterForm value="2" />
-    #   <bMidline value="0" />
-    #   <bXHeight value="4" />
-    # </panose>
-    if style == "Regular" or style == "Italic":
-        bWeight = 5
-    else:
-        bWeight = 8
-    if flag_35:
-        panose = {
-            "bFamilyType": 2,
-            "bSerifStyle": 11,
-            "bWeight": bWeight,
-            "bProportion": 3,
-            "bContrast": 5,
-            "bStrokeVariation": 2,
-            "bArmStyle": 3,
-            "bLetterForm": 0,
-            "bMidline": 2,
-            "bXHeight": 3,
-        }
-    else:
-        panose = {
-            "bFamilyType": 2,
-            "bSerifStyle": 11,
-            "bWeight": bWeight,
-            "bProportion": 9,
-            "bContrast": 5,
-            "bStrokeVariation": 2,
-            "bArmStyle": 3,
-            "bLetterForm": 0,
-            "bMidline": 2,
-            "bXHeight": 3,
-        }
-
-    for key, value in panose.items():
-        xml.find(f"OS_2/panose/{key}").set("value", str(value))
-
-
-def fix_post_table(xml: ET, flag_35):
-    """post テーブルを編集する"""
-    # isFixedPitchを編集
-    # タグ形式: <isFixedPitch value="0"/>
-    is_fixed_pitch = 0 if flag_35 else 1
-    xml.find("post/isFixedPitch").set("value", str(is_fixed_pitch))
-
-
-def fix_name_table(xml: ET, style: str, variant: str):
-    """name テーブルを編集する
-    何故か謎の内容の著作権フィールドが含まれてしまうので、削除する。
-    また、フォント名を明示的に設定する。
+def fix_name_table(name_table, meta: dict):
+    """name テーブルを作り直す
+    FontForge や ttfautohint が付けた名前は一旦すべて破棄し、仕様の値だけを書き込む。
+    ただし ttfautohint がバージョン文字列に追記した情報は引き継ぐ。
     """
-    parent = xml.find("name")
-    
-    # 著作権フィールド(nameID=0)에서 FONT_NAME이 포함되지 않은 항목 삭제
-    for element in parent.findall("namerecord[@nameID='0']"):
-        if FONT_NAME not in element.text:
-            parent.remove(element)
-    
-    # フォント名を生成 (fontforge_script.pyのedit_meta_dataと同じロジック)
-    # GLG-Mono (간결한 형식)
-    font_family = NEW_FONT_NAME
-    if variant != "":
-        # Console 제거, 35만 추가 (GLG-Mono, GLG-Mono 35)
-        if "35" in variant:
-            font_family += " 35"
-        # Console variant는 기본이므로 family name에 추가하지 않음
-    
-    if style == "Regular" or style == "Italic" or style == "Bold" or style == "BoldItalic":
-        font_weight = style
-        if style == "BoldItalic":
-            font_weight = "Bold Italic"
-    else:
-        font_weight = style
-        if "Italic" in style:
-            font_weight = font_weight.replace("Italic", " Italic")
-    
-    font_family_name = font_family
-    font_subfamily_name = font_weight
-    full_font_name = f"{font_family} {font_weight}"
-    postscript_name = f"{font_family}-{font_weight}".replace(" ", "")
-    
-    # nameID 1: Font Family name
-    update_name_records(parent, 1, font_family_name)
-    
-    # nameID 2: Font Subfamily name
-    update_name_records(parent, 2, font_subfamily_name)
-    
-    # nameID 4: Full font name
-    update_name_records(parent, 4, full_font_name)
-    
-    # nameID 6: PostScript name
-    update_name_records(parent, 6, postscript_name)
-    
-    # nameID 16, 17: Typographic Family/Subfamily name (Regular/Italic/Bold/BoldItalic以外の場合)
-    if style != "Regular" and style != "Italic" and style != "Bold" and style != "BoldItalic":
-        update_name_records(parent, 16, font_family)
-        update_name_records(parent, 17, font_weight)
-
-
-def update_name_records(parent: ET.Element, name_id: int, text: str):
-    """nameテーブルの特定nameIDのレコードを更新または作成する"""
-    # 既存のレコード 찾기
-    existing_records = parent.findall(f"namerecord[@nameID='{name_id}']")
-    
-    if existing_records:
-        # 既存レコードの値を更新
-        for record in existing_records:
-            record.text = text
-    else:
-        # 新しいレコードを作成 (Windows Unicode, English US)
-        # platformID=3 (Windows), platEncID=1 (Unicode BMP), langID=0x409 (English US)
-        new_record = ET.SubElement(parent, "namerecord")
-        new_record.set("nameID", str(name_id))
-        new_record.set("platformID", "3")
-        new_record.set("platEncID", "1")
-        new_record.set("langID", "0x409")
-        new_record.text = text
+    version = meta["version"]
+    old_version = name_table.getDebugName(5)
+    if old_version and "; ttfautohint" in old_version:
+        version += old_version[old_version.index("; ttfautohint") :]
+
+    records = {
+        0: meta["copyright"],
+        1: meta["family"],
+        2: meta["subfamily"],
+        3: meta["unique_id"],
+        4: meta["full_name"],
+        5: version,
+        6: meta["postscript_name"],
+        13: meta["license"],
+        14: meta["license_url"],
+        16: meta["typographic_family"],
+        17: meta["typographic_subfamily"],
+    }
+
+    name_table.names = []
+    for name_id, text in records.items():
+        if text is None:
+            continue
+        # Macintosh (Roman, English) と Windows (Unicode BMP, English US)
+        name_table.setName(text, name_id, 1, 0, 0)
+        name_table.setName(text, name_id, 3, 1, 0x409)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+파이프라인 개발용 축소 소스 폰트 (mini sources) 생성 도구
+
+SOURCE_FONTS_DIR 의 폰트를 대표적인 코드포인트만 남기도록 서브셋해서
+MINI_SOURCE_FONTS_DIR 에 같은 배치로 저장합니다. 폰트가 아닌 파일 (sfd 등) 은 그대로 복사합니다.
+fontforge_script.py --smoke 는 이 디렉토리를 소스로 사용하므로, 전체 파이프라인을
+몇 초 만에 끝까지 실행해 볼 수 있습니다 (task smoke).
+
+남기는 코드포인트 (원본 폰트에 있는 것만):
+- ASCII, 가나, 박스 드로잉/블록 요소, Powerline 은 전부
+- fontforge_script.py 가 개별로 참조하는 코드포인트 (0xXXXX 숫자, adjust_some_glyph 등)
+- unicode_ranges.RANGE_TABLE 의 범위 중 작은 것은 전부, 큰 것 (한글 음절 등) 은 등간격으로 일부
+- 한자는 등간격으로 일부
+- altuni: 다른 코드포인트와 같은 글리프를 쓰는 코드포인트는 전부
+- 그 밖의 cmap 전체에서 등간격으로 일부
+
+원본과 생성 방법이 바뀐 파일만 다시 만듭니다.
+
+Usage:
+    python mini_sources.py [--force] [--jobs N]
+
+Options:
+    --force         모든 파일을 다시 생성
+    --jobs N        병렬 프로세스 수 (기본: CPU 수)
+    --help          도움말 표시
+"""
+
+import argparse
+import configparser
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from fontTools import subset, ttLib
+
+from unicode_ranges import RANGE_TABLE, RangeSet, named_set
+
+settings = configparser.ConfigParser()
+settings.read("build.ini", encoding="utf-8")
+
+SOURCE_FONTS_DIR = settings.get("DEFAULT", "SOURCE_FONTS_DIR")
+MINI_SOURCE_FONTS_DIR = settings.get("DEFAULT", "MINI_SOURCE_FONTS_DIR")
+MANIFEST = ".mini_sources.json"
+FONT_EXTENSIONS = (".ttf", ".otf")
+
+# 원본 폰트에 있으면 모두 남기는 범위
+KEEP_RANGES = RangeSet(
+    [
+        (0x0020, 0x007E),  # ASCII
+        (0x3040, 0x30FF),  # ひらがな, カタカナ
+        (0x2500, 0x259F),  # 박스 드로잉, 블록 요소
+        (0xE0A0, 0xE0D7),  # Powerline
+    ]
+)
+# RANGE_TABLE 의 범위 중 이 크기 이하는 모두 남기고, 넘으면 SAMPLE_COUNT 개만 남긴다
+SMALL_RANGE = 2000
+SAMPLE_COUNT = 300
+# 한자 (CJK 통합 한자) 에서 남기는 수
+KANJI = RangeSet([(0x4E00, 0x9FFF)])
+# 위 범위에 들지 않는 나머지 전체에서 남기는 수
+OTHER_SAMPLE_COUNT = 200
+
+# 서브셋할 수 없는 테이블 (meta, TTFA 등) 을 버린다는 경고는 표시하지 않는다
+logging.getLogger("fontTools.subset").setLevel(logging.ERROR)
+
+
+def referenced_codepoints():
+    """ASCII 와 fontforge_script.py 가 개별로 참조하는 코드포인트 (0xXXXX 숫자)"""
+    with open("fontforge_script.py", encoding="utf-8") as f:
+        source = f.read()
+    codepoints = {int(value, 16) for value in re.findall(r"\b0x([0-9A-Fa-f]{4,6})\b", source)}
+    return codepoints | set(range(0x20, 0x7F))
+
+
+def stride_sample(codepoints, count):
+    """정렬한 코드포인트에서 등간격으로 count 개"""
+    codepoints = sorted(codepoints)
+    step = max(1, len(codepoints) // count)
+    return set(codepoints[::step][:count])
+
+
+def sample_codepoints(cmap, required):
+    """원본 폰트의 cmap ({코드포인트: 글리프 이름}) 에서 남길 코드포인트"""
+    available = set(cmap)
+    keep = {cp for cp in available if cp in KEEP_RANGES} | (required & available)
+    for name in RANGE_TABLE:
+        in_range = {cp for cp in available if cp in named_set(name)}
+        if len(named_set(name)) <= SMALL_RANGE:
+            keep |= in_range
+        else:
+            keep |= stride_sample(in_range, SAMPLE_COUNT)
+    keep |= stride_sample({cp for cp in available if cp in KANJI}, SAMPLE_COUNT)
+    # altuni: 여러 코드포인트가 같은 글리프를 쓰는 경우
+    shared = Counter(cmap.values())
+    keep |= {cp for cp, glyph_name in cmap.items() if shared[glyph_name] > 1}
+    keep |= stride_sample(available - keep, OTHER_SAMPLE_COUNT)
+    return keep
+
+
+def subset_font(source_path, output_path, codepoints):
+    """codepoints 만 남긴 폰트를 저장한다 (글리프 이름, 이름 테이블, 레이아웃 기능은 유지)"""
+    font = ttLib.TTFont(source_path)
+    options = subset.Options()
+    options.glyph_names = True
+    options.name_IDs = ["*"]
+    options.name_languages = ["*"]
+    options.layout_features = ["*"]
+    options.notdef_outline = True
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    font.save(tmp_path)
+    font.close()
+    os.replace(tmp_path, output_path)
+
+
+def make_mini_file(rel_path, required):
+    """파일 하나를 축소 (폰트) 또는 복사하고 (rel_path, 원본 글리프 수, 결과 글리프 수, 오류)"""
+    source_path = f"{SOURCE_FONTS_DIR}/{rel_path}"
+    output_path = f"{MINI_SOURCE_FONTS_DIR}/{rel_path}"
+    try:
+        if not rel_path.endswith(FONT_EXTENSIONS):
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copyfile(source_path, output_path)
+            return rel_path, None, None, None
+        font = ttLib.TTFont(source_path, lazy=True)
+        cmap = font.getBestCmap()
+        source_glyphs = len(font.getGlyphOrder())
+        font.close()
+        subset_font(source_path, output_path, sample_codepoints(cmap, required))
+        mini = ttLib.TTFont(output_path, lazy=True)
+        mini_glyphs = len(mini.getGlyphOrder())
+        mini.close()
+        return rel_path, source_glyphs, mini_glyphs, None
+    except Exception as e:
+        return rel_path, None, None, f"{type(e).__name__}: {e}"
+
+
+def file_key(rel_path, generator_key):
+    """원본 파일과 생성 방법이 같으면 같은 값"""
+    stat = os.stat(f"{SOURCE_FONTS_DIR}/{rel_path}")
+    return f"{stat.st_size}:{stat.st_mtime_ns}:{generator_key}"
+
+
+def generator_key(required):
+    """생성 방법 (남기는 코드포인트 규칙) 의 해시"""
+    key = hashlib.sha256()
+    key.update(repr(sorted(required)).encode())
+    key.update(repr(KEEP_RANGES.ranges()).encode())
+    key.update(f"{SMALL_RANGE}:{SAMPLE_COUNT}:{OTHER_SAMPLE_COUNT}".encode())
+    for func in (sample_codepoints, subset_font):
+        key.update(inspect.getsource(func).encode())
+    key.update(repr(RANGE_TABLE).encode())
+    return key.hexdigest()[:16]
+
+
+def list_source_files():
+    """SOURCE_FONTS_DIR 기준의 모든 파일 경로"""
+    paths = []
+    for root, _, files in os.walk(SOURCE_FONTS_DIR):
+        for name in files:
+            paths.append(os.path.relpath(os.path.join(root, name), SOURCE_FONTS_DIR))
+    return sorted(paths)
+
+
+def load_manifest():
+    path = f"{MINI_SOURCE_FONTS_DIR}/{MANIFEST}"
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    with open(f"{MINI_SOURCE_FONTS_DIR}/{MANIFEST}", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="파이프라인 개발용 축소 소스 폰트 생성",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="모든 파일을 다시 생성",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="병렬 프로세스 수 (기본: CPU 수)",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(SOURCE_FONTS_DIR):
+        print(f"❌ 오류: {SOURCE_FONTS_DIR} 디렉토리가 없습니다.")
+        return 1
+
+    required = referenced_codepoints()
+    gen_key = generator_key(required)
+    manifest = {} if args.force else load_manifest()
+    keys = {rel_path: file_key(rel_path, gen_key) for rel_path in list_source_files()}
+    pending = [
+        rel_path
+        for rel_path, key in keys.items()
+        if manifest.get(rel_path) != key
+        or not os.path.exists(f"{MINI_SOURCE_FONTS_DIR}/{rel_path}")
+    ]
+    if not pending:
+        print(f"✅ 축소 소스 폰트가 최신입니다 ({MINI_SOURCE_FONTS_DIR})")
+        return 0
+
+    print(f"🔧 축소 소스 폰트 생성: {len(pending)}/{len(keys)}개 파일 → {MINI_SOURCE_FONTS_DIR}")
+    os.makedirs(MINI_SOURCE_FONTS_DIR, exist_ok=True)
+    # 원본에서 지워진 파일은 기록에서도 뺀다
+    manifest = {rel_path: key for rel_path, key in manifest.items() if rel_path in keys}
+    error_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = [executor.submit(make_mini_file, rel_path, required) for rel_path in pending]
+        for future in futures:
+            rel_path, source_glyphs, mini_glyphs, error = future.result()
+            if error:
+                print(f"  ✗ {rel_path}: {error}")
+                error_count += 1
+                continue
+            manifest[rel_path] = keys[rel_path]
+            if source_glyphs is not None:
+                print(f"  ✓ {rel_path}: {source_glyphs:,} → {mini_glyphs:,} glyphs")
+    save_manifest(manifest)
+
+    if error_count > 0:
+        print(f"⚠️  {error_count}개 파일 처리 실패")
+        return 1
+    print("✅ 축소 소스 폰트 생성 완료")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!fontforge --lang=py -script
+
+# 調整済みグリフ (source/AdjustedGlyphs/*.sfd など) の変更を、
+# フルビルドせずにビルド済みフォントへ差し込む
+# どの SFD をどのフォントに差し込んだかは (variant, style, SFD) 毎に記録し、
+# 前回から変わったものだけを差し込む。
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import fontforge
+from fontTools import ttLib
+from fontTools.ttLib.tables import ttProgram
+
+import fontforge_script
+from fontforge_script import (
+    ADJUST_R,
+    BUILD_FONTS_DIR,
+    CONSOLE_STR,
+    ENG_FONT,
+    IDEOGRAPHIC_SPACE,
+    INVISIBLE_ZENKAKU_SPACE_STR,
+    NERD_FONTS_STR,
+    SOURCE_FONTS_DIR,
+    WIDTH_35_STR,
+    adjust_em,
+    adjust_width_35_eng,
+    down_scale_redundant_size_glyph,
+    make_box_drawing_full_width,
+    prepare_box_drawing_pack,
+    prepare_zenkaku_space_pack,
+    set_font_geometry,
+    transform_half_width,
+    visualize_zenkaku_space,
+)
+from fonttools_script import NEW_FONT_NAME
+
+# 調整済みグリフと、ビルドパイプライン上でそれを取り込む箇所の対応表
+# - side: ENG 側 (adjust_some_glyph) か JP 側 (visualize_zenkaku_space など) か
+# - applies: (style, options) に対してこのグリフが使われるかどうか
+#   (options["console"] はコマンドラインではなくビルド済みフォントから判定した値)
+ADJUSTED_GLYPH_RULES = [
+    {
+        "name": "ADJUST_R",
+        "source": ADJUST_R,
+        "side": "eng",
+        "applies": lambda style, opts: "Italic" not in style,
+    },
+    {
+        "name": "IDEOGRAPHIC_SPACE",
+        "source": IDEOGRAPHIC_SPACE,
+        "side": "jp",
+        "applies": lambda style, opts: not opts.get("hidden-zenkaku-space"),
+    },
+    {
+        "name": "FULL_WIDTH_BOX_DRAWINGS",
+        "source": "FullWidthBoxDrawings.sfd",
+        "side": "jp",
+        "applies": lambda style, opts: not opts.get("console"),
+    },
+]
+
+STAMP_FILE = f"{BUILD_FONTS_DIR}/.adjusted_glyphs.json"
+
+options = {}
+
+
+def main():
+    get_options()
+    if options.get("unknown-option"):
+        usage()
+        return 1
+
+    # fontforge_script の関数はモジュールの options を参照するので共有する
+    fontforge_script.options.update(options)
+
+    stamp = load_stamp()
+    # SFD を指定した場合は、記録に関わらずそれを使うフォントをすべてパッチする
+    requested = set(options["sfd"]) if options.get("sfd") else None
+    report_untracked_sources(requested if requested is not None else find_sources())
+
+    targets = find_target_fonts()
+    if not targets:
+        print(f"Error: no built fonts found for variant '{get_variant()}'")
+        return 1
+
+    patched_fonts = 0
+    for font_path, style in targets:
+        full_width, box_drawing_width = read_widths(font_path)
+        # Console かどうかはファイル名に現れないので、罫線の幅でフォントから判定する
+        console = box_drawing_width != full_width
+        if console != bool(options.get("console")):
+            print(
+                f"Note: {font_path} is a {'' if console else 'non-'}console font; "
+                "patching it as such"
+            )
+        font_options = dict(options, console=console)
+        variant = get_variant() + (CONSOLE_STR if console else "")
+        font_stamp = stamp.setdefault(variant, {}).setdefault(style, {})
+
+        style_rules = []
+        for rule in ADJUSTED_GLYPH_RULES:
+            path = source_path(rule, style)
+            if not rule["applies"](style, font_options) or not os.path.exists(path):
+                continue
+            if requested is not None:
+                if path in requested:
+                    style_rules.append(rule)
+            elif font_stamp.get(path) != file_hash(path):
+                style_rules.append(rule)
+        if not style_rules:
+            continue
+
+        codepoints = []
+        for rule in style_rules:
+            codepoints += read_sfd_codepoints(source_path(rule, style))
+        print(f"=== Patch {font_path} ({', '.join(r['name'] for r in style_rules)}) ===")
+        patch_path = build_patch_font(style, style_rules, full_width)
+        try:
+            patched = inject_glyphs(font_path, patch_path, codepoints)
+        finally:
+            os.remove(patch_path)
+        print(f"{patched} glyphs patched")
+        patched_fonts += 1
+
+        # 実際に書き込んだフォントの分だけ記録する
+        for rule in style_rules:
+            path = source_path(rule, style)
+            font_stamp[path] = file_hash(path)
+        save_stamp(stamp)
+
+    if patched_fonts == 0:
+        print("No adjusted glyph changes to patch")
+    return 0
+
+
+def usage():
+    print(
+        f"Usage: {sys.argv[0]} "
+        "[--35] [--console] [--nerd-font] [--hidden-zenkaku-space] "
+        "[--style STYLE]... [SFD ...]"
+    )
+
+
+def get_options():
+    """オプションを取得する (fontforge_script.py と同じバリエーション指定を使う)"""
+
+    global options
+
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg == "--hidden-zenkaku-space":
+            options["hidden-zenkaku-space"] = True
+        elif arg == "--35":
+            options["35"] = True
+        elif arg == "--console":
+            options["console"] = True
+        elif arg == "--nerd-font":
+            options["nerd-font"] = True
+        elif arg == "--style":
+            options.setdefault("style", []).append(next(args, ""))
+        elif arg.endswith(".sfd"):
+            options.setdefault("sfd", []).append(os.path.normpath(arg))
+        else:
+            options["unknown-option"] = True
+            return
+
+
+def get_variant():
+    """ビルド済みフォントのファイル名に含まれる修飾子 (Console は含まれない)"""
+    variant = WIDTH_35_STR if options.get("35") else ""
+    variant += INVISIBLE_ZENKAKU_SPACE_STR if options.get("hidden-zenkaku-space") else ""
+    variant += NERD_FONTS_STR if options.get("nerd-font") else ""
+    return variant.replace(CONSOLE_STR, "")
+
+
+def find_target_fonts():
+    """パッチ対象のビルド済みフォント (path, style) を返す"""
+    font_family = NEW_FONT_NAME.replace(" ", "")
+    prefix = f"{font_family}{get_variant()}-"
+    targets = []
+    for path in sorted(glob.glob(f"{BUILD_FONTS_DIR}/{prefix}*.ttf")):
+        style = os.path.basename(path)[len(prefix) : -len(".ttf")]
+        # "GLG-Mono-" の検索に "GLG-Mono35-" などが混ざらないよう、スタイル名に "-" を含むものは除く
+        if "-" in style:
+            continue
+        if options.get("style") and style not in options["style"]:
+            continue
+        targets.append((path, style))
+    return targets
+
+
+def source_path(rule, style):
+    return os.path.normpath(
+        f"{SOURCE_FONTS_DIR}/" + rule["source"].replace("{style}", style)
+    )
+
+
+def find_sources():
+    """調整済みグリフの候補となる SFD ファイルをすべて返す"""
+    paths = glob.glob(f"{SOURCE_FONTS_DIR}/AdjustedGlyphs/*.sfd")
+    paths += glob.glob(f"{SOURCE_FONTS_DIR}/*.sfd")
+    return {os.path.normpath(path) for path in paths}
+
+
+def expand_sources(rule):
+    """ルールが参照する SFD ファイルをすべて返す ({style} を展開)"""
+    pattern = f"{SOURCE_FONTS_DIR}/" + rule["source"].replace("{style}", "*")
+    return [os.path.normpath(p) for p in sorted(glob.glob(pattern))]
+
+
+def report_untracked_sources(paths):
+    """ビルドで参照されていない SFD を知らせる (例: 1-*.sfd, l-*.sfd)"""
+    tracked = set()
+    for rule in ADJUSTED_GLYPH_RULES:
+        tracked.update(expand_sources(rule))
+    for path in sorted(paths - tracked):
+        print(f"Skip {path}: not referenced by the build pipeline")
+
+
+def read_sfd_codepoints(path):
+    """SFD の Encoding 行からコードポイントを読み取る"""
+    codepoints = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        in_char = False
+        for line in f:
+            if line.startswith("StartChar:"):
+                in_char = True
+            elif in_char and line.startswith("Encoding:"):
+                # 形式: Encoding: <encoding> <unicode> <gid>
+                unicode = int(line.split()[2])
+                if unicode >= 0:
+                    codepoints.append(unicode)
+                in_char = False
+    return codepoints
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_stamp():
+    """パッチ済みの記録 {variant: {style: {sfd: ハッシュ}}} を読み込む"""
+    if not os.path.exists(STAMP_FILE):
+        return {}
+    with open(STAMP_FILE, encoding="utf-8") as f:
+        stamp = json.load(f)
+    # フォントを区別しない以前の形式 {sfd: ハッシュ} は使わない
+    if not all(isinstance(value, dict) for value in stamp.values()):
+        return {}
+    return stamp
+
+
+def save_stamp(stamp):
+    tmp_path = f"{STAMP_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, STAMP_FILE)
+
+
+def build_patch_font(style, rules, full_width):
+    """調整済みグリフだけを generate_font() と同じ幅変換に通したフォントを作る
+    full_width はビルド済みフォントの全角幅。
+    """
+    eng_rules = [r for r in rules if r["side"] == "eng"]
+    jp_rules = [r for r in rules if r["side"] == "jp"]
+
+    # ENG 側: 元の英語フォントを基準幅 (U+0030) と対象グリフ以外を消して使う
+    eng_font = fontforge.open(
+        SOURCE_FONTS_DIR + "/" + ENG_FONT.replace("{style}", style)
+    )
+    adjust_em(eng_font)
+    eng_font.selection.all()
+    eng_font.selection.select(("less", "unicode"), 0x0030)
+    for glyph in eng_font.selection.byGlyphs:
+        glyph.clear()
+    eng_font.selection.none()
+    for rule in eng_rules:
+        eng_font.mergeFonts(source_path(rule, style))
+
+    # JP 側: 全角幅はビルド済みフォントから取る
+    jp_font = fontforge.font()
+    jp_font.encoding = "UnicodeFull"
+    set_font_geometry(jp_font)
+    jp_font.createChar(0x3042).width = full_width
+    jp_font.createChar(0x3000).width = full_width
+
+    if eng_rules:
+        if options.get("35"):
+            adjust_width_35_eng(eng_font)
+        else:
+            empty_font = fontforge.font()
+            transform_half_width(empty_font, eng_font)
+            empty_font.close()
+            down_scale_redundant_size_glyph(eng_font)
+    for rule in jp_rules:
+        pack_path = f"{BUILD_FONTS_DIR}/tmp_pack_{os.getpid()}.ttf"
+        if rule["name"] == "IDEOGRAPHIC_SPACE":
+            prepare_zenkaku_space_pack(pack_path, full_width)
+            visualize_zenkaku_space(jp_font, pack_path)
+        elif rule["name"] == "FULL_WIDTH_BOX_DRAWINGS":
+            prepare_box_drawing_pack(pack_path, full_width)
+            make_box_drawing_full_width(eng_font, jp_font, pack_path)
+        if os.path.exists(pack_path):
+            os.remove(pack_path)
+
+    # 差し込み先では参照を解決できないので参照を解除しておく
+    jp_font.selection.all()
+    jp_font.unlinkReferences()
+    jp_font.selection.none()
+    eng_font.mergeFonts(jp_font)
+    jp_font.close()
+    set_font_geometry(eng_font)
+
+    patch_path = f"{BUILD_FONTS_DIR}/tmp_patch_{os.getpid()}.ttf"
+    eng_font.generate(patch_path)
+    eng_font.close()
+    return patch_path
+
+
+def read_widths(font_path):
+    """ビルド済みフォントの全角幅 (U+3042) と罫線 U+2500 の幅 (無ければ None)"""
+    font = ttLib.TTFont(font_path, lazy=True)
+    cmap = font.getBestCmap()
+    full_width = font["hmtx"][cmap[0x3042]][0]
+    box_drawing_width = font["hmtx"][cmap[0x2500]][0] if 0x2500 in cmap else None
+    font.close()
+    return full_width, box_drawing_width
+
+
+def inject_glyphs(font_path, patch_path, codepoints):
+    """パッチフォントのグリフをビルド済みフォントの同じコードポイントへ差し込む
+    差し替えたグリフのヒンティング命令は付け直さない (ttfautohint はフルビルドで行う)。
+    """
+    font = ttLib.TTFont(font_path)
+    patch = ttLib.TTFont(patch_path)
+    font_cmap = font.getBestCmap()
+    patch_cmap = patch.getBestCmap()
+    patch_glyf = patch["glyf"]
+
+    patched = 0
+    for unicode in codepoints:
+        if unicode not in patch_cmap:
+            continue
+        if unicode not in font_cmap:
+            print(f"Skip U+{unicode:04X}: not in {font_path}", file=sys.stderr)
+            continue
+        glyph = patch_glyf[patch_cmap[unicode]]
+        glyph.recalcBounds(patch_glyf)
+        if hasattr(glyph, "program"):
+            glyph.program = ttProgram.Program()
+            glyph.program.fromBytecode(b"")
+        glyph_name = font_cmap[unicode]
+        font["glyf"][glyph_name] = glyph
+        font["hmtx"][glyph_name] = (
+            patch["hmtx"][patch_cmap[unicode]][0],
+            getattr(glyph, "xMin", 0),
+        )
+        patched += 1
+
+    tmp_path = f"{font_path}.patch"
+    font.save(tmp_path)
+    font.close()
+    patch.close()
+    os.replace(tmp_path, font_path)
+    return patched
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+fontforge_script.py 와 fonttools_script.py 를 스타일 단위로 겹쳐서 실행하는 빌드 도구
+
+fontforge_script.py 를 하위 프로세스로 실행하면서 build 디렉토리를 감시하고, 스타일마다
+- fontforge_<name>-<style>-eng.ttf 가 생기면 바로 add_hinting (ttfautohint) 을 실행하고
+- 힌팅된 ENG 폰트와 -jp.ttf 가 모두 준비되면 merge_fonts, fix_font_tables 를 실행합니다.
+앞 스타일의 힌팅/결합이 뒤 스타일의 FontForge 처리와 겹치므로 전체 빌드 시간이 줄어듭니다.
+
+힌팅과 결합은 각각 정해진 수의 워커 프로세스에서 실행하고, 차례를 기다리는 스타일은
+파일 경로로만 대기열에 둡니다. 결합은 JP 폰트 전체를 메모리에 올리므로 기본 1개입니다.
+fontforge_script.py 는 파일을 다 쓴 뒤 이름을 바꾸므로 쓰는 도중의 파일은 보이지 않습니다.
+
+Usage:
+    python pipeline_build.py [--hint-jobs N] [--merge-jobs N] [FONTFORGE_OPTION ...]
+
+Options:
+    FONTFORGE_OPTION    fontforge_script.py 에 그대로 넘기는 옵션 (--35, --console 등)
+    --hint-jobs N       동시에 실행하는 힌팅 작업 수 (기본: 2)
+    --merge-jobs N      동시에 실행하는 결합 작업 수 (기본: 1)
+    --poll SECONDS      build 디렉토리를 확인하는 간격 (기본: 0.2)
+    --help              도움말 표시
+"""
+
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from fonttools_script import (
+    BUILD_FONTS_DIR,
+    FONT_NAME,
+    FONTFORGE_PREFIX,
+    add_hinting,
+    fix_font_tables,
+    merge_fonts,
+)
+
+
+def parse_fontforge_filename(path):
+    """중간 파일 이름에서 (variant, style, side) 를 구한다
+
+    예: fontforge_PlemolJP35Console-BoldItalic-eng.ttf → ("35Console", "BoldItalic", "eng")
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name, style, side = stem.split("-")
+    return name[len(f"{FONTFORGE_PREFIX}{FONT_NAME}") :], style, side
+
+
+def fontforge_path(variant, style, suffix):
+    return f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{FONT_NAME}{variant}-{style}-{suffix}.ttf"
+
+
+def find_new_files(seen, since):
+    """since 이후에 저장된 -eng.ttf / -jp.ttf 중 아직 처리하지 않은 파일"""
+    paths = []
+    for side in ("eng", "jp"):
+        pattern = f"{BUILD_FONTS_DIR}/{FONTFORGE_PREFIX}{FONT_NAME}*-{side}.ttf"
+        for path in sorted(glob.glob(pattern)):
+            if path in seen:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except FileNotFoundError:
+                continue
+            # --do-not-delete-build-dir 로 남아 있는 이전 빌드의 파일은 무시한다
+            if mtime >= since:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+def style_name(key):
+    variant, style = key
+    return f"{style} {variant}".rstrip()
+
+
+def hint_font(variant, style):
+    """워커 프로세스: ENG 폰트에 힌팅을 넣고 소요 시간을 반환"""
+    start = time.time()
+    eng_path = fontforge_path(variant, style, "eng")
+    add_hinting(eng_path, fontforge_path(variant, style, "eng-hinted"), variant, style)
+    return time.time() - start
+
+
+def merge_style(variant, style):
+    """워커 프로세스: 결합과 메타데이터 설정 후 중간 파일을 지우고 소요 시간을 반환"""
+    start = time.time()
+    font = merge_fonts(style, variant)
+    fix_font_tables(font, style, variant)
+    font.close()
+    for suffix in ("eng", "eng-hinted", "jp"):
+        os.remove(fontforge_path(variant, style, suffix))
+    return time.time() - start
+
+
+def run_pipeline(fontforge_args, hint_jobs, merge_jobs, poll):
+    """fontforge_script.py 와 힌팅/결합을 겹쳐서 실행하고 종료 코드를 반환"""
+    start = time.time()
+    process = subprocess.Popen([sys.executable, "fontforge_script.py", *fontforge_args])
+    fontforge_elapsed = None
+
+    seen = set()
+    jp_ready = set()
+    hinted = set()
+    merging = set()
+    merged = []
+    errors = []
+    futures = {}
+    with ProcessPoolExecutor(max_workers=hint_jobs) as hint_pool, ProcessPoolExecutor(
+        max_workers=merge_jobs
+    ) as merge_pool:
+        while True:
+            # 종료를 먼저 확인해야, 종료 직전에 저장된 파일도 이번 검색에서 찾는다
+            if fontforge_elapsed is None and process.poll() is not None:
+                fontforge_elapsed = time.time() - start
+            for path in find_new_files(seen, start):
+                variant, style, side = parse_fontforge_filename(path)
+                if side == "eng":
+                    future = hint_pool.submit(hint_font, variant, style)
+                    futures[future] = ("hint", (variant, style))
+                else:
+                    jp_ready.add((variant, style))
+            for key in sorted((hinted & jp_ready) - merging):
+                merging.add(key)
+                futures[merge_pool.submit(merge_style, *key)] = ("merge", key)
+
+            if fontforge_elapsed is not None and not futures:
+                break
+            if not futures:
+                time.sleep(poll)
+                continue
+            done, _ = wait(list(futures), timeout=poll, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = futures.pop(future)
+                name = style_name(key)
+                try:
+                    elapsed = future.result()
+                except Exception as e:
+                    errors.append(f"{kind} {name}: {type(e).__name__}: {e}")
+                    print(f"  ✗ {kind} {name}: {type(e).__name__}: {e}")
+                    continue
+                print(f"  ✓ {kind} {name} ({elapsed:.1f}s)")
+                if kind == "hint":
+                    hinted.add(key)
+                else:
+                    merged.append(key)
+
+    # 힌팅에 실패했거나 ENG/JP 중 한쪽 파일만 저장된 스타일
+    for key in sorted((hinted | jp_ready) - merging):
+        errors.append(f"merge {style_name(key)}: not merged")
+        print(f"  ✗ merge {style_name(key)}: 힌팅된 ENG 또는 JP 파일이 없음")
+
+    total = time.time() - start
+    print(
+        f"fontforge {fontforge_elapsed:.1f}s, total {total:.1f}s "
+        f"(fontforge 종료 후 {total - fontforge_elapsed:.1f}s), {len(merged)} fonts"
+    )
+    if process.returncode != 0:
+        print(f"❌ fontforge_script.py 실패 (exit {process.returncode})")
+        return 1
+    if errors:
+        print(f"❌ {len(errors)}개 작업 실패")
+        return 1
+    print("✅ 빌드 완료")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="FontForge 처리와 힌팅/결합을 스타일 단위로 겹쳐서 빌드",
+    )
+    parser.add_argument(
+        "--hint-jobs",
+        type=int,
+        default=2,
+        help="동시에 실행하는 힌팅 작업 수 (기본: 2)",
+    )
+    parser.add_argument(
+        "--merge-jobs",
+        type=int,
+        default=1,
+        help="동시에 실행하는 결합 작업 수 (기본: 1)",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=0.2,
+        help="build 디렉토리를 확인하는 간격 (기본: 0.2)",
+    )
+    args, fontforge_args = parser.parse_known_args()
+    return run_pipeline(
+        fontforge_args, max(1, args.hint_jobs), max(1, args.merge_jobs), args.poll
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+같은 소스로 두 번 빌드해서 결과 폰트가 바이트 단위로 같은지 확인하는 도구
+
+SOURCE_DATE_EPOCH 를 지정하면 fonttools_script.py 와 restamp_fonts.py 가
+FFTM 테이블 (FontForge 의 생성 시각) 을 지우고 head 의 작성/수정 시각을 고정합니다.
+이 도구는 같은 SOURCE_DATE_EPOCH 로 fontforge_script.py + fonttools_script.py 를
+두 번 실행하고, 완성된 폰트의 sha256 을 비교합니다.
+다른 폰트는 내용이 다른 테이블을 표시합니다.
+
+SOURCE_DATE_EPOCH 가 없으면 마지막 git 커밋 시각을 사용합니다.
+빌드마다 build 디렉토리를 지우고 다시 만듭니다.
+
+Usage:
+    python reproducible_check.py [FONTFORGE_OPTION ...]
+
+Options:
+    FONTFORGE_OPTION    fontforge_script.py 에 그대로 넘기는 옵션 (--console --minimal 등)
+    --help              도움말 표시
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from fontTools import ttLib
+
+from restamp_fonts import find_built_fonts
+from shard_build import file_hash
+
+
+def source_date_epoch():
+    """SOURCE_DATE_EPOCH (없으면 마지막 git 커밋 시각, git 이 없으면 현재 시각)"""
+    if os.environ.get("SOURCE_DATE_EPOCH"):
+        return os.environ["SOURCE_DATE_EPOCH"]
+    try:
+        result = subprocess.run(
+            ["git", "log", "-1", "--format=%ct"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return str(int(time.time()))
+
+
+def build(fontforge_args, env):
+    """build 디렉토리를 새로 만들어 빌드하고 {폰트 경로: sha256} 을 반환"""
+    start = time.time()
+    subprocess.run(
+        [sys.executable, "fontforge_script.py", *fontforge_args], env=env, check=True
+    )
+    subprocess.run([sys.executable, "fonttools_script.py"], env=env, check=True)
+    hashes = {path: file_hash(path) for path in find_built_fonts()}
+    print(f"  ✓ {len(hashes)} fonts ({time.time() - start:.1f}s)")
+    return hashes
+
+
+def differing_tables(path_a, path_b):
+    """두 폰트에서 내용이 다른 테이블 태그 목록"""
+    font_a = ttLib.TTFont(path_a, lazy=True)
+    font_b = ttLib.TTFont(path_b, lazy=True)
+    tags = sorted(set(font_a.reader.keys()) | set(font_b.reader.keys()))
+    differences = [
+        tag
+        for tag in tags
+        if tag not in font_a.reader
+        or tag not in font_b.reader
+        or font_a.reader[tag] != font_b.reader[tag]
+    ]
+    font_a.close()
+    font_b.close()
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="같은 소스로 두 번 빌드해서 결과 폰트가 바이트 단위로 같은지 확인",
+    )
+    _, fontforge_args = parser.parse_known_args()
+
+    env = dict(os.environ, SOURCE_DATE_EPOCH=source_date_epoch())
+    print(f"🔁 재현성 검사 (SOURCE_DATE_EPOCH={env['SOURCE_DATE_EPOCH']})")
+
+    print("1차 빌드")
+    first = build(fontforge_args, env)
+    if not first:
+        print("❌ 오류: 빌드된 폰트가 없습니다.")
+        return 1
+    # 2차 빌드가 build 디렉토리를 지우므로, 다른 경우의 테이블 비교용으로 복사해 둔다
+    with tempfile.TemporaryDirectory(prefix="reproducible-") as saved_dir:
+        for path in first:
+            saved_path = os.path.join(saved_dir, path)
+            os.makedirs(os.path.dirname(saved_path), exist_ok=True)
+            shutil.copyfile(path, saved_path)
+
+        print("2차 빌드")
+        second = build(fontforge_args, env)
+
+        mismatches = 0
+        for path in sorted(first.keys() | second.keys()):
+            if path not in first or path not in second:
+                print(f"  ✗ {path}: 한쪽 빌드에만 있음")
+                mismatches += 1
+            elif first[path] != second[path]:
+                tables = differing_tables(os.path.join(saved_dir, path), path)
+                print(f"  ✗ {path}: {', '.join(tables) or '테이블 배치'} 다름")
+                mismatches += 1
+
+    if mismatches:
+        print(f"❌ {mismatches}/{len(first)}개 폰트가 빌드마다 다릅니다")
+        return 1
+    print(f"✅ {len(first)}개 폰트 모두 같은 바이트")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+빌드된 폰트의 메타데이터만 다시 찍는 스크립트 (restamp)
+
+build.ini 의 VERSION 을 올리거나 이름 문자열을 고쳤을 때
+fontforge_script.py + fonttools_script.py 전체를 다시 돌리지 않고,
+완성된 폰트의 name, OS/2, post, head 테이블만 현재 build.ini 기준으로 다시 씁니다.
+폰트는 fontTools lazy 모드로 열기 때문에 glyf 는 다시 컴파일하지 않고 그대로 복사됩니다.
+SOURCE_DATE_EPOCH 가 지정되어 있으면 FFTM 테이블을 지우고 head 의 시각을 고정하므로,
+FontForge 로 저장된 Nerd Fonts 패치 결과도 같은 바이트로 만들 수 있습니다.
+
+Nerd Fonts 패치 결과 (variant 에 NF 포함) 는 font-patcher 가 정한 세로 메트릭,
+fsSelection (USE_TYPO_METRICS), 이름을 유지하고 버전과 제작사만 다시 씁니다.
+
+Usage:
+    python restamp_fonts.py [--jobs N] [FONT ...]
+
+Options:
+    FONT            대상 폰트 (기본: build/GLG-Mono*.ttf, build/nerd/*.ttf)
+    --jobs N        병렬 프로세스 수 (기본: CPU 수)
+    --help          도움말 표시
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from glob import glob
+
+from fontTools import ttLib
+
+from fonttools_script import (
+    BUILD_FONTS_DIR,
+    NERD_FONTS_STR,
+    NEW_FONT_NAME,
+    apply_meta_data,
+    build_meta_data,
+    get_font_revision,
+    make_reproducible,
+)
+
+
+def find_built_fonts():
+    """완성된 폰트 파일 목록 (중간 파일 fontforge_*, fonttools_* 는 제외)"""
+    font_family = NEW_FONT_NAME.replace(" ", "")
+    fonts = glob(f"{BUILD_FONTS_DIR}/{font_family}*.ttf")
+    fonts += glob(f"{BUILD_FONTS_DIR}/nerd/*.ttf")
+    return sorted(fonts)
+
+
+def parse_font_filename(font_path):
+    """파일 이름에서 (style, variant) 를 구한다
+
+    예: GLG-Mono35NF-BoldItalic.ttf → ("BoldItalic", "35NF")
+    """
+    font_family = NEW_FONT_NAME.replace(" ", "")
+    stem = os.path.splitext(os.path.basename(font_path))[0]
+    family_part, _, style = stem.rpartition("-")
+    if not family_part.startswith(font_family) or not style:
+        return None
+    return style, family_part[len(font_family) :]
+
+
+def restamp_font(font_path):
+    """폰트 하나의 name, OS/2, post, head 테이블을 다시 쓴다
+
+    Returns:
+        (font_path, error_msg)
+    """
+    parsed = parse_font_filename(font_path)
+    if parsed is None:
+        return (font_path, "Can not determine style/variant from file name")
+    style, variant = parsed
+
+    try:
+        # recalcBBoxes=False: head 저장 시 glyf 전체를 읽어 bbox 를 다시 계산하지 않도록
+        font = ttLib.TTFont(font_path, lazy=True, recalcBBoxes=False)
+        meta = build_meta_data(style, variant)
+        if NERD_FONTS_STR in variant:
+            apply_version_stamp(font, meta)
+        else:
+            # cap height, x height 는 지오메트리 값이므로 기존 OS/2 값을 유지한다
+            apply_meta_data(font, meta)
+        make_reproducible(font)
+        tmp_path = f"{font_path}.restamp"
+        font.save(tmp_path)
+        font.close()
+        os.replace(tmp_path, font_path)
+    except Exception as e:
+        return (font_path, f"Processing error: {e}")
+
+    return (font_path, None)
+
+
+def apply_version_stamp(font, meta):
+    """버전과 제작사만 다시 쓴다 (Nerd Fonts 패치 결과용)
+
+    font-patcher 는 패치 전 폰트 (예: GLG-Mono35) 의 세로 메트릭을 바탕으로
+    메트릭과 fsSelection, 이름을 다시 정하므로, build_meta_data 의 값으로 덮어쓰면
+    줄 높이와 이름이 바뀐다. 버전 문자열 (5) 과 고유 ID (3) 의 버전, 제작사 부분만 바꾼다.
+    """
+    name_table = font["name"]
+    os2 = font["OS/2"]
+    old_version = (name_table.getDebugName(5) or "").split(";")[0].strip()
+    old_vendor = os2.achVendID.strip(" \x00")
+
+    for record in name_table.names:
+        if record.nameID not in (3, 5):
+            continue
+        text = record.toUnicode()
+        if record.nameID == 5:
+            # font-patcher, ttfautohint 가 ";" 뒤에 덧붙인 정보는 유지한다
+            _, sep, rest = text.partition(";")
+            text = meta["version"] + sep + rest
+        else:
+            parts = text.split(";")
+            if old_version and parts[0] == old_version:
+                parts[0] = meta["version"]
+                if len(parts) > 2 and parts[1].strip() == old_vendor:
+                    parts[1] = meta["vendor"]
+            text = ";".join(parts)
+        record.string = text
+
+    os2.achVendID = meta["vendor"]
+    font["head"].fontRevision = get_font_revision(meta["version"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="빌드된 폰트의 메타데이터만 build.ini 기준으로 다시 찍기",
+    )
+    parser.add_argument(
+        "fonts",
+        nargs="*",
+        help="대상 폰트 (기본: build/GLG-Mono*.ttf, build/nerd/*.ttf)",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="병렬 프로세스 수 (기본: CPU 수)",
+    )
+    args = parser.parse_args()
+
+    fonts = args.fonts or find_built_fonts()
+    if not fonts:
+        print("❌ 오류: 대상 폰트가 없습니다. 먼저 빌드를 실행하세요.")
+        return 1
+
+    print(f"🔖 메타데이터 재기록: {len(fonts)}개 폰트")
+
+    error_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for font_path, error in executor.map(restamp_font, fonts):
+            if error:
+                print(f"  ✗ {font_path}: {error}")
+                error_count += 1
+            else:
+                print(f"  ✓ {font_path}")
+
+    if error_count > 0:
+        print(f"⚠️  {error_count}개 폰트 처리 실패")
+        return 1
+
+    print("✅ 메타데이터 재기록 완료")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
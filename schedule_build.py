@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+메모리 예산 안에서 스타일 작업을 병렬로 실행하는 빌드 도구
+
+shard_build.py 의 작업 목록 (base: 한 스타일의 FontForge 처리 + 힌팅/결합,
+nerd: Nerd Fonts 패치) 을 이 머신에서 최대 --jobs 개씩 동시에 실행합니다.
+작업 하나는 JP + KR + ENG + Hack (+ Nerd) 폰트를 모두 메모리에 올리므로, 실행 중인
+작업의 예상 메모리 합계가 --memory-budget 을 넘지 않을 때만 다음 작업을 시작합니다.
+
+- 예상 메모리: 이전 실행에서 측정한 그 작업의 최대 RSS (JOB_STATS).
+  기록이 없으면 같은 단계의 다른 작업 기록의 최대값에 여유분을 더하고, 그것도 없으면
+  그 단계의 첫 작업을 다른 작업 없이 단독으로 실행해서 측정합니다 (probe).
+- 실행 중인 작업은 프로세스 트리의 현재 RSS 합계를 주기적으로 확인해서,
+  예상보다 많이 쓰고 있으면 그 값으로 합계를 계산합니다.
+- 오래 걸리는 작업부터 시작합니다. base 작업은 같은 폰트의 nerd 작업까지의 예상 시간
+  (이전 실행 기록, 없으면 웨이트로 어림) 으로 순서를 정합니다.
+
+선택한 순서와 각 작업의 시작/종료 시각, 예상/측정 메모리는 화면과
+SHARD_DIR/logs/schedule.json 에 기록하고, 모든 작업이 끝나면 결과를 build/ 로 모읍니다.
+
+Usage:
+    python schedule_build.py [--jobs N] [--memory-budget MB] [--with-35] [--skip-nerd]
+
+Options:
+    --jobs N            동시에 실행하는 최대 작업 수 (기본: CPU 수)
+    --memory-budget MB  실행 중인 작업의 예상 메모리 합계 상한 (기본: 사용 가능한 메모리의 80%)
+    --with-35           GLG-Mono35 (3:5) 도 빌드
+    --skip-nerd         Nerd Fonts 패치 작업을 빼기
+    --shard-dir DIR     결과와 완료 기록을 두는 디렉토리 (기본: build-shards)
+    --poll SECONDS      작업 상태와 메모리를 확인하는 간격 (기본: 0.5)
+    --help              도움말 표시
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from fonttools_script import BUILD_FONTS_DIR
+from shard_build import DEFAULT_SHARD_DIR, gather, list_jobs
+
+JOB_STATS = "cache/job_stats.json"
+# 다른 작업의 기록으로 어림한 메모리에 곱하는 여유분
+ESTIMATE_MARGIN = 1.25
+# 기록이 없을 때의 상대적인 소요 시간 (굵은 웨이트일수록 윤곽선의 점이 많아 오래 걸린다)
+WEIGHT_COST = {
+    "Thin": 0.8,
+    "ExtraLight": 0.85,
+    "Light": 0.9,
+    "Text": 0.95,
+    "Regular": 1.0,
+    "Medium": 1.05,
+    "SemiBold": 1.1,
+    "Bold": 1.15,
+}
+STAGE_COST = {"base": 1.0, "nerd": 0.6}
+MB = 1024 * 1024
+
+
+def available_memory():
+    """/proc/meminfo 의 MemAvailable (바이트, 알 수 없으면 None)"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def tree_rss(pid):
+    """pid 와 그 자손 프로세스의 현재 RSS 합계 (바이트)"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm 에 공백이 있을 수 있으므로 마지막 ")" 뒤에서 ppid 를 읽는다
+                ppid = int(f.read().rpartition(")")[2].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending += children.get(current, [])
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def load_stats():
+    if not os.path.exists(JOB_STATS):
+        return {}
+    with open(JOB_STATS, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_stats(stats):
+    os.makedirs(os.path.dirname(JOB_STATS), exist_ok=True)
+    tmp_path = f"{JOB_STATS}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, JOB_STATS)
+
+
+def estimate_memory(job, stats):
+    """작업의 예상 메모리 (바이트, 어림할 기록이 없으면 None → probe)"""
+    job_id, _, _, stage, _ = job
+    if job_id in stats:
+        return stats[job_id]["peak_rss"]
+    same_stage = [s["peak_rss"] for key, s in stats.items() if key.startswith(f"{stage}-")]
+    if same_stage:
+        return int(max(same_stage) * ESTIMATE_MARGIN)
+    return None
+
+
+def relative_cost(stage, style):
+    weight = style.replace("Italic", "") or "Regular"
+    return STAGE_COST[stage] * WEIGHT_COST.get(weight, 1.0)
+
+
+def estimate_elapsed(job, stats):
+    """작업의 예상 소요 시간 (초)
+    기록이 없으면 다른 작업의 기록을 단계와 웨이트의 상대 비용으로 환산하고,
+    기록이 하나도 없으면 상대 비용 그대로 (순서를 정하는 데만 쓴다)
+    """
+    job_id, _, style, stage, _ = job
+    if job_id in stats:
+        return stats[job_id]["elapsed"]
+    # 작업 이름은 "단계-variant-스타일"
+    ratios = [
+        s["elapsed"] / relative_cost(key.partition("-")[0], key.rpartition("-")[2])
+        for key, s in stats.items()
+    ]
+    scale = sum(ratios) / len(ratios) if ratios else 1.0
+    return scale * relative_cost(stage, style)
+
+
+def plan_order(jobs, stats):
+    """오래 걸리는 것부터의 작업 순서 (base 는 같은 폰트의 nerd 까지 포함한 시간으로)"""
+    chain = {}
+    for job in jobs:
+        chain[job[4]] = chain.get(job[4], 0) + estimate_elapsed(job, stats)
+
+    def priority(job):
+        _, _, _, stage, font_index = job
+        own = chain[font_index] if stage == "base" else estimate_elapsed(job, stats)
+        return (-own, font_index)
+
+    return sorted(jobs, key=priority)
+
+
+def format_mb(value):
+    return "?" if value is None else f"{value / MB:,.0f} MB"
+
+
+def start_job(job, job_args, log_dir):
+    log = open(f"{log_dir}/{job[0]}.log", "w", encoding="utf-8")
+    command = [sys.executable, "shard_build.py", "--job", job[0], *job_args]
+    return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log
+
+
+def run_schedule(jobs, max_jobs, budget, job_args, shard_dir, poll):
+    """메모리 예산 안에서 작업을 실행하고 (작업 순서, [작업 기록], 실패한 폰트 수) 를 반환"""
+    stats = load_stats()
+    order = plan_order(jobs, stats)
+    print(f"🗓️  {len(order)} jobs, 최대 {max_jobs}개 동시, 메모리 예산 {format_mb(budget)}")
+    for job in order:
+        print(
+            f"  {job[0]:<32} 예상 {format_mb(estimate_memory(job, stats)):>10}, "
+            f"{estimate_elapsed(job, stats):.1f}{'s' if stats else ''}"
+            f"{'' if job[0] in stats else ' (어림)'}"
+        )
+
+    log_dir = f"{shard_dir}/logs"
+    os.makedirs(log_dir, exist_ok=True)
+    start = time.time()
+    pending = list(order)
+    done = set()
+    failed_fonts = set()
+    running = {}
+    records = []
+    while pending or running:
+        # base 가 끝난 폰트의 nerd 작업만 시작할 수 있다
+        for job in list(pending):
+            if job[4] in failed_fonts:
+                pending.remove(job)
+                records.append({"job": job[0], "status": "skipped"})
+                print(f"  ✗ {job[0]}: base 작업 실패로 건너뜀")
+
+        projected = sum(max(r["estimate"] or 0, r["rss"]) for r in running.values())
+        for job in list(pending):
+            if len(running) >= max_jobs:
+                break
+            if job[3] == "nerd" and f"base-{job[1]}-{job[2]}" not in done:
+                continue
+            estimate = estimate_memory(job, stats)
+            if estimate is None and running:
+                # 기록이 없는 단계는 단독으로 실행해서 측정한다 (실행 중인 작업이 끝나길 기다림)
+                break
+            elif running and projected + estimate > budget:
+                continue
+            if estimate is not None and estimate > budget:
+                print(f"  ⚠️  {job[0]}: 예상 {format_mb(estimate)} 가 예산보다 큽니다 (단독 실행)")
+            process, log = start_job(job, job_args, log_dir)
+            pending.remove(job)
+            running[process.pid] = {
+                "job": job,
+                "process": process,
+                "log": log,
+                "estimate": estimate,
+                "rss": 0,
+                "peak": 0,
+                "start": time.time() - start,
+            }
+            projected += estimate or 0
+            print(
+                f"  ▶ {time.time() - start:7.1f}s {job[0]} "
+                f"(예상 {format_mb(estimate)}{', probe' if estimate is None else ''}, "
+                f"합계 {format_mb(projected)}/{format_mb(budget)})"
+            )
+            if estimate is None:
+                break
+
+        time.sleep(poll)
+        for pid, r in list(running.items()):
+            r["rss"] = tree_rss(pid)
+            r["peak"] = max(r["peak"], r["rss"])
+            waited_pid, status, usage = os.wait4(pid, os.WNOHANG)
+            if waited_pid == 0:
+                continue
+            del running[pid]
+            r["log"].close()
+            job = r["job"]
+            end = time.time() - start
+            # wait4 의 ru_maxrss 는 가장 큰 프로세스 하나의 값이므로, 동시에 실행되는
+            # 자식 프로세스의 합계를 반영한 표본 값과 큰 쪽을 쓴다
+            peak = max(r["peak"], usage.ru_maxrss * 1024)
+            code = os.waitstatus_to_exitcode(status)
+            r["process"].returncode = code
+            records.append(
+                {
+                    "job": job[0],
+                    "status": "ok" if code == 0 else f"exit {code}",
+                    "start": round(r["start"], 1),
+                    "end": round(end, 1),
+                    "estimate": r["estimate"],
+                    "peak_rss": peak,
+                }
+            )
+            if code != 0:
+                failed_fonts.add(job[4])
+                print(f"  ✗ {end:7.1f}s {job[0]} (exit {code}, {log_dir}/{job[0]}.log)")
+                continue
+            done.add(job[0])
+            stats[job[0]] = {"peak_rss": peak, "elapsed": round(end - r["start"], 1)}
+            save_stats(stats)
+            print(
+                f"  ✓ {end:7.1f}s {job[0]} "
+                f"({end - r['start']:.1f}s, 최대 {format_mb(peak)}, 예상 {format_mb(r['estimate'])})"
+            )
+
+    print(f"jobs {time.time() - start:.1f}s")
+    return [job[0] for job in order], records, len(failed_fonts)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="메모리 예산 안에서 스타일 작업을 병렬로 빌드",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=os.cpu_count(),
+        help="동시에 실행하는 최대 작업 수 (기본: CPU 수)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help="실행 중인 작업의 예상 메모리 합계 상한 (기본: 사용 가능한 메모리의 80%%)",
+    )
+    parser.add_argument(
+        "--with-35",
+        action="store_true",
+        help="GLG-Mono35 (3:5) 도 빌드",
+    )
+    parser.add_argument(
+        "--skip-nerd",
+        action="store_true",
+        help="Nerd Fonts 패치 작업을 빼기",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=DEFAULT_SHARD_DIR,
+        help=f"결과와 완료 기록을 두는 디렉토리 (기본: {DEFAULT_SHARD_DIR})",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=0.5,
+        help="작업 상태와 메모리를 확인하는 간격 (기본: 0.5)",
+    )
+    args = parser.parse_args()
+
+    if args.memory_budget is not None:
+        budget = args.memory_budget * MB
+    elif available_memory() is not None:
+        budget = int(available_memory() * 0.8)
+    else:
+        print("❌ 오류: 사용 가능한 메모리를 알 수 없습니다. --memory-budget 을 지정하세요.")
+        return 1
+
+    jobs = list_jobs(args.with_35, args.skip_nerd)
+    job_args = ["--shard-dir", args.shard_dir]
+    job_args += ["--with-35"] if args.with_35 else []
+    job_args += ["--skip-nerd"] if args.skip_nerd else []
+    os.makedirs(BUILD_FONTS_DIR, exist_ok=True)
+    order, records, failed = run_schedule(
+        jobs, max(1, args.jobs), budget, job_args, args.shard_dir, args.poll
+    )
+    with open(f"{args.shard_dir}/logs/schedule.json", "w", encoding="utf-8") as f:
+        json.dump(
+            {"jobs": args.jobs, "memory_budget": budget, "order": order, "records": records},
+            f,
+            indent=1,
+        )
+        f.write("\n")
+    if failed:
+        print(f"❌ {failed}개 폰트 실패 ({args.shard_dir}/logs)")
+        return 1
+    return gather(jobs, args.shard_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+전체 릴리스 빌드를 여러 머신 (shard) 에 나눠서 실행하는 도구
+
+build_with_taskfile.sh --with-35 의 작업을 (variant, style, stage) 단위의 작업 목록으로
+만들고, --shard i/n 으로 지정한 몫만 실행합니다.
+- base: fontforge_script.py --style STYLE 로 한 스타일을 만들고 힌팅/결합까지 실행
+- nerd: base 의 결과에 Nerd Fonts 를 패치하고 한글 bearing 을 재조정
+
+작업은 목록 순서의 폰트 번호로 shard 에 나눕니다 (폰트 k → shard k % n + 1).
+nerd 작업은 같은 폰트의 base 결과를 쓰므로 base 와 같은 shard 에 두어,
+다른 머신의 작업을 기다리지 않습니다.
+
+각 작업은 결과 폰트를 SHARD_DIR/fonts/ 에 (build/ 와 같은 배치로) 저장하고,
+완료 기록 (출력 파일의 sha256 과 빌드 스크립트/설정의 해시) 을 SHARD_DIR/manifests/ 에 씁니다.
+SHARD_DIR 만 공유 파일 시스템에 있으면 되고, 중간 파일은 각 머신의 build/ 에 만듭니다.
+--gather 는 모든 작업의 완료 기록과 해시를 확인한 뒤 결과를 build/ 로 모읍니다.
+
+Usage:
+    python shard_build.py --shard I/N [--with-35] [--skip-nerd] [--shard-dir DIR]
+    python shard_build.py --gather [--with-35] [--skip-nerd] [--shard-dir DIR]
+    python shard_build.py --local N [--with-35] [--skip-nerd] [--shard-dir DIR]
+    python shard_build.py --job JOB_ID [--with-35] [--skip-nerd] [--shard-dir DIR]
+
+Options:
+    --shard I/N         N 개로 나눈 작업 중 I 번째 (1부터) 를 실행
+    --gather            완료 기록을 확인하고 결과를 build/ 로 모으기
+    --local N           N 개의 shard 를 이 머신에서 별도 프로세스로 실행한 뒤 --gather
+    --job JOB_ID        작업 하나만 실행 (schedule_build.py 에서 사용)
+    --list N            N 개로 나눴을 때의 작업 배정만 표시
+    --with-35           GLG-Mono35 (3:5) 도 빌드
+    --skip-nerd         Nerd Fonts 패치 작업을 빼기
+    --shard-dir DIR     결과와 완료 기록을 두는 공유 디렉토리 (기본: build-shards)
+    --help              도움말 표시
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from fonttools_script import BUILD_FONTS_DIR, CONSOLE_STR, NEW_FONT_NAME
+from pipeline_build import hint_font, merge_style
+
+DEFAULT_SHARD_DIR = "build-shards"
+
+# (variant, fontforge_script.py 옵션)
+VARIANTS = [
+    ("Console", ["--console"]),
+    ("35Console", ["--console", "--35"]),
+]
+
+# fontforge_script.py main() 과 같은 순서
+STYLES = [
+    "Regular",
+    "Bold",
+    "Thin",
+    "ExtraLight",
+    "Light",
+    "Text",
+    "Medium",
+    "SemiBold",
+    "Italic",
+    "BoldItalic",
+    "ThinItalic",
+    "ExtraLightItalic",
+    "LightItalic",
+    "TextItalic",
+    "MediumItalic",
+    "SemiBoldItalic",
+]
+
+# 결과에 영향을 주는 파일 (완료 기록이 같은 소스에서 나온 것인지 확인하는 데 사용)
+BUILD_INPUTS = [
+    "build.ini",
+    "fontforge_script.py",
+    "fonttools_script.py",
+    "stage_graph.py",
+    "disjoint_merge.py",
+    "dedup_outlines.py",
+    "unicode_ranges.py",
+    "fix_nf_korean_bearing.py",
+    "FontPatcher/font-patcher",
+]
+
+NERD_PATCHER_ARGS = [
+    "--complete",
+    "--careful",
+    "--mono",
+    "--no-progressbars",
+    "--quiet",
+    "--makegroups",
+    "0",
+    "--glyphcache",
+    "cache/nerd-glyphs",
+]
+
+
+def list_jobs(with_35, skip_nerd):
+    """[(job_id, variant, style, stage, font_index)] (모든 shard 에서 같은 순서)"""
+    stages = ["base"] if skip_nerd else ["base", "nerd"]
+    variants = VARIANTS if with_35 else VARIANTS[:1]
+    jobs = []
+    font_index = 0
+    for variant, _ in variants:
+        for style in STYLES:
+            for stage in stages:
+                jobs.append((f"{stage}-{variant}-{style}", variant, style, stage, font_index))
+            font_index += 1
+    return jobs
+
+
+def shard_jobs(jobs, index, count):
+    """index 번째 (1부터) shard 의 작업"""
+    return [job for job in jobs if job[4] % count == index - 1]
+
+
+def parse_shard(value):
+    """ "I/N" → (I, N) """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"I/N 형식이 아닙니다: {value}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"1 <= I <= N 이어야 합니다: {value}")
+    return index, count
+
+
+def base_font_name(variant, style):
+    """build/ 기준의 결과 폰트 경로 (fix_font_tables 와 같은 이름)"""
+    family = NEW_FONT_NAME.replace(" ", "")
+    return f"{family}{variant.replace(CONSOLE_STR, '')}-{style}.ttf"
+
+
+def nerd_font_name(variant, style):
+    """build/ 기준의 Nerd Fonts 패치 결과 경로 (--outputname "{family}NF-{style}")"""
+    family, _, _ = os.path.splitext(base_font_name(variant, style))[0].rpartition("-")
+    return f"nerd/{family}NF-{style}.ttf"
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key():
+    """빌드 스크립트와 설정의 해시 (다른 소스로 빌드한 shard 가 섞이지 않도록)"""
+    digest = hashlib.sha256()
+    for path in BUILD_INPUTS:
+        if os.path.exists(path):
+            digest.update(f"{path}:{file_hash(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def manifest_path(shard_dir, job_id):
+    return f"{shard_dir}/manifests/{job_id}.json"
+
+
+def write_atomic(src_path, dst_path):
+    """공유 디렉토리에 쓰는 도중의 파일이 보이지 않도록 복사한 뒤 이름을 바꾼다"""
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = f"{dst_path}.{platform.node()}.{os.getpid()}.tmp"
+    shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+
+
+def run_base_job(variant, style, options, shard_dir):
+    """fontforge_script.py 로 한 스타일을 만들고 힌팅/결합한 결과를 SHARD_DIR 에 저장"""
+    subprocess.run(
+        [
+            sys.executable,
+            "fontforge_script.py",
+            *options,
+            "--do-not-delete-build-dir",
+            "--style",
+            style,
+        ],
+        check=True,
+    )
+    hint_font(variant, style)
+    merge_style(variant, style)
+    name = base_font_name(variant, style)
+    write_atomic(f"{BUILD_FONTS_DIR}/{name}", f"{shard_dir}/fonts/{name}")
+    return [name]
+
+
+def run_nerd_job(variant, style, shard_dir):
+    """base 결과에 Nerd Fonts 를 패치하고 한글 bearing 을 재조정해 SHARD_DIR 에 저장"""
+    base_path = f"{shard_dir}/fonts/{base_font_name(variant, style)}"
+    # fix_nf_korean_bearing.py 는 디렉토리 단위로 처리하므로 작업마다 빈 디렉토리를 쓴다
+    work_dir = tempfile.mkdtemp(prefix="nerd-", dir=BUILD_FONTS_DIR)
+    try:
+        subprocess.run(
+            [
+                "fontforge",
+                "--script",
+                "FontPatcher/font-patcher",
+                *NERD_PATCHER_ARGS,
+                "--outputdir",
+                work_dir,
+                "--outputname",
+                "{family}NF-{style}",
+                base_path,
+            ],
+            check=True,
+        )
+        subprocess.run(
+            [sys.executable, "fix_nf_korean_bearing.py", "--dir", work_dir], check=True
+        )
+        name = nerd_font_name(variant, style)
+        write_atomic(f"{work_dir}/{os.path.basename(name)}", f"{shard_dir}/fonts/{name}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return [name]
+
+
+def write_manifest(shard_dir, job, outputs, elapsed, shard, key):
+    job_id, variant, style, stage, _ = job
+    manifest = {
+        "job": job_id,
+        "variant": variant,
+        "style": style,
+        "stage": stage,
+        "shard": shard,
+        "host": platform.node(),
+        "elapsed": round(elapsed, 1),
+        "source_key": key,
+        "outputs": {name: file_hash(f"{shard_dir}/fonts/{name}") for name in outputs},
+    }
+    path = manifest_path(shard_dir, job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{platform.node()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def run_job(job, shard_dir, shard, key):
+    """작업 하나를 실행하고 완료 기록을 쓴 뒤 소요 시간을 반환"""
+    job_id, variant, style, stage, _ = job
+    start = time.time()
+    if stage == "base":
+        outputs = run_base_job(variant, style, dict(VARIANTS)[variant], shard_dir)
+    else:
+        outputs = run_nerd_job(variant, style, shard_dir)
+    elapsed = time.time() - start
+    write_manifest(shard_dir, job, outputs, elapsed, shard, key)
+    return elapsed
+
+
+def run_shard(jobs, index, count, shard_dir):
+    """이 shard 의 작업을 순서대로 실행하고 종료 코드를 반환"""
+    key = source_key()
+    # 같은 머신의 shard 가 동시에 build/ 를 만들지 않도록 먼저 만든다
+    os.makedirs(BUILD_FONTS_DIR, exist_ok=True)
+    mine = shard_jobs(jobs, index, count)
+    print(f"🚀 shard {index}/{count}: {len(mine)}/{len(jobs)} jobs")
+    failed = set()
+    for job in mine:
+        job_id, _, _, _, font_index = job
+        if font_index in failed:
+            print(f"  ✗ {job_id}: base 작업 실패로 건너뜀")
+            continue
+        try:
+            elapsed = run_job(job, shard_dir, f"{index}/{count}", key)
+        except Exception as e:
+            failed.add(font_index)
+            print(f"  ✗ {job_id}: {type(e).__name__}: {e}")
+            continue
+        print(f"  ✓ {job_id} ({elapsed:.1f}s)")
+
+    if failed:
+        print(f"❌ shard {index}/{count}: {len(failed)}개 폰트 실패")
+        return 1
+    print(f"✅ shard {index}/{count} 완료")
+    return 0
+
+
+def run_single_job(jobs, job_id, shard_dir):
+    """작업 하나만 실행 (schedule_build.py 가 작업마다 별도 프로세스로 호출)"""
+    job = next((job for job in jobs if job[0] == job_id), None)
+    if job is None:
+        print(f"❌ 오류: 작업 목록에 없는 작업입니다: {job_id}")
+        return 1
+    try:
+        elapsed = run_job(job, shard_dir, "local", source_key())
+    except Exception as e:
+        print(f"  ✗ {job_id}: {type(e).__name__}: {e}")
+        return 1
+    print(f"  ✓ {job_id} ({elapsed:.1f}s)")
+    return 0
+
+
+def verify_manifests(jobs, shard_dir):
+    """모든 작업의 완료 기록과 출력 해시를 확인하고 (outputs, errors) 를 반환"""
+    key = source_key()
+    outputs = []
+    errors = []
+    for job_id, *_ in jobs:
+        path = manifest_path(shard_dir, job_id)
+        if not os.path.exists(path):
+            errors.append(f"{job_id}: 완료 기록 없음")
+            continue
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["source_key"] != key:
+            errors.append(f"{job_id}: 다른 소스로 빌드됨 (shard {manifest['shard']})")
+            continue
+        for name, digest in manifest["outputs"].items():
+            font_path = f"{shard_dir}/fonts/{name}"
+            if not os.path.exists(font_path):
+                errors.append(f"{job_id}: {name} 없음")
+            elif file_hash(font_path) != digest:
+                errors.append(f"{job_id}: {name} 해시 불일치")
+            else:
+                outputs.append(name)
+    return outputs, errors
+
+
+def gather(jobs, shard_dir):
+    """완료 기록을 모두 확인한 뒤에만 결과를 build/ 로 복사한다"""
+    outputs, errors = verify_manifests(jobs, shard_dir)
+    for error in errors:
+        print(f"  ✗ {error}")
+    if errors:
+        print(f"❌ {len(errors)}개 문제로 모으지 않음 ({shard_dir})")
+        return 1
+
+    for name in outputs:
+        write_atomic(f"{shard_dir}/fonts/{name}", f"{BUILD_FONTS_DIR}/{name}")
+    nerd_count = sum(1 for name in outputs if name.startswith("nerd/"))
+    print(
+        f"✅ {len(jobs)} jobs 확인, {len(outputs) - nerd_count} fonts + "
+        f"{nerd_count} Nerd Fonts → {BUILD_FONTS_DIR}/"
+    )
+    return 0
+
+
+def run_local(count, shard_args, jobs, shard_dir):
+    """count 개의 shard 를 별도 프로세스로 동시에 실행한 뒤 gather (로그는 SHARD_DIR/logs)"""
+    os.makedirs(f"{shard_dir}/logs", exist_ok=True)
+    os.makedirs(BUILD_FONTS_DIR, exist_ok=True)
+    start = time.time()
+    processes = []
+    for index in range(1, count + 1):
+        log = open(f"{shard_dir}/logs/shard-{index}.log", "w", encoding="utf-8")
+        command = [sys.executable, __file__, "--shard", f"{index}/{count}", *shard_args]
+        processes.append((index, subprocess.Popen(command, stdout=log, stderr=log), log))
+    status = 0
+    for index, process, log in processes:
+        process.wait()
+        log.close()
+        mark = "✓" if process.returncode == 0 else "✗"
+        print(f"  {mark} shard {index}/{count} (exit {process.returncode})")
+        status = status or process.returncode
+    print(f"shards {time.time() - start:.1f}s")
+    if status != 0:
+        print(f"❌ 실패한 shard 가 있습니다 ({shard_dir}/logs)")
+        return 1
+    return gather(jobs, shard_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="전체 릴리스 빌드를 여러 머신에 나눠서 실행",
+    )
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--shard",
+        type=parse_shard,
+        help="N 개로 나눈 작업 중 I 번째 (1부터) 를 실행 (예: 2/4)",
+    )
+    mode.add_argument(
+        "--gather",
+        action="store_true",
+        help="완료 기록을 확인하고 결과를 build/ 로 모으기",
+    )
+    mode.add_argument(
+        "--local",
+        type=int,
+        metavar="N",
+        help="N 개의 shard 를 이 머신에서 별도 프로세스로 실행한 뒤 모으기",
+    )
+    mode.add_argument(
+        "--job",
+        metavar="JOB_ID",
+        help="작업 하나만 실행 (예: base-Console-Bold, --list 의 이름)",
+    )
+    mode.add_argument(
+        "--list",
+        type=int,
+        metavar="N",
+        help="N 개로 나눴을 때의 작업 배정만 표시",
+    )
+    parser.add_argument(
+        "--with-35",
+        action="store_true",
+        help="GLG-Mono35 (3:5) 도 빌드",
+    )
+    parser.add_argument(
+        "--skip-nerd",
+        action="store_true",
+        help="Nerd Fonts 패치 작업을 빼기",
+    )
+    parser.add_argument(
+        "--shard-dir",
+        default=DEFAULT_SHARD_DIR,
+        help=f"결과와 완료 기록을 두는 공유 디렉토리 (기본: {DEFAULT_SHARD_DIR})",
+    )
+    args = parser.parse_args()
+
+    jobs = list_jobs(args.with_35, args.skip_nerd)
+    if args.list is not None:
+        for index in range(1, max(1, args.list) + 1):
+            mine = shard_jobs(jobs, index, max(1, args.list))
+            print(f"shard {index}/{args.list}: {len(mine)} jobs")
+            for job_id, *_ in mine:
+                print(f"  {job_id}")
+        return 0
+    if args.gather:
+        return gather(jobs, args.shard_dir)
+    if args.job is not None:
+        os.makedirs(BUILD_FONTS_DIR, exist_ok=True)
+        return run_single_job(jobs, args.job, args.shard_dir)
+    if args.local is not None:
+        shard_args = ["--shard-dir", args.shard_dir]
+        shard_args += ["--with-35"] if args.with_35 else []
+        shard_args += ["--skip-nerd"] if args.skip_nerd else []
+        return run_local(max(1, args.local), shard_args, jobs, args.shard_dir)
+    return run_shard(jobs, *args.shard, args.shard_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
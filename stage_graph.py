@@ -0,0 +1,230 @@
+# ビルドパイプラインをステージの並びとして宣言し、実行するエンジン
+#
+# 各ステージは名前、実装関数、入力 (フォントハンドルやスタイル名などの値の名前)、
+# 出力 (値の名前)、実行条件を持つ。エンジンは宣言順にステージを実行し、
+# ステージ毎の所要時間を記録する。
+#
+# isolated=True のステージはファイルだけを出力する独立したステージで、
+# ワーカープロセスで他のステージと並行して実行される。
+# 出力はソースファイル・実装・パラメータから作ったキーでキャッシュし、
+# 変更がなければ実行を省略する。スクリプトや設定が変わると、そのステージの
+# 古いキャッシュは新しい出力を作る前に削除する。
+#
+# side は ENG 側と JP 側を別々のプロセスで処理する場合に、どちらのプロセスで
+# 実行するステージかを表す (side_stages で取り出す)。
+
+import hashlib
+import inspect
+import os
+import re
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from build_trace import span
+
+# キャッシュキーに含めるスクリプトと設定のファイル (fontforge_script.cache_key でも使う)
+SCRIPT_FILES = ["fontforge_script.py", "unicode_ranges.py", "build.ini"]
+
+
+class Stage:
+    """パイプラインの 1 ステージ"""
+
+    def __init__(
+        self,
+        name,
+        func,
+        inputs=(),
+        outputs=(),
+        when=None,
+        isolated=False,
+        sources=None,
+        side=None,
+    ):
+        self.name = name
+        self.func = func
+        # func に位置引数として渡す値の名前
+        self.inputs = list(inputs)
+        # func の戻り値を格納する値の名前 (空ならフォントをその場で編集するステージ)
+        self.outputs = list(outputs)
+        # (options, values) を受け取り、実行するかどうかを返す
+        self.when = when
+        # isolated ステージの出力ファイルは func の第 1 引数として渡すパスに保存する
+        self.isolated = isolated
+        # values を受け取り、キャッシュキーに含めるソースファイルのリストを返す
+        self.sources = sources
+        # ENG 側と JP 側を別プロセスで処理する場合に実行する側 ("eng", "jp")
+        # None の場合は両方で実行する (もう一方のフォントは None になる)
+        self.side = side
+
+    def enabled(self, options, values):
+        return self.when is None or self.when(options, values)
+
+
+def option(name):
+    """オプションが指定されている場合に実行する"""
+    return lambda options, values: bool(options.get(name))
+
+
+def no_option(name):
+    """オプションが指定されていない場合に実行する"""
+    return lambda options, values: not options.get(name)
+
+
+def side_stages(stages, side):
+    """side ("eng" または "jp") のプロセスで実行するステージ (isolated ステージは除く)"""
+    return [s for s in stages if not s.isolated and s.side in (None, side)]
+
+
+def italic(options, values):
+    """斜体スタイルの場合に実行する"""
+    return "Italic" in values["merged_style"]
+
+
+def run_stages(stages, values, options, cache_dir, report=None):
+    """ステージを宣言順に実行し、最終的な値の辞書を返す
+
+    report を渡すと (ステージ名, 所要秒数, 状態) を追記する。
+    状態は "run", "cached", "skip" (実行条件を満たさない), "worker" のいずれか。
+    """
+    values = dict(values)
+    if report is None:
+        report = []
+    check_stages(stages, values, options)
+
+    # 独立したステージを先にワーカープロセスで開始しておく
+    isolated = [s for s in stages if s.isolated and s.enabled(options, values)]
+    pending = []
+    for stage in isolated:
+        output_path = cache_path(stage, values, cache_dir)
+        if os.path.exists(output_path):
+            values[stage.outputs[0]] = output_path
+            report.append((stage.name, 0.0, "cached"))
+        else:
+            pending.append((stage, output_path))
+
+    executor = None
+    if pending:
+        os.makedirs(cache_dir, exist_ok=True)
+        for _, output_path in pending:
+            prune_cache(output_path)
+        executor = ProcessPoolExecutor(max_workers=len(pending))
+    try:
+        for stage, output_path in pending:
+            args = [values[name] for name in stage.inputs]
+            values[stage.outputs[0]] = executor.submit(
+                run_isolated, stage.name, stage.func, output_path, args
+            )
+
+        for stage in stages:
+            if stage.isolated:
+                continue
+            if not stage.enabled(options, values):
+                report.append((stage.name, 0.0, "skip"))
+                continue
+            args = [resolve(values, name, report) for name in stage.inputs]
+            start = time.time()
+            with span(stage.name, style=values.get("merged_style"), side=stage.side):
+                result = stage.func(*args)
+            report.append((stage.name, time.time() - start, "run"))
+            store_outputs(stage, result, values)
+
+        # 出力が使われなかった isolated ステージも完了を待ち、エラーがあれば報告する
+        for stage, _ in pending:
+            resolve(values, stage.outputs[0], report)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return values
+
+
+def check_stages(stages, values, options):
+    """各ステージの入力が、初期値か先行ステージの出力で与えられることを確認する"""
+    available = set(values)
+    for stage in stages:
+        if not stage.enabled(options, values):
+            continue
+        missing = [name for name in stage.inputs if name not in available]
+        if missing:
+            raise ValueError(f"stage '{stage.name}' has no input: {', '.join(missing)}")
+        if stage.isolated and len(stage.outputs) != 1:
+            raise ValueError(f"isolated stage '{stage.name}' must have one output")
+        available.update(stage.outputs)
+
+
+def resolve(values, name, report):
+    """値を取り出す (ワーカープロセスで実行中の場合は完了を待つ)"""
+    value = values[name]
+    if isinstance(value, Future):
+        output_path, elapsed, stage_name = value.result()
+        report.append((stage_name, elapsed, "worker"))
+        values[name] = output_path
+        value = output_path
+    return value
+
+
+def store_outputs(stage, result, values):
+    if len(stage.outputs) == 1:
+        values[stage.outputs[0]] = result
+    elif stage.outputs:
+        for name, value in zip(stage.outputs, result):
+            values[name] = value
+
+
+def run_isolated(name, func, output_path, args):
+    """ワーカープロセスで isolated ステージを実行する"""
+    start = time.time()
+    # 途中で失敗しても壊れたキャッシュが残らないように一時ファイルに保存する
+    tmp_path = f"{output_path}.{os.getpid()}.tmp{os.path.splitext(output_path)[1]}"
+    with span(name):
+        func(tmp_path, *args)
+    os.replace(tmp_path, output_path)
+    return output_path, time.time() - start, name
+
+
+def cache_path(stage, values, cache_dir):
+    """isolated ステージの出力パス (入力が変わるとファイル名が変わる)
+
+    ファイル名は "ステージ名-スクリプトのキー-入力のキー.ttf" で、スクリプトのキーは
+    SCRIPT_FILES の内容と実装関数、入力のキーは入力の値とソースファイルから作る。
+    """
+    script_key = hashlib.sha256()
+    for path in SCRIPT_FILES:
+        with open(path, "rb") as f:
+            script_key.update(f.read())
+    script_key.update(inspect.getsource(stage.func).encode())
+    input_key = hashlib.sha256()
+    for name in stage.inputs:
+        input_key.update(f"{name}={values[name]!r}".encode())
+    for path in stage.sources(values) if stage.sources else []:
+        stat = os.stat(path)
+        input_key.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return (
+        f"{cache_dir}/{stage.name}-{script_key.hexdigest()[:16]}"
+        f"-{input_key.hexdigest()[:16]}.ttf"
+    )
+
+
+def prune_cache(output_path):
+    """output_path と同じステージで、スクリプトのキーが異なるキャッシュを削除する
+
+    入力のキーだけが異なるもの (他のスタイルの出力など) は残す。
+    """
+    cache_dir, filename = os.path.split(output_path)
+    stage_name, script_key, _ = filename[: -len(".ttf")].rsplit("-", 2)
+    pattern = re.compile(
+        rf"{re.escape(stage_name)}-(?:([0-9a-f]{{16}})-)?[0-9a-f]{{16}}\.ttf"
+    )
+    for entry in os.listdir(cache_dir):
+        match = pattern.fullmatch(entry)
+        if match and match.group(1) != script_key:
+            os.remove(f"{cache_dir}/{entry}")
+
+
+def print_report(title, report):
+    """ステージ毎の所要時間を表示する"""
+    print(f"--- stage cost ({title}) ---")
+    for name, elapsed, status in report:
+        print(f"  {name:<40} {elapsed:7.2f}s  {status}")
+    total = sum(elapsed for _, elapsed, status in report if status == "run")
+    print(f"  {'total (main process)':<40} {total:7.2f}s")
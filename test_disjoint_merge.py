@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+disjoint_merge.merge_disjoint_fonts 가 fontTools.merge.Merger 와 같은 결과를 내는지 확인
+
+FontBuilder 로 만든 작은 ENG/JP 폰트를 두 방법으로 결합해서 비교합니다.
+
+Usage:
+    python -m pytest test_disjoint_merge.py
+"""
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from disjoint_merge import merge_disjoint_fonts, merge_fonts_with_merger
+
+
+def build_font(path, family, cmap, lsb_flag=True):
+    """cmap ({코드포인트: 글리프 이름}) 의 글리프를 사각형으로 가진 폰트를 저장
+
+    lsb_flag=False 이면 lsb 가 xMin 과 같아도 head.flags 의 bit 1 을 끈다
+    (FontForge 가 생성한 폰트처럼)
+    """
+    glyph_order = [".notdef"] + sorted(set(cmap.values()))
+    glyphs = {}
+    for name in glyph_order:
+        pen = TTGlyphPen(None)
+        pen.moveTo((50, 0))
+        pen.lineTo((50, 700))
+        pen.lineTo((450, 700))
+        pen.lineTo((450, 0))
+        pen.closePath()
+        glyphs[name] = pen.glyph()
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap(cmap)
+    builder.setupGlyf(glyphs)
+    builder.setupHorizontalMetrics({name: (500, 50) for name in glyph_order})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": family, "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    if not lsb_flag:
+        builder.font["head"].flags &= ~0x2
+        builder.font.recalcBBoxes = False
+    builder.save(path)
+
+
+def test_colliding_glyph_names(tmp_path):
+    """ENG 과 같은 이름의 JP 글리프는 Merger 와 같이 "name.1" 로 매핑된다"""
+    eng_path = str(tmp_path / "eng.ttf")
+    jp_path = str(tmp_path / "jp.ttf")
+    build_font(eng_path, "ENG", {0x0030: "zero"})
+    build_font(jp_path, "JP", {0xAC00: "zero"})
+
+    disjoint = merge_disjoint_fonts(eng_path, jp_path)
+    merger = merge_fonts_with_merger(eng_path, jp_path)
+
+    assert disjoint["cmap"].getBestCmap() == merger["cmap"].getBestCmap()
+    assert disjoint["cmap"].getBestCmap()[0xAC00] == "zero.1"
+    assert disjoint.getGlyphOrder() == merger.getGlyphOrder()
+
+
+def saved_head_flags(font, path):
+    """저장한 폰트의 head.flags (Merger 의 결과는 저장할 때 다시 계산된다)"""
+    font.save(path)
+    return TTFont(path)["head"].flags
+
+
+def test_head_flags_lsb_bit(tmp_path):
+    """head.flags 의 bit 1 (lsb 가 xMin) 이 Merger 의 결과와 같다"""
+    for lsb_flag in (True, False):
+        eng_path = str(tmp_path / f"eng-{lsb_flag}.ttf")
+        jp_path = str(tmp_path / f"jp-{lsb_flag}.ttf")
+        build_font(eng_path, "ENG", {0x0030: "zero"}, lsb_flag)
+        build_font(jp_path, "JP", {0xAC00: "ga"}, lsb_flag)
+
+        disjoint = merge_disjoint_fonts(eng_path, jp_path)
+        merger = merge_fonts_with_merger(eng_path, jp_path)
+
+        assert saved_head_flags(
+            disjoint, str(tmp_path / "disjoint.ttf")
+        ) == saved_head_flags(merger, str(tmp_path / "merger.ttf"))
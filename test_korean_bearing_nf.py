@@ -9,9 +9,14 @@ Nerd Fonts 병합 후에도 bearing이 올바르게 유지되는지 확인
 import fontforge
 import sys
 
-def check_bearing(font_path, font_label):
-    """폰트의 한글 bearing 확인"""
-    font = fontforge.open(font_path)
+def check_bearing(font_path, font_label, font=None):
+    """폰트의 한글 bearing 확인
+
+    font 를 넘기면 (font_server.py 가 열어 둔 폰트) 열거나 닫지 않고 그대로 사용
+    """
+    opened = font is None
+    if opened:
+        font = fontforge.open(font_path)
     target_width = font[0x3042].width  # 전각 폭 (히라가나 'あ')
 
     print(f"\n{'='*60}")
@@ -64,25 +69,12 @@ def check_bearing(font_path, font_label):
             'diff': bearing_diff
         })
 
-    font.close()
+    if opened:
+        font.close()
     return results
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python test_korean_bearing_nf.py <font1> <font2>")
-        print("Example: python test_korean_bearing_nf.py build/GLG-MonoConsole-Regular.ttf build/GLG-MonoConsoleNF-Regular.ttf")
-        sys.exit(1)
-
-    font1_path = sys.argv[1]
-    font2_path = sys.argv[2]
-
-    print("\n" + "="*70)
-    print("Nerd Fonts 빌드 한글 Bearing 검증")
-    print("="*70)
-
-    results1 = check_bearing(font1_path, "Non-NF (기본)")
-    results2 = check_bearing(font2_path, "NF (Nerd Fonts)")
-
+def compare_bearing(results1, results2):
+    """두 폰트의 bearing 비교 결과를 출력하고, 모두 일치하면 True"""
     print(f"\n{'='*70}")
     print("비교 결과")
     print(f"{'='*70}")
@@ -107,8 +99,25 @@ def main():
         print("✗ 일부 글리프에서 bearing 차이가 발견되었습니다.")
         print("  fix_korean_bearing_after_merge() 함수를 확인하세요.")
     print(f"{'='*70}\n")
+    return all_match
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python test_korean_bearing_nf.py <font1> <font2>")
+        print("Example: python test_korean_bearing_nf.py build/GLG-MonoConsole-Regular.ttf build/GLG-MonoConsoleNF-Regular.ttf")
+        sys.exit(1)
+
+    font1_path = sys.argv[1]
+    font2_path = sys.argv[2]
+
+    print("\n" + "="*70)
+    print("Nerd Fonts 빌드 한글 Bearing 검증")
+    print("="*70)
+
+    results1 = check_bearing(font1_path, "Non-NF (기본)")
+    results2 = check_bearing(font2_path, "NF (Nerd Fonts)")
 
-    return 0 if all_match else 1
+    return 0 if compare_bearing(results1, results2) else 1
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+restamp_fonts.restamp_font 가 Nerd Fonts 패치 결과의 메트릭과 이름을 유지하는지 확인
+
+Usage:
+    python -m pytest test_restamp_fonts.py
+"""
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from fonttools_script import VENDER_NAME, VERSION, get_font_revision
+from restamp_fonts import restamp_font
+
+# font-patcher 가 GLG-Mono35 에서 만든 폰트처럼 1:2 가 아닌 세로 메트릭
+ASCENT = 1010
+DESCENT = 285
+USE_TYPO_METRICS = 1 << 7
+
+
+def build_patched_font(path):
+    """font-patcher 가 저장한 것과 같은 메트릭, fsSelection, 이름을 가진 폰트를 저장"""
+    pen = TTGlyphPen(None)
+    pen.moveTo((50, 0))
+    pen.lineTo((50, 700))
+    pen.lineTo((450, 700))
+    pen.lineTo((450, 0))
+    pen.closePath()
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder([".notdef", "zero"])
+    builder.setupCharacterMap({0x0030: "zero"})
+    builder.setupGlyf({".notdef": pen.glyph(), "zero": pen.glyph()})
+    builder.setupHorizontalMetrics({".notdef": (1000, 50), "zero": (1000, 50)})
+    builder.setupHorizontalHeader(ascent=ASCENT, descent=-DESCENT)
+    builder.setupNameTable(
+        {
+            "familyName": "GLG-Mono35 Nerd Font",
+            "styleName": "Regular",
+            "uniqueFontIdentifier": "v0.9.0;OLD ;GLG-Mono35NerdFont-Regular",
+            "version": "v0.9.0;Nerd Fonts 3.2.1",
+        }
+    )
+    builder.setupOS2(
+        version=4,
+        achVendID="OLD ",
+        usWinAscent=ASCENT,
+        usWinDescent=DESCENT,
+        sTypoAscender=ASCENT,
+        sTypoDescender=-DESCENT,
+        sTypoLineGap=0,
+        fsSelection=(1 << 6) | USE_TYPO_METRICS,
+    )
+    builder.setupPost()
+    builder.save(path)
+
+
+def test_restamp_keeps_nerd_font_metrics(tmp_path):
+    """35NF 폰트는 세로 메트릭, fsSelection, 이름을 유지하고 버전과 제작사만 바뀐다"""
+    path = str(tmp_path / "GLG-Mono35NF-Regular.ttf")
+    build_patched_font(path)
+    before = TTFont(path)
+
+    assert restamp_font(path) == (path, None)
+
+    after = TTFont(path)
+    for attr in ("usWinAscent", "usWinDescent", "sTypoAscender", "sTypoDescender"):
+        assert getattr(after["OS/2"], attr) == getattr(before["OS/2"], attr)
+    assert after["OS/2"].fsSelection == before["OS/2"].fsSelection
+    assert (after["hhea"].ascent, after["hhea"].descent) == (ASCENT, -DESCENT)
+    for name_id in (1, 2, 4, 6):
+        assert after["name"].getDebugName(name_id) == before["name"].getDebugName(
+            name_id
+        )
+
+    assert after["name"].getDebugName(5) == f"{VERSION};Nerd Fonts 3.2.1"
+    assert (
+        after["name"].getDebugName(3)
+        == f"{VERSION};{VENDER_NAME};GLG-Mono35NerdFont-Regular"
+    )
+    assert after["OS/2"].achVendID.strip(" \x00") == VENDER_NAME
+    assert after["head"].fontRevision == get_font_revision(VERSION)
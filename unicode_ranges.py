@@ -0,0 +1,232 @@
+# グリフ処理の規則で使うコードポイント範囲の集合
+#
+# 範囲は RANGE_TABLE に名前付きでまとめて定義し、RangeSet にコンパイルして使う。
+# RangeSet はソート済みの区間の境界を持ち、bisect で O(log n) の所属判定を行う。
+# FontForge の選択にはすべての区間を 1 回の selection.select() で適用できる。
+#
+# python unicode_ranges.py [EastAsianWidth.txt]
+#   名前付き範囲の一覧を表示する。EastAsianWidth.txt を渡すと、
+#   "eaaw_half" のうち East Asian Width が A (Ambiguous) でないコードポイントを報告する。
+
+import sys
+from bisect import bisect_right
+
+
+class RangeSet:
+    """閉区間 [start, end] の集合"""
+
+    def __init__(self, ranges=()):
+        # 区間をソートし、重なりや隣接する区間を結合する
+        merged = []
+        for start, end in sorted(ranges):
+            if start > end:
+                raise ValueError(f"invalid range: U+{start:04X}..U+{end:04X}")
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+    def __contains__(self, codepoint):
+        i = bisect_right(self.starts, codepoint) - 1
+        return i >= 0 and codepoint <= self.ends[i]
+
+    def __iter__(self):
+        """集合に含まれるコードポイントを昇順に返す"""
+        for start, end in self.ranges():
+            yield from range(start, end + 1)
+
+    def __len__(self):
+        return sum(end - start + 1 for start, end in self.ranges())
+
+    def __or__(self, other):
+        return RangeSet(self.ranges() + other.ranges())
+
+    def __sub__(self, other):
+        ranges = []
+        for start, end in self.ranges():
+            for other_start, other_end in other.ranges():
+                if other_end < start or end < other_start:
+                    continue
+                if start < other_start:
+                    ranges.append((start, other_start - 1))
+                start = other_end + 1
+                if start > end:
+                    break
+            if start <= end:
+                ranges.append((start, end))
+        return RangeSet(ranges)
+
+    def ranges(self):
+        return list(zip(self.starts, self.ends))
+
+    def select(self, font, more=False, less=False, by_unicode=True):
+        """font の選択に集合を適用する (1 回の selection.select() 呼び出し)
+
+        by_unicode=False の場合はコードポイントではなくエンコーディング位置として選択する。
+        """
+        if not self.starts:
+            if not (more or less):
+                font.selection.none()
+            return
+        flags = ["ranges"]
+        if by_unicode:
+            flags.append("unicode")
+        if more:
+            flags.append("more")
+        elif less:
+            flags.append("less")
+        bounds = [bound for start_end in self.ranges() for bound in start_end]
+        font.selection.select(tuple(flags), *bounds)
+
+
+def codepoints(*items):
+    """コードポイントと (start, end) の混在したリストから RangeSet を作る"""
+    return RangeSet(
+        item if isinstance(item, tuple) else (item, item) for item in items
+    )
+
+
+# 名前付きの範囲 (値はコードポイントか (start, end) の閉区間)
+RANGE_TABLE = {
+    # ハングル音節 (가-힣)
+    "hangul_syllables": [(0xAC00, 0xD7A3)],
+    # ハングル互換字母 (ㄱ-ㆎ)
+    "hangul_compatibility_jamo": [(0x3131, 0x318E)],
+    # ハングル字母拡張-A, 拡張-B
+    "hangul_jamo_extended": [(0xA960, 0xA97F), (0xD7B0, 0xD7FF)],
+    # 罫線
+    "box_drawing": [(0x2500, 0x257F)],
+    # SHADE グリフ
+    "shade": [(0x2591, 0x2593)],
+    # Powerline 系のグリフ
+    "powerline": [(0xE0B0, 0xE0D4)],
+    # latin 系のグリフ
+    "latin": [(0x0020, 0x02AF)],
+    # 全角幅にする特定のアルファベット関連文字
+    "full_width_latin": [(0x00C0, 0x0192)],
+    # 日本語フォント側から削除し、IBM Plex Mono を使う LATIN 系グリフ
+    "jp_latin_replaced": [(0x00C0, 0x00D6), (0x00D8, 0x00F6), (0x00F8, 0x0259)],
+    # 半角化する East Asian Ambiguous Width 文字
+    # ref: https://www.unicode.org/Public/15.1.0/ucd/EastAsianWidth.txt
+    "eaaw_half": [
+        0x203B,  # REFERENCE MARK
+        0x2103,
+        0x2109,
+        0x2121,
+        0x212B,
+        (0x2160, 0x216B),
+        (0x2170, 0x217B),
+        0x221F,
+        0x222E,
+        (0x226A, 0x226B),
+        0x22A5,
+        0x22BF,
+        0x2312,
+        (0x2460, 0x2490),
+        (0x249C, 0x24B5),
+        (0x2605, 0x2606),
+        0x260E,
+        0x261C,
+        0x261E,
+        0x2640,
+        0x2642,
+        (0x2660, 0x2665),
+        0x2667,
+        0x266A,
+        0x266D,
+        0x266F,
+        0x1F100,
+    ],
+    # Console 版以外では英語フォントから削除し、日本語フォントの全角グリフを使う文字
+    "not_console": [
+        # 記号
+        (0x00A1, 0x00A5),
+        (0x00A7, 0x00AA),
+        (0x00AC, 0x00B8),
+        0x00D7,
+        0x00F7,
+        0x0401,
+        (0x0410, 0x044F),
+        0x0451,
+        (0x2010, 0x2026),
+        0x2030,
+        (0x2032, 0x2033),
+        0x203B,
+        0x203E,
+        (0x2113, 0x2122),
+        # 矢印
+        (0x2190, 0x2193),
+        (0x21C4, 0x21C6),
+        0x21D2,
+        0x21D4,
+        (0x21E6, 0x21E9),
+        0x21F5,
+        # 数学記号
+        0x2200,
+        0x2202,
+        0x2211,
+        0x2219,
+        0x221A,
+        (0x221D, 0x2220),
+        (0x2227, 0x222E),
+        (0x2234, 0x2235),
+        0x2252,
+        (0x2260, 0x2261),
+        (0x2266, 0x2267),
+        (0x226A, 0x226B),
+        (0x2282, 0x2283),
+        (0x2286, 0x2287),
+    ],
+    # 各エディタの可視化文字対策で IBM Plex Mono ベースのままにする文字
+    "editor_visible_marks": [0x00B7, 0x2022, 0x2024, 0x2219, 0x25D8, 0x25E6],
+}
+
+_compiled = {}
+
+
+def named_set(*names):
+    """RANGE_TABLE の名前 (複数なら和集合) の RangeSet を返す"""
+    key = tuple(names)
+    if key not in _compiled:
+        result = RangeSet()
+        for name in names:
+            result = result | codepoints(*RANGE_TABLE[name])
+        _compiled[key] = result
+    return _compiled[key]
+
+
+def load_east_asian_width(path):
+    """EastAsianWidth.txt を読み込み、{幅の分類: RangeSet} を返す
+
+    行の形式: "2160..216B;A  # ..." または "203B;A  # ..."
+    """
+    ranges = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            code, width = (part.strip() for part in line.split(";"))
+            start, _, end = code.partition("..")
+            ranges.setdefault(width, []).append((int(start, 16), int(end or start, 16)))
+    return {width: RangeSet(r) for width, r in ranges.items()}
+
+
+def main():
+    for name in RANGE_TABLE:
+        range_set = named_set(name)
+        print(f"{name:<28} {len(range_set.ranges()):4} ranges {len(range_set):6} codepoints")
+
+    if len(sys.argv) > 1:
+        ambiguous = load_east_asian_width(sys.argv[1]).get("A", RangeSet())
+        not_ambiguous = [cp for cp in named_set("eaaw_half") if cp not in ambiguous]
+        for cp in not_ambiguous:
+            print(f"eaaw_half: U+{cp:04X} is not East Asian Ambiguous")
+        return 1 if not_ambiguous else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
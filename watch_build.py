@@ -0,0 +1,303 @@
+#!fontforge --lang=py -script
+
+# グリフ開発用のウォッチモード
+# ソースや設定の変更を監視し、影響のあるステージだけを選んだスタイルで再実行する。
+# FontForge とスクリプトを読み込んだ状態のプロセスを常駐させ、
+# ソースフォントの下準備 (prepare_source_fonts) の結果をスナップショットとして使い回す。
+
+import configparser
+import glob
+import hashlib
+import importlib
+import os
+import sys
+import time
+import traceback
+
+import fontforge
+
+import dedup_outlines
+import disjoint_merge
+import fontforge_script
+import fonttools_script
+import restamp_fonts
+import unicode_ranges
+from stage_graph import SCRIPT_FILES, print_report
+
+SETTINGS_FILE = "build.ini"
+HINTING_DIR = "hinting_post_process"
+SCRIPTS = [
+    "fontforge_script.py",
+    "fonttools_script.py",
+    "disjoint_merge.py",
+    "dedup_outlines.py",
+    "unicode_ranges.py",
+]
+
+# build.ini のうち、変更されても名前などのメタデータにしか影響しないキー
+METADATA_KEYS = {"VERSION", "VENDER_NAME"}
+# fonttools_script.py の処理にしか影響しないキー
+FONTTOOLS_KEYS = {"NEW_FONT_NAME", "FONTTOOLS_PREFIX", "OS2_ASCENT", "OS2_DESCENT"}
+
+# ステージ (後ろのステージは前のステージの出力を使う)
+STAGE_PREPARE = 0  # ソースフォントを開いて下準備する
+STAGE_FONTFORGE = 1  # build_font() で合成用のフォントを作る
+STAGE_FONTTOOLS = 2  # ヒンティング、結合、メタデータ設定
+STAGE_RESTAMP = 3  # メタデータのみ書き直す
+
+options = {}
+
+
+def main():
+    get_options()
+    if options.get("unknown-option"):
+        usage()
+        return 1
+
+    fontforge_script.options.update(options)
+    styles = options.get("style", ["Regular"])
+    interval = options.get("interval", 1.0)
+
+    os.makedirs(snapshot_dir(), exist_ok=True)
+    worker = Worker(styles)
+
+    print(f"Watching for changes ({', '.join(styles)}). Press Ctrl+C to stop.")
+    worker.run(STAGE_PREPARE)
+
+    mtimes = scan_mtimes()
+    settings = read_settings()
+    try:
+        while True:
+            time.sleep(interval)
+            new_mtimes = scan_mtimes()
+            changed = {
+                path
+                for path in mtimes.keys() | new_mtimes.keys()
+                if mtimes.get(path) != new_mtimes.get(path)
+            }
+            if not changed:
+                continue
+            mtimes = new_mtimes
+
+            for path in sorted(changed):
+                print(f"changed: {path}")
+            new_settings = read_settings()
+            stage = classify_changes(changed, settings, new_settings)
+            settings = new_settings
+            worker.run(stage)
+    except KeyboardInterrupt:
+        print()
+    return 0
+
+
+def usage():
+    print(
+        f"Usage: {sys.argv[0]} "
+        "[--hidden-zenkaku-space] [--35] [--console] [--nerd-font] "
+        "[--style STYLE]... [--interval SECONDS]"
+    )
+
+
+def get_options():
+    """オプションを取得する (fontforge_script.py と同じバリエーション指定を使う)"""
+
+    global options
+
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg == "--hidden-zenkaku-space":
+            options["hidden-zenkaku-space"] = True
+        elif arg == "--35":
+            options["35"] = True
+        elif arg == "--console":
+            options["console"] = True
+        elif arg == "--nerd-font":
+            options["nerd-font"] = True
+        elif arg == "--style":
+            options.setdefault("style", []).append(next(args, ""))
+        elif arg == "--interval":
+            options["interval"] = float(next(args, "1"))
+        else:
+            options["unknown-option"] = True
+            return
+
+
+def get_source_styles(merged_style):
+    """合成後のスタイルから (JP, ENG) のソーススタイルを返す (main() と同じ対応)"""
+    jp_style = merged_style.replace("Italic", "") or "Regular"
+    return jp_style, merged_style
+
+
+def snapshot_dir():
+    return f"{fontforge_script.BUILD_FONTS_DIR}/.watch"
+
+
+def scan_mtimes():
+    """監視対象ファイルの更新時刻を返す"""
+    paths = glob.glob(f"{fontforge_script.SOURCE_FONTS_DIR}/**/*", recursive=True)
+    paths += glob.glob(f"{HINTING_DIR}/*")
+    paths += [SETTINGS_FILE] + SCRIPTS
+    mtimes = {}
+    for path in paths:
+        if os.path.isfile(path):
+            mtimes[os.path.normpath(path)] = os.stat(path).st_mtime_ns
+    return mtimes
+
+
+def read_settings():
+    settings = configparser.ConfigParser()
+    settings.read(SETTINGS_FILE, encoding="utf-8")
+    return dict(settings["DEFAULT"])
+
+
+def classify_changes(changed, old_settings, new_settings):
+    """変更されたファイルから、どのステージから再実行するかを決める"""
+    stage = STAGE_RESTAMP + 1
+    for path in changed:
+        if path == SETTINGS_FILE:
+            keys = {
+                key.upper()
+                for key in old_settings.keys() | new_settings.keys()
+                if old_settings.get(key) != new_settings.get(key)
+            }
+            if keys <= METADATA_KEYS:
+                stage = min(stage, STAGE_RESTAMP)
+            elif keys <= METADATA_KEYS | FONTTOOLS_KEYS:
+                stage = min(stage, STAGE_FONTTOOLS)
+            else:
+                stage = min(stage, STAGE_PREPARE)
+        elif path.startswith(HINTING_DIR + os.sep) or path in (
+            "fonttools_script.py",
+            "disjoint_merge.py",
+            "dedup_outlines.py",
+        ):
+            stage = min(stage, STAGE_FONTTOOLS)
+        elif path.endswith(".sfd") or path in ("fontforge_script.py", "unicode_ranges.py"):
+            # スナップショットを作り直すかどうかは Worker がスクリプトの内容で判断する
+            stage = min(stage, STAGE_FONTFORGE)
+        else:
+            # ソースフォント (ttf) の変更
+            stage = min(stage, STAGE_PREPARE)
+    return stage
+
+
+class Worker:
+    """スタイル毎の下準備済みスナップショットを持ち、指定ステージ以降を再実行する"""
+
+    def __init__(self, styles):
+        self.styles = styles
+        # スタイル -> スナップショット作成時のキー
+        self.snapshots = {}
+
+    def run(self, stage):
+        if stage > STAGE_RESTAMP:
+            return
+        start = time.time()
+        try:
+            self.reload_scripts(stage)
+            for style in self.styles:
+                self.run_style(style, stage)
+        except Exception:
+            traceback.print_exc()
+            print("Build failed. Waiting for changes...")
+            return
+        print(f"Done in {time.time() - start:.1f}s. Waiting for changes...")
+
+    def reload_scripts(self, stage):
+        """変更されたスクリプトや build.ini の内容を読み込み直す"""
+        if stage <= STAGE_FONTFORGE:
+            importlib.reload(unicode_ranges)
+            importlib.reload(fontforge_script)
+            fontforge_script.options.update(options)
+        if stage <= STAGE_RESTAMP:
+            importlib.reload(dedup_outlines)
+            importlib.reload(disjoint_merge)
+            importlib.reload(fonttools_script)
+            importlib.reload(restamp_fonts)
+
+    def run_style(self, style, stage):
+        print(f"=== Watch build {style} ===")
+        if stage <= STAGE_FONTFORGE:
+            jp_font, eng_font = self.open_prepared_fonts(style)
+            report = []
+            fontforge_script.build_font(jp_font, eng_font, style, report)
+            print_report(style, report)
+        if stage <= STAGE_FONTTOOLS:
+            self.run_fonttools(style)
+        else:
+            font_path, error = restamp_fonts.restamp_font(self.output_path(style))
+            if error:
+                raise RuntimeError(f"{font_path}: {error}")
+        print(f"-> {self.output_path(style)}")
+
+    def snapshot_key(self, style):
+        """スナップショットの有効性を判定するキー
+        ソースフォントの更新時刻と、スクリプトや設定 (SCRIPT_FILES) の内容から作る。
+        """
+        jp_style, eng_style = get_source_styles(style)
+        source_dir = fontforge_script.SOURCE_FONTS_DIR
+        paths = [
+            f"{source_dir}/" + fontforge_script.JP_FONT.replace("{style}", jp_style),
+            f"{source_dir}/" + fontforge_script.KR_FONT.replace("{style}", jp_style),
+            f"{source_dir}/" + fontforge_script.ENG_FONT.replace("{style}", eng_style),
+        ]
+        key = hashlib.sha256()
+        for path in paths:
+            key.update(f"{path}:{os.stat(path).st_mtime_ns}".encode())
+        # 下準備の関数だけでなく、それらが使う定数や設定の変更も反映する
+        for path in SCRIPT_FILES:
+            with open(path, "rb") as f:
+                key.update(f.read())
+        return key.hexdigest()
+
+    def open_prepared_fonts(self, style):
+        """下準備済みのフォントを開く
+        FontForge のフォントはメモリ上で複製できないため、
+        下準備の結果を sfd のスナップショットとして保存しておき、それを開き直す。
+        (ttf で保存すると座標が丸められ、通常のビルドと結果が変わる)
+        """
+        jp_path = f"{snapshot_dir()}/{style}-jp.sfd"
+        eng_path = f"{snapshot_dir()}/{style}-eng.sfd"
+        key = self.snapshot_key(style)
+        if (
+            self.snapshots.get(style) != key
+            or not os.path.exists(jp_path)
+            or not os.path.exists(eng_path)
+        ):
+            print(f"prepare source fonts for {style}")
+            jp_font, eng_font = fontforge_script.prepare_source_fonts(
+                *get_source_styles(style)
+            )
+            jp_font.save(jp_path)
+            eng_font.save(eng_path)
+            jp_font.close()
+            eng_font.close()
+            self.snapshots[style] = key
+        return fontforge.open(jp_path), fontforge.open(eng_path)
+
+    def run_fonttools(self, style):
+        """fonttools_script.py の処理を 1 スタイル分だけ実行する
+        中間ファイルは次の再実行で使うので削除しない。
+        """
+        variant = fontforge_script.get_variant().replace(" ", "")
+        eng_path = (
+            f"{fontforge_script.BUILD_FONTS_DIR}/{fontforge_script.FONTFORGE_PREFIX}"
+            f"{fontforge_script.FONT_NAME}{variant}-{style}-eng.ttf"
+        )
+        fonttools_script.add_hinting(
+            eng_path, eng_path.replace(".ttf", "-hinted.ttf"), variant, style
+        )
+        merged_font = fonttools_script.merge_fonts(style, variant)
+        fonttools_script.fix_font_tables(merged_font, style, variant)
+
+    def output_path(self, style):
+        variant = fontforge_script.get_variant().replace(" ", "")
+        output_variant = variant.replace(fontforge_script.CONSOLE_STR, "")
+        font_family = fonttools_script.NEW_FONT_NAME.replace(" ", "")
+        return (
+            f"{fontforge_script.BUILD_FONTS_DIR}/{font_family}{output_variant}-{style}.ttf"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())